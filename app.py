@@ -1,33 +1,50 @@
-from datetime import datetime, timedelta
+import contextlib
+import importlib.util
+import time
+from datetime import timedelta
 
 import numpy as np
 import pandas as pd
-try:
-    import plotly.graph_objects as go
-except Exception:
-    go = None
 import streamlit as st
 import traceback
 
 try:
     from services.data_loader import (
         get_meta_token,
+        fetch_main_data,
+        fetch_today_insights,
         load_main_data,
         diagnose_meta_no_data,
+        demographics_cached_for_ads,
+        demographics_mode,
+        load_demographics_for_ads,
+        prefetch_demographics_for_ads,
+        today_hourly,
     )
 except Exception:
     st.error("data_loader import failed")
     st.code(traceback.format_exc())
     st.stop()
 from services.diagnosis import run_diagnosis
-from services.action_store import load_actions, upsert_action, delete_action
-from services.time_utils import kst_now, kst_today
+from services.action_store import action_sync_status, actions_version, load_actions, upsert_action, delete_action
+from services.action_calendar import action_calendar
+from services.trend_cube import FREQ_MAP, trend_slice
+from services.demog_cube import build_demog_cube, demog_conversions, demog_pivot, demog_slice, has_demog_rows
+from services.data_snapshot import get_snapshot_holder
+from services.single_flight import get_single_flight, single_flight
+from services.cache_registry import ACTIONS, ASSETS, DEMOGRAPHICS, INSIGHTS, STATUSES, get_cache_registry
+from services.disk_cache import RECORDS_CODEC, get_disk_cache
+from services.status_enrichment import annotate_delivery_status
+from services.sheets_client import get_sheets_connection
+from services.stage_report import get_stage_report
+from services.time_utils import kst_today
 
 # -----------------------------------------------------------------------------
 # [SETUP] 페이지 설정
 # -----------------------------------------------------------------------------
 st.set_page_config(page_title="광고 성과 관리 BI", page_icon=None, layout="wide", initial_sidebar_state="collapsed")
-if go is None:
+# plotly는 차트를 그릴 때 불러온다 (시작 시간 단축). 여기서는 설치 여부만 확인
+if importlib.util.find_spec("plotly") is None:
     st.error("plotly 패키지가 설치되어 있지 않습니다. 네트워크가 되는 환경에서 설치해 주세요.")
     st.code("/Users/kmj/Desktop/Cursor/venv/bin/pip install plotly", language="bash")
     st.stop()
@@ -38,12 +55,7 @@ st.markdown("""
     div[data-testid="stExpanderDetails"] {padding-top: 0.5rem; padding-bottom: 0.5rem;}
     p {margin-bottom: 0px !important;} 
     hr {margin: 0.5rem 0 !important;}
-    .tl-note {font-size: 12px; color: #666; text-align: center;}
-    .tl-wrap {background: transparent; border: 0; border-radius: 0; padding: 0;}
     .tl-panel {background: #efefef; border: 0; border-radius: 8px; padding: 10px;}
-    .tl-cell button {width: 48px !important; height: 44px !important; padding: 0 !important;}
-    .tl-cell-selected button {border: 2px solid #111 !important;}
-    .tl-cell button p {font-size: 11px !important; line-height: 1.1;}
     .tl-form {display: flex; align-items: center; gap: 8px;}
     .sec-divider {border-top: 1px solid #eef0f2; margin: 10px 0;}
     .v-divider {border-left: 1px solid #eef0f2; padding-left: 12px; height: 100%;}
@@ -73,105 +85,163 @@ def _set_selected_date(cid: str, d_str: str) -> None:
     st.session_state["action_selected"] = current
 
 
-_ACTIVE_STATUS = {"ACTIVE", "ON", "ENABLED", "RUNNING"}
-
+def _fetch_meta_video_assets(ad_ids: tuple) -> dict:
+    try:
+        from meta_api import fetch_ad_video_assets
+    except Exception:
+        return {}
+    try:
+        return fetch_ad_video_assets(list(ad_ids), token=get_meta_token())
+    except Exception:
+        return {}
 
-def _is_active_status_value(raw: str) -> bool:
-    return str(raw or "").strip().upper() in _ACTIVE_STATUS
 
+@st.cache_data(ttl=1800)
+@single_flight("app._fetch_meta_video_assets_cached")
+def _fetch_meta_video_assets_cached(ad_ids: tuple) -> dict:
+    if not ad_ids:
+        return {}
+    return get_disk_cache().get_or_compute(
+        "ad_video_assets", ad_ids, lambda: _fetch_meta_video_assets(ad_ids), RECORDS_CODEC, ttl=1800
+    )
 
-def _annotate_effective_delivery_status(df_src: pd.DataFrame) -> pd.DataFrame:
-    if df_src is None or df_src.empty:
-        return df_src.copy() if isinstance(df_src, pd.DataFrame) else pd.DataFrame()
 
-    work = df_src.copy()
-    if "Status" not in work.columns:
-        work["Status"] = ""
+def _clear_meta_video_assets() -> None:
+    _fetch_meta_video_assets_cached.clear()
+    get_disk_cache().delete("ad_video_assets")
+    try:
+        from meta_api import clear_creative_video_memo
+    except Exception:
+        return
+    clear_creative_video_memo()
 
-    work["Effective_Is_On"] = work["Status"].astype(str).apply(_is_active_status_value)
-    work["Effective_Status"] = np.where(work["Effective_Is_On"], "ACTIVE", "PAUSED")
 
-    if "Platform" not in work.columns or "Ad_ID" not in work.columns:
-        return work
+_STATUS_TTL = 600
 
-    meta_mask = work["Platform"].astype(str).str.upper() == "META"
-    if not meta_mask.any():
-        return work
 
-    meta_rows = work.loc[meta_mask].copy()
-    meta_rows["ad_id"] = meta_rows["Ad_ID"].astype(str).str.strip()
-    meta_rows["status_raw"] = meta_rows["Status"].astype(str).str.upper().str.strip()
+def _fetch_meta_delivery_statuses(ad_ids: tuple) -> dict:
+    try:
+        from meta_api import fetch_ad_delivery_statuses
+    except Exception:
+        return {}
+    try:
+        return fetch_ad_delivery_statuses(list(ad_ids), token=get_meta_token())
+    except Exception:
+        return {}
 
-    ad_ids = sorted({v for v in meta_rows["ad_id"].tolist() if v and v.lower() != "nan"})
-    asset_map = _fetch_meta_video_assets_cached(tuple(ad_ids)) if ad_ids else {}
 
-    meta_rows["ad_status"] = meta_rows["ad_id"].map(
-        lambda x: str((asset_map.get(str(x)) or {}).get("ad_status") or "").upper().strip()
-    )
-    meta_rows["adset_status"] = meta_rows["ad_id"].map(
-        lambda x: str((asset_map.get(str(x)) or {}).get("adset_status") or "").upper().strip()
-    )
-    meta_rows["campaign_status"] = meta_rows["ad_id"].map(
-        lambda x: str((asset_map.get(str(x)) or {}).get("campaign_status") or "").upper().strip()
+@st.cache_data(ttl=_STATUS_TTL)
+@single_flight("app._fetch_meta_delivery_statuses_cached")
+def _fetch_meta_delivery_statuses_cached(ad_ids: tuple) -> dict:
+    # 상태만 묻는 가벼운 조회. 소재 payload(영상 정보)는 _fetch_meta_video_assets_cached가 따로 맡는다
+    if not ad_ids:
+        return {}
+    return get_disk_cache().get_or_compute(
+        "ad_delivery_statuses",
+        ad_ids,
+        lambda: _fetch_meta_delivery_statuses(ad_ids),
+        RECORDS_CODEC,
+        ttl=_STATUS_TTL,
     )
 
-    # ad_status만 비었을 때는 기존 Status를 보조값으로 쓰되,
-    # 게재중 판단은 ad/adset/campaign 셋 모두 활성일 때만 True.
-    meta_rows["ad_status"] = meta_rows["ad_status"].replace("", np.nan).fillna(meta_rows["status_raw"])
-    meta_rows["Effective_Is_On"] = (
-        meta_rows["ad_status"].apply(_is_active_status_value)
-        & meta_rows["adset_status"].apply(_is_active_status_value)
-        & meta_rows["campaign_status"].apply(_is_active_status_value)
-    )
-    meta_rows["Effective_Status"] = np.where(meta_rows["Effective_Is_On"], "ACTIVE", "PAUSED")
 
-    for col in ("ad_status", "adset_status", "campaign_status", "Effective_Is_On", "Effective_Status"):
-        work.loc[meta_rows.index, col] = meta_rows[col]
+def _clear_meta_delivery_statuses() -> None:
+    _fetch_meta_delivery_statuses_cached.clear()
+    get_disk_cache().delete("ad_delivery_statuses")
 
-    return work
 
+def _clear_actions_cache() -> None:
+    st.session_state["actions_cache"] = None
 
-@st.cache_data(ttl=1800)
-def _fetch_meta_video_assets_cached(ad_ids: tuple) -> dict:
-    if not ad_ids:
-        return {}
-    try:
-        from meta_api import fetch_ad_video_assets
-    except Exception:
-        return {}
-    try:
-        return fetch_ad_video_assets(list(ad_ids), token=get_meta_token())
-    except Exception:
-        return {}
+
+_cache_registry = get_cache_registry()
+_cache_registry.register(ASSETS, "_fetch_meta_video_assets_cached", _clear_meta_video_assets)
+_cache_registry.register(STATUSES, "_fetch_meta_delivery_statuses_cached", _clear_meta_delivery_statuses)
+_cache_registry.register(ACTIONS, "actions_cache", _clear_actions_cache)
+
+# 데이터 업데이트 범위: None이면 전체 캐시 초기화
+_REFRESH_SCOPES = {
+    "인사이트": (INSIGHTS,),
+    "성별/연령": (DEMOGRAPHICS,),
+    "소재/영상": (ASSETS,),
+    "게재 상태": (STATUSES,),
+    "조치 내용": (ACTIONS,),
+    "전체": None,
+}
 # -----------------------------------------------------------------------------
 # 3. 사이드바 & 데이터 준비
 # -----------------------------------------------------------------------------
-if "data_cache" not in st.session_state:
-    st.session_state["data_cache"] = {}
-if "data_loaded_at" not in st.session_state:
-    st.session_state["data_loaded_at"] = None
+def _with_delivery_status(df: pd.DataFrame, pipeline: str = "insights") -> pd.DataFrame:
+    # 게재 상태(ad/adset/campaign)는 고유 ad_id당 한 번, 여기서만 조회해 붙인다
+    t0 = time.perf_counter()
+    out = annotate_delivery_status(df, _fetch_meta_delivery_statuses_cached)
+    get_stage_report().record(pipeline, "게재 상태 병합", len(out), ms=(time.perf_counter() - t0) * 1000)
+    return out
 
-if st.session_state["data_cache"].get("df_raw") is None:
+
+def _build_main_data():
     df_raw, meta_fetched_at, df_demographics = load_main_data()
-    df_raw = _annotate_effective_delivery_status(df_raw)
-    st.session_state["data_cache"]["df_raw"] = df_raw
-    st.session_state["data_cache"]["df_demographics"] = df_demographics
-    st.session_state["data_cache"]["meta_fetched_at"] = meta_fetched_at
-    st.session_state["data_loaded_at"] = kst_now()
-else:
-    df_raw = st.session_state["data_cache"]["df_raw"]
-    if not df_raw.empty and "Effective_Is_On" not in df_raw.columns:
-        df_raw = _annotate_effective_delivery_status(df_raw)
-        st.session_state["data_cache"]["df_raw"] = df_raw
-    df_demographics = st.session_state["data_cache"].get("df_demographics", pd.DataFrame())
-    meta_fetched_at = st.session_state["data_cache"]["meta_fetched_at"]
+    return _with_delivery_status(df_raw), meta_fetched_at, df_demographics
+
+
+def _refresh_main_data():
+    df_raw, meta_fetched_at, df_demographics = fetch_main_data(fresh=True)
+    return _with_delivery_status(df_raw), meta_fetched_at, df_demographics
+
+
+def _refresh_today():
+    # 오늘 구간만 짧은 주기로 다시 받는다. 게재 상태는 캐시(_STATUS_TTL) 것을 그대로 사용
+    day, df_today, through = fetch_today_insights(hourly=today_hourly())
+    return day, _with_delivery_status(df_today, "today"), through
+
+
+# 세션별 복사본 대신 프로세스 공유 스냅샷을 참조 (이번 rerun 동안은 같은 버전 사용)
+# 만료 직전 백그라운드 스레드가 새 스냅샷으로 교체하므로 사용자는 갱신을 기다리지 않는다
+# 오늘 수치는 그 사이에도 hot_refresh가 오늘 행만 교체해 몇 분 단위로 따라간다 (다음 rerun부터 반영)
+snapshot = get_snapshot_holder().get_or_build(
+    _build_main_data, refresh=_refresh_main_data, hot_refresh=_refresh_today
+)
+st.session_state["data_version"] = snapshot.version
+df_raw = snapshot.df_raw
+df_demographics = snapshot.df_demographics
+meta_fetched_at = snapshot.meta_fetched_at
+trend_cube = snapshot.trend_cube
+demog_cube = snapshot.demog_cube
+
+_AD_KEY_COLS = ["Campaign", "AdGroup", "Creative_ID"]
+
+
+def _selected_ad_ids(creative=None, adgroup=None, campaign=None) -> tuple:
+    """선택 조건(demog_slice와 같은 규칙)에 해당하는 Meta ad_id."""
+    if df_raw.empty or "Ad_ID" not in df_raw.columns:
+        return ()
+    mask = pd.Series(True, index=df_raw.index)
+    if creative:
+        mask &= df_raw["Creative_ID"].astype(str) == str(creative)
+    else:
+        if adgroup:
+            mask &= df_raw["AdGroup"].astype(str) == str(adgroup)
+        if campaign:
+            mask &= df_raw["Campaign"].astype(str) == str(campaign)
+    return tuple(sorted({str(v) for v in df_raw.loc[mask, "Ad_ID"].dropna() if str(v).strip()}))
+
+
+def _prefetch_flagged_demographics(diag_df: pd.DataFrame) -> None:
+    """lazy 모드: Red/Yellow 소재는 '분석하기'를 누를 가능성이 높아 성별/연령을 미리 받아 둔다."""
+    if diag_df.empty or "Status_Color" not in diag_df.columns or "Ad_ID" not in df_raw.columns:
+        return
+    flagged = diag_df.loc[diag_df["Status_Color"].isin(["Red", "Yellow"]), _AD_KEY_COLS].drop_duplicates()
+    if flagged.empty:
+        return
+    ad_ids = flagged.astype(str).merge(
+        df_raw[_AD_KEY_COLS + ["Ad_ID"]].astype(str).drop_duplicates(), on=_AD_KEY_COLS
+    )["Ad_ID"]
+    prefetch_demographics_for_ads(ad_ids.tolist())
+
 
 # Meta 로드 건수 (필터 적용 전 기준, 진단/표시용)
 meta_row_count = int((df_raw["Platform"] == "Meta").sum()) if (not df_raw.empty and "Platform" in df_raw.columns) else len(df_raw)
 
-# 1. Main Data
-df_filtered = df_raw.copy()
-target_df = df_filtered.copy()
 
 # -----------------------------------------------------------------------------
 
@@ -180,15 +250,20 @@ def render_existing_dashboard() -> None:
     # -----------------------------------------------------------------------------
     st.title("광고 성과 관리 대시보드")
 
-    ctrl_left, ctrl_mid, ctrl_right = st.columns([1.2, 4, 1.2])
+    ctrl_left, ctrl_mid, ctrl_scope, ctrl_right = st.columns([1.2, 3, 1, 1.2])
     with ctrl_left:
         st.number_input("목표 CPA", min_value=0, step=1000, key="target_cpa_warning")
+    with ctrl_scope:
+        refresh_scope = st.selectbox("갱신 범위", list(_REFRESH_SCOPES), key="refresh_scope")
     with ctrl_right:
         st.markdown("<div style='height: 1.9rem;'></div>", unsafe_allow_html=True)
         if st.button("데이터 업데이트", use_container_width=True):
-            st.cache_data.clear()
-            st.session_state["data_cache"] = {}
-            st.session_state["data_loaded_at"] = None
+            scopes = _REFRESH_SCOPES[refresh_scope]
+            if scopes is None:
+                st.cache_data.clear()
+                _cache_registry.invalidate(*_cache_registry.scopes())
+            else:
+                _cache_registry.invalidate(*scopes)
             st.rerun()
 
     target_cpa_warning = int(st.session_state["target_cpa_warning"])
@@ -205,7 +280,25 @@ def render_existing_dashboard() -> None:
         status_txt = f"Meta {meta_row_count:,}건 로드"
         if meta_fetched_at:
             status_txt += f" | 반영시점 {meta_fetched_at.strftime('%Y-%m-%d %H:%M:%S')} KST"
+        status_txt += f" | 데이터 경과 {snapshot.age_seconds() // 60:.0f}분"
+        if snapshot.today_patched_at:
+            status_txt += f" | 오늘 {snapshot.today_patched_at.strftime('%H:%M')} 갱신"
+            if snapshot.today_through:
+                status_txt += f" ({snapshot.today_through}대까지)"
+        if get_snapshot_holder().refreshing:
+            status_txt += " | 백그라운드 갱신 중"
         st.caption(status_txt)
+        with st.expander("데이터 스냅샷 상태", expanded=False):
+            st.markdown("**스냅샷 버전별 메모리**")
+            st.dataframe(get_snapshot_holder().memory_report(), use_container_width=True, hide_index=True)
+            st.markdown("**동시 요청 병합 (single-flight)**")
+            st.dataframe(get_single_flight().stats(), use_container_width=True, hide_index=True)
+            st.markdown("**디스크 캐시**")
+            st.dataframe(get_disk_cache().stats(), use_container_width=True, hide_index=True)
+            st.markdown("**단계별 행 수** (조회 → 파싱 → 진단, 단계마다 최근 값)")
+            st.dataframe(get_stage_report().frame(), use_container_width=True, hide_index=True)
+            st.markdown("**Google Sheets 호출** (공유 연결, 작업별)")
+            st.dataframe(get_sheets_connection().stats(), use_container_width=True, hide_index=True)
 
     st.subheader("1. 캠페인 성과 진단")
 
@@ -215,6 +308,13 @@ def render_existing_dashboard() -> None:
     sheet_err = st.session_state.get("sheet_error")
     if sheet_err:
         st.error(f"조치 시트 연결 오류: {sheet_err}")
+    # 저장/삭제는 로컬에 먼저 기록되고 시트에는 백그라운드에서 모아서 반영된다
+    action_sync = action_sync_status()
+    if action_sync["pending"]:
+        sync_txt = f"시트 반영 대기 {action_sync['pending']}건"
+        if action_sync["last_error"]:
+            sync_txt += f" | {action_sync['retry_in']}초 후 재시도 ({action_sync['last_error'][:80]})"
+        st.caption(sync_txt)
     report_cols = st.columns([2, 1, 6])
     with report_cols[0]:
         report_date = st.date_input("날짜 선택", kst_today(), key="action_report_date")
@@ -232,7 +332,7 @@ def render_existing_dashboard() -> None:
                 st.info("선택한 날짜의 조치 내용이 없습니다.")
             else:
                 # 선택 날짜에 Spend 1 이상인 소재만
-                df_day = df_raw.copy()
+                df_day = df_raw
                 if "Date" in df_day.columns:
                     df_day = df_day[df_day["Date"].dt.date == report_date]
                 df_day = df_day[df_day["Cost"] >= 1] if "Cost" in df_day.columns else df_day
@@ -261,16 +361,20 @@ def render_existing_dashboard() -> None:
     else:
         diag_base = pd.DataFrame()
     diag_res = run_diagnosis(diag_base, target_cpa_warning)
+    stage_report = get_stage_report()
+    stage_report.record("diagnosis", "최근 15일 행", len(diag_base))
+    stage_report.record("diagnosis", "진단 소재 (3일 비용 3,000 이상)", len(diag_res))
     
     if not diag_res.empty:
-        if "actions_cache" not in st.session_state:
-            st.session_state["actions_cache"] = None
-        if st.session_state["actions_cache"] is None:
+        # 저장/삭제는 메모리 표에 바로 반영되므로 변경 번호가 바뀐 경우에만 다시 받는다
+        actions_ver = actions_version()
+        if st.session_state.get("actions_cache") is None or st.session_state.get("actions_cache_version") != actions_ver:
             st.session_state["actions_cache"] = load_actions()
+            st.session_state["actions_cache_version"] = actions_ver
         actions_df = st.session_state["actions_cache"]
         # 진단 결과에 최신 상태 병합
         if "Status" in df_raw.columns:
-            status_src = df_raw.copy()
+            status_src = df_raw
             if "Date" in status_src.columns:
                 status_src = status_src.sort_values("Date")
             status_latest = status_src.dropna(subset=["Status"]).groupby(
@@ -290,10 +394,14 @@ def render_existing_dashboard() -> None:
             )
             active_campaign_names = set(active_campaigns[active_campaigns].index.tolist())
             diag_res = diag_res[diag_res["Campaign"].isin(active_campaign_names)].copy()
+            stage_report.record("diagnosis", "게재중 캠페인 소재", len(diag_res))
 
         def _is_active_status(v: str) -> bool:
             return str(v).upper() in {"ACTIVE", "ON", "ENABLED"}
 
+        if demographics_mode() == "lazy":
+            _prefetch_flagged_demographics(diag_res)
+
         camp_grps = diag_res.groupby('Campaign')
         sorted_camps = []
 
@@ -304,7 +412,7 @@ def render_existing_dashboard() -> None:
             if not include_today:
                 end_d = end_d - timedelta(days=1)
             start_d = end_d - timedelta(days=days - 1)
-            d = df_camp.copy()
+            d = df_camp
             d["Date"] = pd.to_datetime(d["Date"], errors="coerce")
             d = d[d["Date"].notna()]
             d = d[(d["Date"].dt.date >= start_d) & (d["Date"].dt.date <= end_d)]
@@ -320,7 +428,7 @@ def render_existing_dashboard() -> None:
             h_col = ":red" if has_red else ":orange" if has_yellow else ":blue"
 
             # 캠페인 기간 요약은 '진단 대상 일부 소재'가 아니라 캠페인 전체 원본 기준으로 계산
-            camp_base = diag_base[diag_base["Campaign"] == c_name].copy() if ("Campaign" in diag_base.columns) else pd.DataFrame()
+            camp_base = diag_base[diag_base["Campaign"] == c_name] if ("Campaign" in diag_base.columns) else pd.DataFrame()
             cpa_today, ct, cvt = _calc_period_stats(camp_base, 1, include_today=True)
             cpa3, c3, cv3 = _calc_period_stats(camp_base, 3, include_today=False)
             cpa7, c7, cv7 = _calc_period_stats(camp_base, 7, include_today=False)
@@ -425,44 +533,15 @@ def render_existing_dashboard() -> None:
                     # 3컬럼: 좌/중/우 + 중간 여백
                     tl_left, gap1, tl_mid, gap2, tl_right = st.columns([3, 0.4, 3, 0.4, 3])
                     with tl_left:
-                        st.markdown("<div class='tl-panel'>", unsafe_allow_html=True)
-                        st.markdown("<div class='tl-wrap'>", unsafe_allow_html=True)
-                        weekday_cols = st.columns(7)
-                        weekday_labels = ["일", "월", "화", "수", "목", "금", "토"]
-                        for col, lbl in zip(weekday_cols, weekday_labels):
-                            col.markdown(f"<div class='tl-note'><strong>{lbl}</strong></div>", unsafe_allow_html=True)
-    
-                        # 요일 정렬을 위한 빈 칸 보정
-                        offset = (start.weekday() + 1) % 7  # Sunday=0
-                        cells = [""] * offset + [d.isoformat() for d in dates]
-                        while len(cells) % 7 != 0:
-                            cells.append("")
-    
-                        for row_start in range(0, len(cells), 7):
-                            cols = st.columns(7)
-                            for col, d_str in zip(cols, cells[row_start:row_start + 7]):
-                                if not d_str:
-                                    col.markdown("<div class='tl-note'></div>", unsafe_allow_html=True)
-                                    continue
-                                d = datetime.fromisoformat(d_str).date()
-                                act = action_by_date.get(d_str, "").strip()
-                                icon = "⬜"
-                                if act == "증액":
-                                    icon = "🟦"
-                                elif act == "보류":
-                                    icon = "🟨"
-                                elif act == "종료":
-                                    icon = "🟥"
-                                label = f"{icon}\n{d.strftime('%m/%d')}"
-                                with col:
-                                    cls = "tl-cell-selected" if d_str == selected_date else "tl-cell"
-                                    st.markdown(f"<div class='{cls}'>", unsafe_allow_html=True)
-                                    key_id = f"tl_{item['name']}_{r['AdGroup']}_{cid}_{d_str}_{idx}"
-                                    if st.button(label, key=key_id, on_click=_set_selected_date, args=(cid, d_str)):
-                                        pass
-                                    st.markdown("</div>", unsafe_allow_html=True)
-                        st.markdown("</div>", unsafe_allow_html=True)
-                        st.markdown("</div>", unsafe_allow_html=True)
+                        clicked_date = action_calendar(
+                            dates,
+                            action_by_date,
+                            selected_date,
+                            key=f"tl_{item['name']}_{r['AdGroup']}_{cid}_{idx}",
+                        )
+                        if clicked_date and clicked_date != selected_date:
+                            _set_selected_date(cid, clicked_date)
+                            selected_date = clicked_date
     
                     with tl_mid:
                         st.markdown("<div class='tl-panel'>", unsafe_allow_html=True)
@@ -497,7 +576,6 @@ def render_existing_dashboard() -> None:
                                 if selected_date:
                                     try:
                                         delete_action(action_date=selected_date, creative_key=cid)
-                                        st.session_state["actions_cache"] = None
                                         st.success("삭제 완료")
                                         st.rerun()
                                     except Exception as e:
@@ -519,7 +597,6 @@ def render_existing_dashboard() -> None:
                                             note=note,
                                             author="",
                                         )
-                                        st.session_state["actions_cache"] = None
                                         st.success("저장 완료")
                                         st.rerun()
                                     except Exception as e:
@@ -636,65 +713,47 @@ def render_existing_dashboard() -> None:
     target_adgroup = st.session_state['chart_target_adgroup']
     target_campaign = st.session_state['chart_target_campaign']
     
-    trend_df = target_df.copy()
-    demog_source = df_demographics.copy() if isinstance(df_demographics, pd.DataFrame) else pd.DataFrame()
-    demog_df = pd.DataFrame()
+    trend_sel = {"creative": target_creative, "adgroup": target_adgroup, "campaign": target_campaign}
+    demog_sliced = None
+    demog_view_cube = demog_cube
+    demog_lazy = demographics_mode() == "lazy"
     is_specific = False
     
     has_selection = (target_creative is not None and str(target_creative) != "") or bool(target_adgroup) or bool(target_campaign)
     if has_selection:
-        if target_creative and 'Creative_ID' in trend_df.columns:
-            trend_df['Creative_ID'] = trend_df['Creative_ID'].astype(str)
-            trend_df = trend_df[trend_df['Creative_ID'] == str(target_creative)]
-        else:
-            if target_adgroup:
-                trend_df = trend_df[trend_df['AdGroup'] == target_adgroup]
-            if target_campaign:
-                trend_df = trend_df[trend_df['Campaign'] == target_campaign]
-
-        sel_row = trend_df
-        if not sel_row.empty:
-            demog_df = demog_source.copy()
-            if target_creative and 'Creative_ID' in demog_df.columns:
-                demog_df['Creative_ID'] = demog_df['Creative_ID'].astype(str)
-                demog_df = demog_df[demog_df['Creative_ID'] == str(target_creative)]
-            else:
-                if target_adgroup:
-                    demog_df = demog_df[demog_df['AdGroup'] == target_adgroup]
-                if target_campaign:
-                    demog_df = demog_df[demog_df['Campaign'] == target_campaign]
+        if not trend_slice(trend_cube, "D", **trend_sel).empty:
+            if demog_lazy:
+                # 선택한 광고의 breakdown만 조회 (광고별 캐시, 이미 받은 광고는 API 호출 없음)
+                try:
+                    sel_ad_ids = _selected_ad_ids(**trend_sel)
+                    # 프리패치 등으로 이미 받아 둔 광고면 로딩 표시 없이 바로 그린다
+                    loading = (
+                        contextlib.nullcontext() if demographics_cached_for_ads(sel_ad_ids)
+                        else st.spinner("성별/연령 데이터를 불러오는 중...")
+                    )
+                    with loading:
+                        df_demog_sel = load_demographics_for_ads(sel_ad_ids)
+                    demog_view_cube = build_demog_cube(df_demog_sel)
+                except Exception as e:
+                    demog_view_cube = {}
+                    st.warning(f"성별/연령 데이터를 불러오지 못했습니다: {str(e)[:200]}")
+            demog_sliced = demog_slice(demog_view_cube, **trend_sel)
             st.info(f"🔎 현재 **'{target_creative}'** 소재를 집중 분석 중입니다.")
 
         is_specific = True
     
-        # 날짜 필터로 인해 비어있는 경우, 전체 데이터에서 재시도
-        if trend_df.empty and not df_raw.empty:
-            full_df = df_raw.copy()
-            if target_creative:
-                if "Creative_ID" in full_df.columns:
-                    full_df['Creative_ID'] = full_df['Creative_ID'].astype(str)
-                trend_df = full_df[full_df['Creative_ID'] == str(target_creative)]
-            else:
-                if target_adgroup:
-                    full_df = full_df[full_df['AdGroup'] == target_adgroup]
-                if target_campaign:
-                    full_df = full_df[full_df['Campaign'] == target_campaign]
-                trend_df = full_df
-            if not trend_df.empty:
-                st.warning("선택한 날짜 범위에 데이터가 없어, 전체 기간 데이터를 표시합니다.")
-    
         if st.button("전체 목록으로 차트 초기화"):
             st.session_state['chart_target_creative'] = None
             st.session_state['chart_target_adgroup'] = None
             st.session_state['chart_target_campaign'] = None
             st.rerun()
     else:
-        demog_df = demog_source.copy()
+        if not demog_lazy:
+            demog_sliced = demog_slice(demog_cube)
         st.info("📊 통합 추세 분석 중 (특정 소재를 보려면 위에서 '분석하기'를 누르세요)")
     
     c_freq, c_opts, c_norm = st.columns([1, 2, 1])
     freq_option = c_freq.radio("집계 기준", ["1일", "3일", "7일"], horizontal=True)
-    freq_map = {"1일": "D", "3일": "3D", "7일": "W"}
     metrics = c_opts.multiselect(
         "지표 선택",
         ['Impressions', 'Clicks', 'CTR', 'CPM', 'CPC', 'CPA', 'Cost', 'Conversions', 'CVR', 'ROAS'],
@@ -702,18 +761,10 @@ def render_existing_dashboard() -> None:
     )
     use_norm = c_norm.checkbox("데이터 정규화 (0-100%)", value=True)
     
-    if not trend_df.empty and metrics:
-        agg_df = trend_df.set_index('Date').groupby(pd.Grouper(freq=freq_map[freq_option])).agg({
-            'Cost': 'sum', 'Impressions': 'sum', 'Clicks': 'sum', 'Conversions': 'sum', 'Conversion_Value': 'sum'
-        }).reset_index().sort_values('Date', ascending=False)
-    
-        agg_df['CPA'] = np.where(agg_df['Conversions'] > 0, agg_df['Cost'] / agg_df['Conversions'], 0)
-        agg_df['CPM'] = np.where(agg_df['Impressions'] > 0, agg_df['Cost'] / agg_df['Impressions'] * 1000, 0)
-        agg_df['CTR'] = np.where(agg_df['Impressions'] > 0, agg_df['Clicks'] / agg_df['Impressions'] * 100, 0)
-        agg_df['CPC'] = np.where(agg_df['Clicks'] > 0, agg_df['Cost'] / agg_df['Clicks'], 0)
-        agg_df['CVR'] = np.where(agg_df['Clicks'] > 0, agg_df['Conversions'] / agg_df['Clicks'] * 100, 0)
-        agg_df['ROAS'] = np.where(agg_df['Cost'] > 0, agg_df['Conversion_Value'] / agg_df['Cost'] * 100, 0)
-    
+    agg_df = trend_slice(trend_cube, FREQ_MAP[freq_option], **trend_sel) if metrics else pd.DataFrame()
+    if not agg_df.empty:
+        import plotly.graph_objects as go
+
         plot_df = agg_df.sort_values('Date', ascending=True)
         fig = go.Figure()
     
@@ -752,29 +803,26 @@ def render_existing_dashboard() -> None:
         st.divider()
         st.subheader("성별/연령 심층 분석")
     
-        if demog_df.empty or 'Gender' not in demog_df.columns:
+        if demog_lazy and not has_selection:
+            st.info("성별/연령은 위에서 '분석하기'로 소재를 선택하면 해당 광고만 불러옵니다.")
+        elif demog_sliced is None:
             st.info("데이터가 없습니다. (날짜 범위나 시트 데이터를 확인해주세요)")
         else:
-            valid_gender_check = demog_df[~demog_df['Gender'].isin(['Unknown', 'unknown', '알수없음'])]
-            if valid_gender_check.empty:
+            if not has_demog_rows(demog_sliced):
                 st.info("성별/연령 정보가 없습니다.")
             else:
-                demog_agg = valid_gender_check.groupby(['Age', 'Gender']).agg({
-                    'Cost': 'sum', 'Conversions': 'sum', 'Impressions': 'sum'
-                }).reset_index()
-                demog_agg['CPA'] = np.where(demog_agg['Conversions'] > 0, demog_agg['Cost'] / demog_agg['Conversions'], 0)
-    
-                male_data = demog_agg[demog_agg['Gender'].str.contains('남성|Male|male', case=False, na=False)]
-                female_data = demog_agg[demog_agg['Gender'].str.contains('여성|Female|female', case=False, na=False)]
+                conv_by_gender = demog_conversions(demog_view_cube, demog_sliced)
+                male_ages, male_conv = conv_by_gender["남성"]
+                female_ages, female_conv = conv_by_gender["여성"]
     
                 title_txt = f"{target_creative} 성별/연령별 전환수" if is_specific else "성별/연령별 전환수 (통합)"
                 st.markdown(f"#### {title_txt}")
     
+                import plotly.graph_objects as go
+
                 fig_conv = go.Figure()
-                male_y = -male_data['Conversions']
-                female_y = female_data['Conversions']
-                fig_conv.add_trace(go.Bar(y=male_data['Age'], x=male_y, name='남성', orientation='h', marker_color='#9EB9F3'))
-                fig_conv.add_trace(go.Bar(y=female_data['Age'], x=female_y, name='여성', orientation='h', marker_color='#F8C8C8'))
+                fig_conv.add_trace(go.Bar(y=male_ages, x=-male_conv, name='남성', orientation='h', marker_color='#9EB9F3'))
+                fig_conv.add_trace(go.Bar(y=female_ages, x=female_conv, name='여성', orientation='h', marker_color='#F8C8C8'))
                 fig_conv.update_layout(
                     barmode='overlay',
                     height=380,
@@ -789,12 +837,12 @@ def render_existing_dashboard() -> None:
                 with right:
                     st.markdown("**CPA**")
                     st.dataframe(
-                        demog_agg.pivot_table(index='Gender', columns='Age', values='CPA', aggfunc='sum', fill_value=0).style.format("{:,.0f}"),
+                        demog_pivot(demog_view_cube, demog_sliced, "CPA").style.format("{:,.0f}"),
                         use_container_width=True
                     )
                     st.markdown("**비용**")
                     st.dataframe(
-                        demog_agg.pivot_table(index='Gender', columns='Age', values='Cost', aggfunc='sum', fill_value=0).style.format("{:,.0f}"),
+                        demog_pivot(demog_view_cube, demog_sliced, "Cost").style.format("{:,.0f}"),
                         use_container_width=True
                     )
     else:
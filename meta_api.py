@@ -3,13 +3,20 @@ Meta Marketing API - Insights API 호출
 광고 성과 관리 BI 앱용 (ad 레벨, 일별)
 """
 
+import json
 import os
 import re
+import threading
 from typing import Any, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 import requests
 
 
+# 광고계정 시간대 기준 시간대별 breakdown (값 예: "13:00:00 - 13:59:59")
+HOURLY_BREAKDOWN = "hourly_stats_aggregated_by_advertiser_time_zone"
+
+
 def get_access_token() -> Optional[str]:
     """환경변수에서 ACCESS_TOKEN 로드 (.env는 app에서 load_dotenv()로 미리 로드)."""
     return os.getenv("ACCESS_TOKEN")
@@ -57,6 +64,9 @@ def fetch_insights(
     api_version: str = "v23.0",
     limit: int = 500,
     max_pages: Optional[int] = 15,
+    filtering: Optional[list[dict[str, Any]]] = None,
+    stats: Optional[dict[str, int]] = None,
+    breakdowns: Optional[str] = None,
 ) -> list[dict[str, Any]]:
     """
     Meta Insights API 호출, pagination 처리 후 전체 결과 반환.
@@ -69,6 +79,9 @@ def fetch_insights(
         use_breakdowns: True면 age,gender breakdown 요청 (일부 계정/권한에서는 400 발생 가능)
         api_version: API 버전
         limit: 페이지당 건수
+        filtering: insights filtering 조건 (예: [{"field": "ad.id", "operator": "IN", "value": [...]}])
+        stats: 주어지면 "pages"/"bytes"에 요청 페이지 수와 응답 바이트를 더한다
+        breakdowns: 직접 지정할 breakdowns (예: HOURLY_BREAKDOWN). 주면 use_breakdowns보다 우선
 
     Returns:
         insights 레코드 리스트 (date_start, campaign_name, adset_name, ad_name, impressions, clicks, spend, actions 등)
@@ -92,8 +105,12 @@ def fetch_insights(
         "limit": limit,
         "level": level,
     }
-    if use_breakdowns:
+    if breakdowns:
+        params["breakdowns"] = breakdowns
+    elif use_breakdowns:
         params["breakdowns"] = "age,gender"
+    if filtering:
+        params["filtering"] = json.dumps(filtering)
 
     all_data: list = []
     url: Optional[str] = base_url
@@ -106,6 +123,9 @@ def fetch_insights(
             resp = requests.get(url, timeout=25)
         _raise_meta_api_error(resp)
         body = resp.json()
+        if stats is not None:
+            stats["pages"] = stats.get("pages", 0) + 1
+            stats["bytes"] = stats.get("bytes", 0) + len(resp.content or b"")
 
         if "data" in body and body["data"]:
             all_data.extend(body["data"])
@@ -116,6 +136,28 @@ def fetch_insights(
     return all_data
 
 
+def insights_filtering(
+    *,
+    min_spend: Optional[float] = None,
+    ad_statuses: Optional[list[str]] = None,
+    campaign_ids: Optional[list[str]] = None,
+) -> list[dict[str, Any]]:
+    """
+    fetch_insights(filtering=...)용 서버 측 필터.
+        min_spend: spend > min_spend 인 행만 (0이면 지출 없는 행 제외)
+        ad_statuses: ad.effective_status IN (...)
+        campaign_ids: campaign.id IN (...)
+    """
+    filters: list[dict[str, Any]] = []
+    if min_spend is not None:
+        filters.append({"field": "spend", "operator": "GREATER_THAN", "value": min_spend})
+    if ad_statuses:
+        filters.append({"field": "ad.effective_status", "operator": "IN", "value": list(ad_statuses)})
+    if campaign_ids:
+        filters.append({"field": "campaign.id", "operator": "IN", "value": [str(v) for v in campaign_ids]})
+    return filters
+
+
 def fetch_ad_effective_statuses(
     ad_account_id: str,
     ad_ids: list[str],
@@ -150,6 +192,135 @@ def fetch_ad_effective_statuses(
     return out
 
 
+_INSIGHT_FIELDS = "campaign_name,adset_name,ad_name,ad_id,impressions,clicks,spend,actions,action_values,date_start"
+# ads 엣지 기본값은 ACTIVE/PAUSED 위주라 기간 내 성과가 있는 보관/중지 광고도 포함시킨다 (DELETED는 조회 불가)
+_ADS_EDGE_STATUSES = [
+    "ACTIVE", "PAUSED", "ARCHIVED", "CAMPAIGN_PAUSED", "ADSET_PAUSED", "IN_PROCESS",
+    "WITH_ISSUES", "DISAPPROVED", "PENDING_REVIEW", "PREAPPROVED", "PENDING_BILLING_INFO",
+]
+
+
+def _with_limit(url: str, limit: int) -> str:
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    query["limit"] = str(limit)
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _get_paged(
+    url: str,
+    params: Optional[dict[str, Any]],
+    *,
+    limit: int,
+    max_pages: Optional[int],
+    stats: Optional[dict[str, int]] = None,
+):
+    """
+    paging.next를 따라가며 페이지 body를 하나씩 돌려준다.
+    "reduce the amount of data" 오류면 limit을 절반으로 줄여 같은 페이지를 다시 요청한다.
+    stats: 주어지면 "pages"/"bytes"를 더하고, max_pages에 걸려 다음 페이지를 남기고 멈추면 "truncated"=1
+    """
+    pages_left = max_pages if max_pages is not None else 10**9
+    next_url: Optional[str] = url
+    first = True
+    while next_url and pages_left > 0:
+        if first and params is not None:
+            resp = requests.get(next_url, params={**params, "limit": limit}, timeout=60)
+        else:
+            resp = requests.get(_with_limit(next_url, limit), timeout=60)
+        try:
+            _raise_meta_api_error(resp)
+        except RuntimeError as e:
+            if _is_too_much_data_error(e) and limit > 1:
+                limit = max(1, limit // 2)
+                continue
+            raise
+        pages_left -= 1
+        first = False
+        body = resp.json()
+        if stats is not None:
+            stats["pages"] = stats.get("pages", 0) + 1
+            stats["bytes"] = stats.get("bytes", 0) + len(resp.content or b"")
+        yield body
+        next_url = (body.get("paging") or {}).get("next")
+    if next_url and stats is not None:
+        stats["truncated"] = 1
+
+
+def fetch_ads_with_insights(
+    ad_account_id: str,
+    since: str,
+    until: str,
+    *,
+    token: Optional[str] = None,
+    api_version: str = "v23.0",
+    limit: int = 50,
+    insights_limit: int = 100,
+    max_pages: Optional[int] = None,
+    stats: Optional[dict[str, int]] = None,
+) -> tuple[list[dict[str, Any]], dict[str, dict[str, str]]]:
+    """
+    /act_{id}/ads 엣지 한 번(페이지 단위)으로 ad/adset/campaign 상태와 일별 인사이트를 함께 받는다.
+    (insights -> 상태 -> 소재 순서의 개별 호출 대신 field expansion 사용)
+
+    Returns:
+        (insights 레코드 리스트, ad_id -> {"ad_status", "adset_status", "campaign_status", "creative_id"})
+        레코드 형식은 fetch_insights(level="ad", breakdown 없음)와 같다.
+        기간 내 성과가 없는 광고는 레코드 없이 상태만 들어간다.
+    max_pages: 광고 페이지 수 상한. 기본(None)은 끝까지 받는다
+        (엣지가 성과 없는 일시정지/보관 광고도 돌려주므로 상한을 두면 큰 계정은 조용히 잘린다)
+    stats: 주어지면 "pages"/"bytes"/"ads"를 더하고, 상한에 걸려 잘렸으면 "truncated"=1
+    """
+    token = token or get_access_token()
+    if not token:
+        return [], {}
+
+    account_id = f"act_{ad_account_id}" if not str(ad_account_id).startswith("act_") else ad_account_id
+    time_range = json.dumps({"since": since, "until": until}, separators=(",", ":"))
+    fields = (
+        "id,effective_status,adset{effective_status},campaign{effective_status},creative{id},"
+        f"insights.time_range({time_range}).time_increment(1).limit({insights_limit}){{{_INSIGHT_FIELDS}}}"
+    )
+    params: dict[str, Any] = {
+        "access_token": token,
+        "fields": fields,
+        "effective_status": json.dumps(_ADS_EDGE_STATUSES),
+    }
+
+    rows: list[dict[str, Any]] = []
+    statuses: dict[str, dict[str, str]] = {}
+    pages = _get_paged(
+        f"https://graph.facebook.com/{api_version}/{account_id}/ads",
+        params,
+        limit=limit,
+        max_pages=max_pages,
+        stats=stats,
+    )
+    for body in pages:
+        for ad in body.get("data") or []:
+            ad_id = str(ad.get("id") or "").strip()
+            if not ad_id:
+                continue
+            statuses[ad_id] = {
+                "ad_status": str(ad.get("effective_status") or "").strip(),
+                "adset_status": str((ad.get("adset") or {}).get("effective_status") or "").strip(),
+                "campaign_status": str((ad.get("campaign") or {}).get("effective_status") or "").strip(),
+                "creative_id": str((ad.get("creative") or {}).get("id") or "").strip(),
+            }
+            insights = ad.get("insights") or {}
+            rows.extend(insights.get("data") or [])
+            # 광고 하나의 일별 행이 insights_limit을 넘으면 중첩 엣지도 따로 페이지를 넘긴다
+            nested_next = (insights.get("paging") or {}).get("next")
+            if nested_next:
+                for nested in _get_paged(nested_next, None, limit=insights_limit, max_pages=None, stats=stats):
+                    rows.extend(nested.get("data") or [])
+
+    if stats is not None:
+        stats["ads"] = stats.get("ads", 0) + len(statuses)
+        stats.setdefault("truncated", 0)
+    return rows, statuses
+
+
 def _extract_first_url(text: str) -> str:
     if not text:
         return ""
@@ -233,6 +404,169 @@ def _extract_video_id_and_url_from_creative(creative: dict[str, Any]) -> tuple[s
     return video_id, video_url
 
 
+class _AdaptiveChunker:
+    """
+    ids= 배치 크기를 응답 크기에 맞춰 조절한다.
+    응답이 target_bytes보다 크면 줄이고 작으면 늘린다 (min_size~max_size).
+    Meta가 "reduce the amount of data" 오류를 주면 절반으로 줄여 같은 구간을 다시 요청한다.
+    """
+
+    def __init__(self, *, start: int, target_bytes: int, min_size: int = 1, max_size: int = 50) -> None:
+        self.size = max(min_size, min(start, max_size))
+        self.target_bytes = target_bytes
+        self.min_size = min_size
+        self.max_size = max_size
+
+    def observe(self, n_ids: int, n_bytes: int) -> None:
+        if n_ids <= 0 or n_bytes <= 0:
+            return
+        per_id = n_bytes / n_ids
+        ideal = int(self.target_bytes / per_id)
+        # 한 번에 두 배 이상은 키우지 않는다 (한두 개 작은 응답으로 과하게 커지지 않게)
+        self.size = max(self.min_size, min(ideal, self.size * 2, self.max_size))
+
+    def shrink(self) -> bool:
+        if self.size <= self.min_size:
+            return False
+        self.size = max(self.min_size, self.size // 2)
+        return True
+
+
+def _is_too_much_data_error(err: Exception) -> bool:
+    # "Please reduce the amount of data you're asking for" (code=1). code=1만으로는 판단하지 않는다:
+    # Meta의 일반 "An unknown error occurred"도 code=1이라 일시 오류마다 배치를 쪼개게 된다
+    return "reduce the amount of data" in str(err).lower()
+
+
+def _fetch_ids_adaptive(
+    ids: list[str],
+    fields: str,
+    *,
+    token: str,
+    api_version: str,
+    chunker: _AdaptiveChunker,
+) -> dict[str, Any]:
+    """GET /?ids=...&fields=... 를 chunker 크기로 나눠 호출하고 id -> 객체 dict를 합친다."""
+    base_url = f"https://graph.facebook.com/{api_version}"
+    out: dict[str, Any] = {}
+    i = 0
+    while i < len(ids):
+        chunk = ids[i:i + chunker.size]
+        params = {"access_token": token, "ids": ",".join(chunk), "fields": fields}
+        resp = requests.get(f"{base_url}/", params=params, timeout=25)
+        try:
+            _raise_meta_api_error(resp)
+        except RuntimeError as e:
+            if _is_too_much_data_error(e) and chunker.shrink():
+                continue
+            raise
+        body = resp.json()
+        if isinstance(body, dict):
+            out.update(body)
+        chunker.observe(len(chunk), len(resp.content or b""))
+        i += len(chunk)
+    return out
+
+
+# 상태 조회(자주, 가벼움)와 소재 payload 조회(드물게, 무거움)의 배치 목표 응답 크기
+_STATUS_TARGET_BYTES = 200_000
+_CREATIVE_TARGET_BYTES = 400_000
+_STATUS_FIELDS = "id,effective_status,adset{id,effective_status},campaign{id,effective_status},creative{id}"
+_CREATIVE_FIELDS = "id,object_story_id,effective_object_story_id,object_story_spec,asset_feed_spec,name"
+
+# creative_id -> 파싱된 영상 정보. 소재 payload는 사실상 바뀌지 않으므로 프로세스 동안 유지한다
+_creative_video_memo: dict[str, dict[str, str]] = {}
+_creative_memo_lock = threading.Lock()
+
+
+def clear_creative_video_memo() -> None:
+    with _creative_memo_lock:
+        _creative_video_memo.clear()
+
+
+def fetch_ad_delivery_statuses(
+    ad_ids: list[str],
+    *,
+    token: Optional[str] = None,
+    api_version: str = "v23.0",
+) -> dict[str, dict[str, str]]:
+    """
+    ad_id별 ad/adset/campaign effective_status와 creative_id (가벼운 필드만).
+    Returns: {"123": {"ad_status", "adset_status", "campaign_status", "creative_id"}, ...}
+    """
+    cleaned = [str(v).strip() for v in ad_ids if str(v).strip()]
+    if not cleaned:
+        return {}
+    token = token or get_access_token()
+    if not token:
+        return {}
+
+    body = _fetch_ids_adaptive(
+        cleaned,
+        _STATUS_FIELDS,
+        token=token,
+        api_version=api_version,
+        chunker=_AdaptiveChunker(start=50, target_bytes=_STATUS_TARGET_BYTES),
+    )
+    out: dict[str, dict[str, str]] = {}
+    for ad_id in cleaned:
+        row = body.get(ad_id) or {}
+        out[ad_id] = {
+            "ad_status": str(row.get("effective_status") or "").strip(),
+            "adset_status": str((row.get("adset") or {}).get("effective_status") or "").strip(),
+            "campaign_status": str((row.get("campaign") or {}).get("effective_status") or "").strip(),
+            "creative_id": str((row.get("creative") or {}).get("id") or "").strip(),
+        }
+    return out
+
+
+def _parse_creative_video(creative: dict[str, Any]) -> dict[str, str]:
+    video_id, video_url = _extract_video_id_and_url_from_creative(creative)
+    return {
+        "video_id": video_id,
+        "video_url": video_url,
+        "story_id": str(
+            creative.get("effective_object_story_id")
+            or creative.get("object_story_id")
+            or ""
+        ).strip(),
+    }
+
+
+def fetch_creative_videos(
+    creative_ids: list[str],
+    *,
+    token: Optional[str] = None,
+    api_version: str = "v23.0",
+) -> dict[str, dict[str, str]]:
+    """
+    creative_id별 video_id/video_url/story_id.
+    이미 파싱한 creative는 다시 요청하지 않는다 (프로세스 내 memo).
+    """
+    cleaned = list(dict.fromkeys(str(v).strip() for v in creative_ids if str(v).strip()))
+    if not cleaned:
+        return {}
+    with _creative_memo_lock:
+        missing = [cid for cid in cleaned if cid not in _creative_video_memo]
+
+    if missing:
+        token = token or get_access_token()
+        if token:
+            body = _fetch_ids_adaptive(
+                missing,
+                _CREATIVE_FIELDS,
+                token=token,
+                api_version=api_version,
+                chunker=_AdaptiveChunker(start=25, target_bytes=_CREATIVE_TARGET_BYTES),
+            )
+            parsed = {cid: _parse_creative_video(body[cid]) for cid in missing if body.get(cid)}
+            with _creative_memo_lock:
+                _creative_video_memo.update(parsed)
+
+    with _creative_memo_lock:
+        return {cid: dict(_creative_video_memo[cid]) for cid in cleaned if cid in _creative_video_memo}
+
+
 def fetch_ad_video_assets(
     ad_ids: list[str],
     *,
@@ -241,6 +575,7 @@ def fetch_ad_video_assets(
 ) -> dict[str, dict[str, str]]:
     """
     ad_id별 video_id/video_url + ad/adset/campaign 상태 추출.
+    상태는 매번 가벼운 조회로, 소재 payload는 creative_id당 한 번만 받아 파싱한다.
     Returns:
         {
           "123": {
@@ -254,64 +589,36 @@ def fetch_ad_video_assets(
           ...
         }
     """
-    cleaned = [str(v).strip() for v in ad_ids if str(v).strip()]
-    if not cleaned:
-        return {}
-
     token = token or get_access_token()
     if not token:
         return {}
+    statuses = fetch_ad_delivery_statuses(ad_ids, token=token, api_version=api_version)
+    videos = fetch_creative_videos(
+        [row["creative_id"] for row in statuses.values()], token=token, api_version=api_version
+    )
 
-    base_url = f"https://graph.facebook.com/{api_version}"
-    fields = "id,name,effective_status,adset{id,effective_status},campaign{id,effective_status},creative{id,object_story_id,effective_object_story_id,object_story_spec,asset_feed_spec,name}"
     out: dict[str, dict[str, str]] = {}
-    chunk_size = 25
-
-    for i in range(0, len(cleaned), chunk_size):
-        chunk = cleaned[i:i + chunk_size]
-        params = {
-            "access_token": token,
-            "ids": ",".join(chunk),
-            "fields": fields,
+    for ad_id, status in statuses.items():
+        video = videos.get(status["creative_id"]) or {}
+        video_id = video.get("video_id", "")
+        video_url = video.get("video_url", "")
+        if video_url:
+            video_key = video_url
+        elif video_id:
+            video_key = f"video_id:{video_id}"
+        else:
+            video_key = f"ad_id:{ad_id}"
+
+        out[ad_id] = {
+            "video_id": video_id,
+            "video_url": video_url,
+            "video_key": video_key,
+            "ad_status": status["ad_status"],
+            "adset_status": status["adset_status"],
+            "campaign_status": status["campaign_status"],
+            "creative_id": status["creative_id"],
+            "story_id": video.get("story_id", ""),
         }
-        resp = requests.get(f"{base_url}/", params=params, timeout=25)
-        _raise_meta_api_error(resp)
-        body = resp.json()
-
-        for ad_id in chunk:
-            row = body.get(str(ad_id)) or {}
-            creative = row.get("creative") or {}
-            video_id, video_url = _extract_video_id_and_url_from_creative(creative)
-            video_key = ""
-            if video_url:
-                video_key = video_url
-            elif video_id:
-                video_key = f"video_id:{video_id}"
-            else:
-                video_key = f"ad_id:{ad_id}"
-
-            ad_status = str(row.get("effective_status") or "").strip()
-            adset = row.get("adset") or {}
-            campaign = row.get("campaign") or {}
-            adset_status = str(adset.get("effective_status") or "").strip()
-            campaign_status = str(campaign.get("effective_status") or "").strip()
-            creative_id = str(creative.get("id") or "").strip()
-            story_id = str(
-                creative.get("effective_object_story_id")
-                or creative.get("object_story_id")
-                or ""
-            ).strip()
-
-            out[str(ad_id)] = {
-                "video_id": video_id,
-                "video_url": video_url,
-                "video_key": video_key,
-                "ad_status": ad_status,
-                "adset_status": adset_status,
-                "campaign_status": campaign_status,
-                "creative_id": creative_id,
-                "story_id": story_id,
-            }
 
     return out
 
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+
+try:
+    import streamlit as st
+    import streamlit.components.v1 as components
+except Exception:
+    st = None
+    components = None
+
+
+_FRONTEND_DIR = Path(__file__).resolve().parent / "frontend" / "action_calendar"
+_component = None
+
+_ACTION_ICONS = {
+    "증액": "🟦",
+    "보류": "🟨",
+    "종료": "🟥",
+}
+
+
+def _get_component():
+    global _component
+    if _component is None and components is not None:
+        _component = components.declare_component("action_calendar", path=str(_FRONTEND_DIR))
+    return _component
+
+
+def calendar_cells(dates: list[date], action_by_date: dict[str, str]) -> list[dict | None]:
+    """
+    요일(일요일 시작) 정렬된 7열 그리드 셀 목록. 빈 칸은 None.
+    """
+    if not dates:
+        return []
+    offset = (dates[0].weekday() + 1) % 7  # Sunday=0
+    cells: list[dict | None] = [None] * offset
+    for d in dates:
+        d_str = d.isoformat()
+        act = str(action_by_date.get(d_str, "") or "").strip()
+        cells.append({
+            "date": d_str,
+            "icon": _ACTION_ICONS.get(act, "⬜"),
+            "label": d.strftime("%m/%d"),
+        })
+    while len(cells) % 7 != 0:
+        cells.append(None)
+    return cells
+
+
+def action_calendar(
+    dates: list[date],
+    action_by_date: dict[str, str],
+    selected_date: str,
+    *,
+    key: str,
+) -> str:
+    """
+    14일 조치 캘린더를 위젯 1개로 렌더링하고 선택된 날짜(YYYY-MM-DD)를 반환.
+    클릭이 없으면 selected_date를 그대로 돌려준다.
+    """
+    component = _get_component()
+    if component is None:
+        return selected_date
+
+    # 직전 클릭값은 렌더 전에 session_state에 들어와 있으므로 하이라이트에 바로 반영
+    clicked = st.session_state.get(key)
+    if clicked:
+        selected_date = str(clicked)
+
+    value = component(
+        cells=calendar_cells(dates, action_by_date),
+        selected=selected_date,
+        key=key,
+        default=None,
+    )
+    return str(value) if value else selected_date
@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+import pandas as pd
+
+from services.sheet_change import SheetChangeDetector
+from services.sheet_frame import fill_creative_key, values_to_frame
+from services.time_utils import kst_now
+
+
+_TABLE = "creative_actions"
+COLUMNS = [
+    "action_date",
+    "creative_id",
+    "creative_key",
+    "campaign",
+    "adgroup",
+    "action",
+    "note",
+    "author",
+    "updated_at",
+]
+_KEY = ("action_date", "creative_key")
+# 시트에서 다른 사용자의 변경을 당겨오는 최소 간격 (변경이 없으면 지문 한 칸만 읽는다)
+PULL_INTERVAL_SECONDS = 60
+
+
+def _db_path() -> Path:
+    data_dir = Path(__file__).resolve().parent.parent / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    return data_dir / "creative_actions.db"
+
+
+def sheet_frame(values: list[list[str]], columns: list[str] = COLUMNS) -> pd.DataFrame:
+    """get_all_values 결과 -> 헤더를 뺀 고정 컬럼 프레임 (빈 creative_key는 채운다)."""
+    return fill_creative_key(values_to_frame(values, columns))
+
+
+def sheet_rows(values: list[list[str]]) -> list[list[str]]:
+    """get_all_values 결과 -> 헤더를 뺀 9칸 고정 행 목록 (헤더가 다르면 모두 데이터로 본다)."""
+    return sheet_frame(values).values.tolist()
+
+
+class ActionMirror:
+    """
+    조치 로그(creative_actions)의 로컬 SQLite 사본. (action_date, creative_key)가 기본 키.
+    화면의 읽기/쓰기는 여기서 바로 처리하고, 시트와는 변경분만 주고받는다.
+    - 로컬 변경은 dirty=1로 표시 (삭제는 deleted=1 묘비). push()가 dirty 행만 시트에 반영
+    - pull()은 시트를 한 번 읽어 내용이 달라진 행/사라진 행만 로컬에 적용 (dirty 행은 건드리지 않음)
+    시트가 설정되지 않은 환경에서는 이 DB가 곧 저장소다.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None) -> None:
+        self._path = Path(db_path) if db_path else None
+        self._lock = threading.RLock()
+        # push/pull은 서로 겹치지 않게 하되, 시트 왕복 중에도 로컬 읽기/쓰기는 막지 않도록 별도 잠금
+        self._sync_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._last_pull = 0.0
+        self.last_sync: dict = {}
+
+    @property
+    def path(self) -> Path:
+        if self._path is None:
+            self._path = _db_path()
+        return self._path
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        공유 연결을 잠금을 잡은 채 빌려준다 (처음 한 번 열고 스키마 확인). 블록이 정상으로 끝나면 커밋,
+        예외면 되돌린다. Streamlit 스레드들이 함께 쓰므로 check_same_thread=False + self._lock.
+        """
+        with self._lock:
+            if self._conn is None:
+                conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+                self._init_db(conn)
+                self._conn = conn
+            try:
+                yield self._conn
+            except Exception:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _init_db(conn: sqlite3.Connection) -> None:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {_TABLE} (
+                action_date TEXT NOT NULL,
+                creative_id TEXT,
+                creative_key TEXT NOT NULL,
+                campaign TEXT,
+                adgroup TEXT,
+                action TEXT,
+                note TEXT,
+                author TEXT,
+                updated_at TEXT,
+                dirty INTEGER NOT NULL DEFAULT 0,
+                deleted INTEGER NOT NULL DEFAULT 0,
+                row_version INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (action_date, creative_key)
+            )
+            """
+        )
+        existing = {r[1] for r in conn.execute(f"PRAGMA table_info({_TABLE})")}
+        if "row_version" not in existing:
+            # row_version 이전에 만든 DB
+            conn.execute(f"ALTER TABLE {_TABLE} ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{_TABLE}_dirty ON {_TABLE} (dirty) WHERE dirty = 1")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{_TABLE}_creative_key ON {_TABLE} (creative_key)")
+        conn.commit()
+
+    # ------------------------------------------------------------------
+    # 로컬 읽기/쓰기
+    # ------------------------------------------------------------------
+    def frame(self) -> pd.DataFrame:
+        """삭제 표시가 없는 전체 조치 (시트와 같은 컬럼)."""
+        with self._connection() as conn:
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(COLUMNS)} FROM {_TABLE} WHERE deleted = 0 ORDER BY action_date, creative_key",
+                conn,
+            )
+        return df.fillna("").astype(str) if not df.empty else pd.DataFrame(columns=COLUMNS)
+
+    def get(self, action_date: str, creative_key: str) -> Optional[dict]:
+        with self._connection() as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM {_TABLE} WHERE action_date = ? AND creative_key = ? AND deleted = 0",
+                (action_date, creative_key),
+            ).fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def upsert(self, values: dict) -> dict:
+        """한 행 저장 (dirty 표시). updated_at은 지금 시각. 저장된 행을 dict로 반환."""
+        row = {c: str(values.get(c, "") or "") for c in COLUMNS}
+        row["updated_at"] = kst_now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._connection() as conn:
+            conn.execute(
+                f"""
+                INSERT INTO {_TABLE} ({', '.join(COLUMNS)}, dirty, deleted, row_version)
+                VALUES ({', '.join('?' * len(COLUMNS))}, 1, 0, 1)
+                ON CONFLICT (action_date, creative_key) DO UPDATE SET
+                    {', '.join(f'{c} = excluded.{c}' for c in COLUMNS if c not in _KEY)},
+                    dirty = 1, deleted = 0, row_version = row_version + 1
+                """,
+                [row[c] for c in COLUMNS],
+            )
+        return row
+
+    def delete(self, action_date: str, creative_key: str) -> Optional[dict]:
+        """삭제 표시(묘비) 후 dirty. 지워진 행을 반환하고, 없으면 None."""
+        existing = self.get(action_date, creative_key)
+        if existing is None:
+            return None
+        now = kst_now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._connection() as conn:
+            conn.execute(
+                f"UPDATE {_TABLE} SET deleted = 1, dirty = 1, updated_at = ?, row_version = row_version + 1 "
+                f"WHERE action_date = ? AND creative_key = ?",
+                (now, action_date, creative_key),
+            )
+        return existing
+
+    def pending_count(self) -> int:
+        with self._connection() as conn:
+            return int(conn.execute(f"SELECT COUNT(*) FROM {_TABLE} WHERE dirty = 1").fetchone()[0])
+
+    def is_empty(self) -> bool:
+        with self._connection() as conn:
+            return conn.execute(f"SELECT 1 FROM {_TABLE} LIMIT 1").fetchone() is None
+
+    def import_csv(self, path: Path) -> int:
+        """예전 CSV 저장소를 한 번 옮겨 온다 (DB가 비어 있을 때만). 시트에 올릴 필요는 없어 dirty=0."""
+        if not path.exists() or not self.is_empty():
+            return 0
+        df = pd.read_csv(path, dtype=str).fillna("")
+        rows = sheet_rows([COLUMNS] + df.reindex(columns=COLUMNS, fill_value="").values.tolist())
+        with self._connection() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {_TABLE} ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows,
+            )
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # 시트 동기화
+    # ------------------------------------------------------------------
+    def pull_due(self, interval: float = PULL_INTERVAL_SECONDS) -> bool:
+        return self._last_pull == 0.0 or time.time() - self._last_pull >= interval
+
+    def mark_stale(self) -> None:
+        """다음 조회 때 시트에서 다시 당겨오게 한다."""
+        self._last_pull = 0.0
+
+    def pull(self, ws, detector: Optional[SheetChangeDetector] = None) -> dict:
+        """
+        시트 전체를 한 번 읽어 로컬과 다른 행만 반영한다.
+        로컬 dirty 행(아직 시트에 안 올린 변경)은 덮어쓰지 않는다.
+        detector가 주어지면 먼저 지문을 확인해 마지막 pull 이후 바뀌지 않았으면 받지 않는다.
+        """
+        with self._sync_lock:
+            return self._pull(ws, detector)
+
+    def _pull(self, ws, detector: Optional[SheetChangeDetector]) -> dict:
+        fp = None
+        if detector is not None:
+            changed, fp = detector.check(ws.title)
+            if not changed:
+                self._last_pull = time.time()
+                result = {"pulled": 0, "removed": 0, "skipped": 1}
+                self.last_sync = {**self.last_sync, **result, "pulled_at": kst_now().strftime("%H:%M:%S")}
+                return result
+        rows = sheet_rows(ws.get_all_values())
+        remote: dict[tuple[str, str], list[str]] = {}
+        for r in rows:
+            remote[(r[0], r[2])] = r  # 중복 키는 아래쪽(나중) 행 우선
+
+        with self._connection() as conn:
+            # 시트에서 사람이 직접 고친 칸은 updated_at이 그대로일 수 있어 행 전체를 비교
+            local = {
+                (r[0], r[2]): (list(r[:-1]), r[-1])
+                for r in conn.execute(f"SELECT {', '.join(COLUMNS)}, dirty FROM {_TABLE}")
+            }
+            changed = [
+                r for key, r in remote.items()
+                if key not in local or (not local[key][1] and local[key][0] != r)
+            ]
+            # 로컬엔 있는데 시트엔 없는 깨끗한 행 = 다른 곳에서 삭제됨
+            removed = [key for key, (_, dirty) in local.items() if not dirty and key not in remote]
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {_TABLE} ({', '.join(COLUMNS)}, dirty, deleted) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))}, 0, 0)",
+                changed,
+            )
+            conn.executemany(f"DELETE FROM {_TABLE} WHERE action_date = ? AND creative_key = ? AND dirty = 0", removed)
+        if detector is not None:
+            detector.commit(ws.title, fp)
+        self._last_pull = time.time()
+        result = {"sheet_rows": len(rows), "pulled": len(changed), "removed": len(removed), "skipped": 0}
+        self.last_sync = {**self.last_sync, **result, "pulled_at": kst_now().strftime("%H:%M:%S")}
+        return result
+
+    def _dirty_rows(self) -> list[tuple[dict, int, int]]:
+        """(행, deleted, row_version). row_version은 로컬 저장/삭제마다 1씩 오른다."""
+        with self._connection() as conn:
+            cur = conn.execute(f"SELECT {', '.join(COLUMNS)}, deleted, row_version FROM {_TABLE} WHERE dirty = 1")
+            return [(dict(zip(COLUMNS, r[:-2])), int(r[-2]), int(r[-1])) for r in cur.fetchall()]
+
+    def push(self, ws) -> dict:
+        """
+        dirty 행만 시트에 반영.
+        시트 위치는 키 열(A:E)만 읽어 찾는다. 수정은 batch_update 한 번, 추가는 append_rows 한 번,
+        삭제는 아래 행부터 한 번의 요청으로 지운다.
+        반영 중에 로컬에서 다시 바뀐 행(row_version이 달라짐)은 dirty로 남겨 다음 push로 넘긴다.
+        (updated_at은 초 단위라 같은 초 안의 재저장을 구분하지 못한다)
+        """
+        with self._sync_lock:
+            return self._push(ws)
+
+    @staticmethod
+    def _delete_rows(ws, positions: list[int]) -> None:
+        positions = sorted(set(positions), reverse=True)
+        spreadsheet = getattr(ws, "spreadsheet", None)
+        if len(positions) > 1 and spreadsheet is not None and hasattr(ws, "id"):
+            # 아래 행부터 지워야 위쪽 위치가 밀리지 않는다
+            spreadsheet.batch_update({"requests": [
+                {"deleteDimension": {"range": {
+                    "sheetId": ws.id, "dimension": "ROWS", "startIndex": pos - 1, "endIndex": pos,
+                }}}
+                for pos in positions
+            ]})
+            return
+        for pos in positions:
+            ws.delete_rows(pos)
+
+    def _push(self, ws) -> dict:
+        dirty = self._dirty_rows()
+        if not dirty:
+            return {"updated": 0, "appended": 0, "deleted": 0}
+
+        keys = ws.get("A:E") or []
+        if not keys:
+            ws.append_row(COLUMNS)
+            keys = [COLUMNS[:5]]
+        elif list(keys[0][:5]) != COLUMNS[:5]:
+            ws.insert_row(COLUMNS, index=1)
+            keys = [COLUMNS[:5]] + keys
+        key_frame = sheet_frame(keys[1:], COLUMNS[:5])
+        position = {
+            key: i for i, key in enumerate(zip(key_frame["action_date"], key_frame["creative_key"]), start=2)
+        }
+
+        updates, appends, deletes = [], [], []
+        for row, deleted, _ in dirty:
+            pos = position.get((row["action_date"], row["creative_key"]))
+            values = [row[c] for c in COLUMNS]
+            if deleted:
+                if pos:
+                    deletes.append(pos)
+            elif pos:
+                updates.append({"range": f"A{pos}:I{pos}", "values": [values]})
+            else:
+                appends.append(values)
+
+        if updates:
+            ws.batch_update(updates)
+        if deletes:
+            self._delete_rows(ws, deletes)
+        if appends:
+            ws.append_rows(appends)
+
+        with self._connection() as conn:
+            for row, deleted, version in dirty:
+                params = (row["action_date"], row["creative_key"], version)
+                if deleted:
+                    conn.execute(
+                        f"DELETE FROM {_TABLE} WHERE action_date = ? AND creative_key = ? AND row_version = ? AND deleted = 1",
+                        params,
+                    )
+                else:
+                    conn.execute(
+                        f"UPDATE {_TABLE} SET dirty = 0 WHERE action_date = ? AND creative_key = ? AND row_version = ?",
+                        params,
+                    )
+        result = {"updated": len(updates), "appended": len(appends), "deleted": len(deletes)}
+        self.last_sync = {**self.last_sync, **result, "pushed_at": kst_now().strftime("%H:%M:%S")}
+        return result
+
+
+_mirror = ActionMirror()
+
+
+def get_action_mirror() -> ActionMirror:
+    return _mirror
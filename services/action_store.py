@@ -1,122 +1,146 @@
 from __future__ import annotations
 
+import threading
 from pathlib import Path
+from typing import Optional
 
 import pandas as pd
-try:
-    import streamlit as st
-except Exception:
-    st = None
-try:
-    import gspread
-except Exception:
-    gspread = None
-try:
-    from google.oauth2.service_account import Credentials
-except Exception:
-    Credentials = None
-
-from services.time_utils import kst_now
-
-
-_COLUMNS = [
-    "action_date",
-    "creative_id",
-    "creative_key",
-    "campaign",
-    "adgroup",
-    "action",
-    "note",
-    "author",
-    "updated_at",
-]
+
+from services.action_mirror import COLUMNS as _COLUMNS, get_action_mirror
+from services.cache_registry import ACTIONS, get_cache_registry
+from services.sheet_change import get_change_detector
+from services.sheets_client import get_sheets_connection, remember_sheet_error, sheets_config
+from services.write_behind import WriteBehind
 
 
 def _store_path() -> Path:
+    # 예전 CSV 저장소. 로컬 SQLite 사본이 비어 있을 때 한 번 옮겨 온다
     data_dir = Path(__file__).resolve().parent.parent / "data"
     data_dir.mkdir(parents=True, exist_ok=True)
     return data_dir / "creative_actions.csv"
 
 
 def _get_sheet():
-    if st is None or gspread is None or Credentials is None:
-        return None
-    try:
-        cfg = st.secrets.get("google_sheets", {})
-        sa = st.secrets.get("google_sheets_service_account", {})
-    except Exception:
-        return None
-    sheet_id = cfg.get("sheet_id") or cfg.get("spreadsheet_id") or "1REfuppqzLN0Y3jmkPrDXKNm_btaA-qtlbaO2bx9MSh8"
-    worksheet = cfg.get("worksheet", "광고성과관리")
-    if not sheet_id or not sa:
-        return None
-    scopes = ["https://www.googleapis.com/auth/spreadsheets"]
-    creds = Credentials.from_service_account_info(dict(sa), scopes=scopes)
-    client = gspread.authorize(creds)
+    # 인증/스프레드시트/워크시트 핸들은 프로세스 공유 연결에서 재사용
+    cfg, _ = sheets_config()
+    return get_sheets_connection().worksheet(cfg.get("worksheet", "광고성과관리"))
+
+
+def sync_actions(*, force: bool = False) -> dict:
+    """
+    시트 변경을 로컬 사본으로 당겨온다 (로컬 변경은 write-behind가 따로 올린다).
+    force=False면 마지막 pull 후 PULL_INTERVAL_SECONDS가 지났을 때만. 시트가 없으면 {}.
+    """
+    mirror = get_action_mirror()
+    ws = _get_sheet()
+    if ws is None:
+        mirror.import_csv(_store_path())
+        return {}
+    if not force and not mirror.pull_due():
+        return {}
     try:
-        ss = client.open_by_key(sheet_id)
-        return ss.worksheet(worksheet)
+        return mirror.pull(ws, get_change_detector())
     except Exception as e:
-        try:
-            st.session_state["sheet_error"] = str(e)
-        except Exception:
-            pass
-        return None
-
-
-def _sheet_to_df(ws) -> pd.DataFrame:
-    values = ws.get_all_values()
-    if not values:
-        return pd.DataFrame(columns=_COLUMNS)
-    header = values[0]
-    # If header doesn't match expected, treat all rows as data
-    if header != _COLUMNS:
-        data_rows = values
-    else:
-        data_rows = values[1:]
-    cleaned = []
-    for row in data_rows:
-        r = list(row)[:len(_COLUMNS)]
-        if len(r) < len(_COLUMNS):
-            r += [""] * (len(_COLUMNS) - len(r))
-        cleaned.append(r)
-    return pd.DataFrame(cleaned, columns=_COLUMNS)
-
-
-def _ensure_sheet_header(ws) -> None:
-    existing = ws.get_all_values()
-    if not existing:
-        ws.append_row(_COLUMNS)
-        return
-    if existing[0] != _COLUMNS:
-        ws.insert_row(_COLUMNS, index=1)
+        remember_sheet_error(e)
+        return {}
+
+
+class _ActionTable:
+    """
+    조치 로그의 메모리 표 (프로세스 공유). 저장/삭제는 행 단위로 바로 반영하고
+    version을 올린다. 화면은 version이 바뀌었을 때만 frame()을 다시 받는다.
+    시트에서 다른 사용자의 변경을 당겨온 경우에만 로컬 사본에서 통째로 다시 채운다.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rows: Optional[dict[tuple[str, str], dict]] = None
+        self._frame: Optional[pd.DataFrame] = None
+        self.version = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._rows is not None
+
+    def reload(self, df: pd.DataFrame) -> None:
+        rows = {(r["action_date"], r["creative_key"]): r for r in df.to_dict("records")}
+        with self._lock:
+            self._rows = rows
+            self._frame = None
+            self.version += 1
+
+    def put(self, row: dict) -> None:
+        with self._lock:
+            if self._rows is None:
+                return
+            self._rows[(row["action_date"], row["creative_key"])] = dict(row)
+            self._frame = None
+            self.version += 1
+
+    def remove(self, action_date: str, creative_key: str) -> None:
+        with self._lock:
+            if self._rows is None or self._rows.pop((action_date, creative_key), None) is None:
+                return
+            self._frame = None
+            self.version += 1
+
+    def frame(self) -> pd.DataFrame:
+        with self._lock:
+            if self._frame is None:
+                rows = sorted(self._rows.values(), key=lambda r: (r["action_date"], r["creative_key"])) if self._rows else []
+                self._frame = pd.DataFrame(rows, columns=_COLUMNS)
+            return self._frame
+
+
+_table = _ActionTable()
+
+
+def _flush_actions() -> None:
+    # 실패하면 예외를 올려 write-behind가 백오프한다. 변경은 dirty로 남아 다음에 다시 올린다
+    ws = _get_sheet()
+    if ws is not None:
+        get_action_mirror().push(ws)
+
+
+def pending_action_count() -> int:
+    """시트에 아직 반영되지 않은 로컬 변경 수 (시트를 쓰지 않으면 0)."""
+    if _get_sheet() is None:
+        return 0
+    return get_action_mirror().pending_count()
+
+
+# 저장/삭제는 로컬에만 쓰고 바로 돌아간다. 시트 반영은 이 스레드가 주기적으로 모아서
+_write_behind = WriteBehind(_flush_actions, pending_action_count, name="actions-write-behind")
+
+
+def action_sync_status() -> dict:
+    """시트 반영 대기 수/재시도까지 남은 초/마지막 오류 (WriteBehind.status)."""
+    return _write_behind.status()
+
+
+def _refresh_table() -> None:
+    # 시트에서 바뀐 행이 있거나 아직 안 채웠을 때만 로컬 사본에서 메모리 표를 다시 채운다
+    pulled = sync_actions()
+    if not _table.loaded or pulled.get("pulled") or pulled.get("removed"):
+        _table.reload(get_action_mirror().frame())
+        if pending_action_count():
+            # 이전 실행에서 못 올린 변경이 남아 있으면 반영 스레드를 깨운다
+            _write_behind.notify()
+
+
+def actions_version() -> int:
+    """
+    조치 로그 변경 번호. 저장/삭제, 다른 사용자 변경 반영 때마다 오른다.
+    화면은 이 값이 캐시해 둔 번호와 다를 때만 load_actions()를 다시 부르면 된다.
+    """
+    _refresh_table()
+    return _table.version
 
 
 def load_actions() -> pd.DataFrame:
-    ws = _get_sheet()
-    if ws is not None:
-        try:
-            _ensure_sheet_header(ws)
-            df = _sheet_to_df(ws)
-            # Backfill creative_key if missing/empty
-            if "creative_key" in df.columns:
-                for i, row in df.iterrows():
-                    if not str(row.get("creative_key", "")).strip():
-                        cid = str(row.get("creative_id", "")).strip()
-                        camp = str(row.get("campaign", "")).strip()
-                        adg = str(row.get("adgroup", "")).strip()
-                        df.at[i, "creative_key"] = cid if cid else f"{camp}|{adg}"
-            return df
-        except Exception:
-            return pd.DataFrame(columns=_COLUMNS)
-    path = _store_path()
-    if not path.exists():
-        return pd.DataFrame(columns=_COLUMNS)
-    df = pd.read_csv(path)
-    for col in _COLUMNS:
-        if col not in df.columns:
-            df[col] = ""
-    return df[_COLUMNS]
+    """조치 로그 전체 (메모리 표). 시트와는 주기적으로 변경분만 맞춘다. 반환 프레임은 수정하지 말 것."""
+    _refresh_table()
+    return _table.frame()
 
 
 def upsert_action(
@@ -129,91 +153,38 @@ def upsert_action(
     action: str,
     note: str,
     author: str,
-) -> None:
-    ws = _get_sheet()
-    if ws is not None:
-        _ensure_sheet_header(ws)
-        df = _sheet_to_df(ws)
-        mask = (df["action_date"] == action_date) & (df["creative_key"] == creative_key)
-        now = kst_now().strftime("%Y-%m-%d %H:%M:%S")
-        if mask.any():
-            idx = df[mask].index[0]
-            row_idx = idx + 2  # 1-based + header
-            values = [
-                action_date,
-                creative_id,
-                creative_key,
-                campaign,
-                adgroup,
-                action,
-                note,
-                author,
-                now,
-            ]
-            ws.update(f"A{row_idx}:I{row_idx}", [values])
-        else:
-            ws.append_row([
-                action_date,
-                creative_id,
-                creative_key,
-                campaign,
-                adgroup,
-                action,
-                note,
-                author,
-                now,
-            ])
-        return
-
-    df = load_actions()
-    mask = (df["action_date"] == action_date) & (df["creative_key"] == creative_key)
-    now = kst_now().strftime("%Y-%m-%d %H:%M:%S")
-    if mask.any():
-        df.loc[mask, ["creative_id", "campaign", "adgroup", "action", "note", "author", "updated_at"]] = [
-            creative_id,
-            campaign,
-            adgroup,
-            action,
-            note,
-            author,
-            now,
-        ]
-    else:
-        df = pd.concat(
-            [
-                df,
-                pd.DataFrame(
-                    [
-                        {
-                            "action_date": action_date,
-                            "creative_id": creative_id,
-                            "creative_key": creative_key,
-                            "campaign": campaign,
-                            "adgroup": adgroup,
-                            "action": action,
-                            "note": note,
-                            "author": author,
-                            "updated_at": now,
-                        }
-                    ]
-                ),
-            ],
-            ignore_index=True,
-        )
-    df.to_csv(_store_path(), index=False)
-
-
-def delete_action(*, action_date: str, creative_key: str) -> None:
-    ws = _get_sheet()
-    if ws is not None:
-        df = _sheet_to_df(ws)
-        mask = (df["action_date"] == action_date) & (df["creative_key"] == creative_key)
-        if mask.any():
-            row_idx = df[mask].index[0] + 2
-            ws.delete_rows(row_idx)
-        return
-
-    df = load_actions()
-    mask = (df["action_date"] == action_date) & (df["creative_key"] == creative_key)
-    df = df[~mask]
-    df.to_csv(_store_path(), index=False)
+) -> dict:
+    """저장한 행(dict)을 반환. 로컬에 바로 반영되고 시트에는 write-behind로 올라간다."""
+    row = get_action_mirror().upsert({
+        "action_date": action_date,
+        "creative_id": creative_id,
+        "creative_key": creative_key,
+        "campaign": campaign,
+        "adgroup": adgroup,
+        "action": action,
+        "note": note,
+        "author": author,
+    })
+    _table.put(row)
+    _write_behind.notify()
+    return row
+
+
+def delete_action(*, action_date: str, creative_key: str) -> Optional[dict]:
+    """지운 행(dict)을 반환. 해당 행이 없으면 None."""
+    removed = get_action_mirror().delete(action_date, creative_key)
+    if removed is not None:
+        _table.remove(action_date, creative_key)
+        _write_behind.notify()
+    return removed
+
+
+def _mark_actions_stale() -> None:
+    # 지문 기록도 버려 다음 조회는 시트 전체를 다시 받는다
+    get_action_mirror().mark_stale()
+    cfg, _ = sheets_config()
+    get_change_detector().forget(cfg.get("worksheet", "광고성과관리"))
+
+
+# '조치 내용' 갱신 시 다음 조회에서 시트 변경을 다시 당겨온다
+get_cache_registry().register(ACTIONS, "action_mirror", _mark_actions_stale)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Iterable
+
+
+# 캐시 범위 이름
+INSIGHTS = "insights"
+DEMOGRAPHICS = "demographics"
+ASSETS = "assets"
+STATUSES = "statuses"
+ACTIONS = "actions"
+SNAPSHOT = "snapshot"
+
+
+class CacheRegistry:
+    """
+    이름 붙은 캐시 범위(scope)와 그 사이 의존 관계.
+    invalidate(scope)는 해당 scope와 그것에 의존하는 scope의 캐시만 비운다.
+    같은 (scope, name)으로 다시 등록하면 덮어쓰므로 rerun마다 등록해도 된다.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._clearers: dict[str, dict[str, Callable[[], None]]] = {}
+        self._dependents: dict[str, set[str]] = {}
+
+    def register(
+        self,
+        scope: str,
+        name: str,
+        clear: Callable[[], None],
+        *,
+        depends_on: Iterable[str] = (),
+    ) -> None:
+        with self._lock:
+            self._clearers.setdefault(scope, {})[name] = clear
+            for parent in depends_on:
+                self._dependents.setdefault(parent, set()).add(scope)
+
+    def scopes(self) -> list[str]:
+        with self._lock:
+            return sorted(set(self._clearers) | set(self._dependents))
+
+    def affected(self, *scopes: str) -> list[str]:
+        """scopes와 그 하위 의존 scope 전체 (입력 순서 우선, 너비 우선)."""
+        with self._lock:
+            order: list[str] = []
+            queue = list(scopes)
+            while queue:
+                scope = queue.pop(0)
+                if scope in order:
+                    continue
+                order.append(scope)
+                queue.extend(sorted(self._dependents.get(scope, ())))
+            return order
+
+    def invalidate(self, *scopes: str) -> list[str]:
+        """영향받는 scope의 clear 함수를 모두 호출하고, 비운 scope 목록을 반환."""
+        affected = self.affected(*scopes)
+        with self._lock:
+            clearers = [fn for scope in affected for fn in self._clearers.get(scope, {}).values()]
+        for fn in clearers:
+            try:
+                fn()
+            except Exception:
+                pass
+        return affected
+
+
+def clear_cached_entry(cached_func, *args, **kwargs) -> None:
+    """
+    st.cache_data 함수에서 해당 인자의 항목만 삭제.
+    인자별 삭제를 지원하지 않는 Streamlit 버전에서는 함수 캐시 전체를 비운다.
+    """
+    try:
+        cached_func.clear(*args, **kwargs)
+    except TypeError:
+        cached_func.clear()
+
+
+_registry = CacheRegistry()
+
+
+def get_cache_registry() -> CacheRegistry:
+    return _registry
@@ -1,6 +1,9 @@
+import functools
 import os
+import time
 from datetime import timedelta
 from pathlib import Path
+from typing import Optional
 
 import pandas as pd
 import numpy as np
@@ -25,13 +28,25 @@ except Exception:  # optional dependency
             return False
 
 from services.meta_parser import parse_meta_actions, parse_meta_action_values
+from services.demog_on_demand import DemographicsOnDemand
+from services.cache_registry import DEMOGRAPHICS, INSIGHTS, SNAPSHOT, clear_cached_entry, get_cache_registry
+from services.disk_cache import FRAME_CODEC, MAIN_DATA_CODEC, get_disk_cache
+from services.single_flight import single_flight
+from services.stage_report import get_stage_report
 from services.time_utils import kst_now, kst_today
-# .env를 프로젝트 루트(app.py 있는 폴더)에서 로드
+# .env는 프로젝트 루트(app.py 있는 폴더)에 있다
 _env_path = Path(__file__).resolve().parent.parent / ".env"
-load_dotenv(_env_path)
 
-# Meta 광고계정 ID (환경변수 우선)
+
+@functools.lru_cache(maxsize=1)
+def _load_env() -> bool:
+    """.env를 프로세스당 한 번만 읽는다 (import 시점이 아니라 처음 설정이 필요할 때)."""
+    return bool(load_dotenv(_env_path))
+
+
 def _get_meta_token() -> str:
+    # 토큰은 Secrets에서 교체될 수 있어 캐시하지 않고 매번 읽는다
+    _load_env()
     try:
         if "ACCESS_TOKEN" in st.secrets:
             return str(st.secrets["ACCESS_TOKEN"])
@@ -48,6 +63,7 @@ def _get_meta_token() -> str:
 
 def get_meta_token_info() -> dict:
     """Return non-sensitive token info for debugging."""
+    _load_env()
     try:
         if "ACCESS_TOKEN" in st.secrets:
             t = str(st.secrets["ACCESS_TOKEN"])
@@ -84,8 +100,42 @@ def get_meta_token() -> str:
     return _get_meta_token()
 
 
-# Meta 광고계정 ID (환경변수/Secrets 우선)
-META_AD_ACCOUNT_ID = _get_meta_ad_account_id()
+@functools.lru_cache(maxsize=1)
+def meta_ad_account_id() -> str:
+    """Meta 광고계정 ID (Secrets > 환경변수 > 기본값). 처음 호출 때 한 번만 결정한다."""
+    _load_env()
+    return _get_meta_ad_account_id()
+
+
+@functools.lru_cache(maxsize=1)
+def demographics_mode() -> str:
+    """
+    성별/연령 breakdown 조회 방식 (Secrets/환경변수 META_DEMOGRAPHICS_MODE).
+    eager(기본): 데이터 로드 때 계정 전체를 받는다. lazy: '분석하기'로 선택한 광고만 그때 받는다.
+    """
+    _load_env()
+    mode = ""
+    try:
+        if "META_DEMOGRAPHICS_MODE" in st.secrets:
+            mode = str(st.secrets["META_DEMOGRAPHICS_MODE"])
+    except Exception:
+        pass
+    mode = (mode or os.getenv("META_DEMOGRAPHICS_MODE") or "eager").strip().lower()
+    return "lazy" if mode == "lazy" else "eager"
+
+
+@functools.lru_cache(maxsize=1)
+def today_hourly() -> bool:
+    """오늘 구간 갱신을 시간대별 breakdown으로 받을지 (Secrets/환경변수 META_TODAY_HOURLY, 기본 꺼짐)."""
+    _load_env()
+    value = ""
+    try:
+        if "META_TODAY_HOURLY" in st.secrets:
+            value = str(st.secrets["META_TODAY_HOURLY"])
+    except Exception:
+        pass
+    value = (value or os.getenv("META_TODAY_HOURLY") or "").strip().lower()
+    return value in ("1", "true", "yes", "on")
 
 
 def _num(v):
@@ -150,11 +200,42 @@ def _finalize_meta_df(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-@st.cache_data(ttl=600)
-def load_meta_from_api(since: str, until: str, use_breakdowns: bool = False):
+def insights_filter(
+    *,
+    min_spend: Optional[float] = None,
+    ad_statuses=None,
+    campaign_ids=None,
+) -> tuple:
+    """
+    load_meta_from_api(filters=...)용 서버 측 필터. 캐시 키로 쓰도록 해시 가능한 튜플로 만든다.
+    (meta_api.insights_filtering 인자와 같은 이름)
     """
-    Meta Marketing API로 인사이트 조회 후 앱 형식 DataFrame 반환.
-    since/until: YYYY-MM-DD. 캐시 10분.
+    items = []
+    if min_spend is not None:
+        items.append(("min_spend", float(min_spend)))
+    if ad_statuses:
+        items.append(("ad_statuses", tuple(sorted(str(v) for v in ad_statuses))))
+    if campaign_ids:
+        items.append(("campaign_ids", tuple(sorted(str(v) for v in campaign_ids))))
+    return tuple(items)
+
+
+# 대시보드 기본 조회: 지출 없는 행은 진단/추세/표 어디에도 쓰이지 않으므로 서버에서 뺀다
+MAIN_INSIGHTS_FILTERS = insights_filter(min_spend=0)
+
+
+def _api_filtering(filters: tuple) -> list[dict]:
+    from meta_api import insights_filtering
+
+    return insights_filtering(**{k: list(v) if isinstance(v, tuple) else v for k, v in filters})
+
+
+@single_flight()
+def fetch_meta_from_api(since: str, until: str, use_breakdowns: bool = False, filters: tuple = ()):
+    """
+    Meta Marketing API로 인사이트 조회 후 앱 형식 DataFrame 반환 (캐시 없음).
+    since/until: YYYY-MM-DD.
+    filters: insights_filter(...) 결과. 서버 측에서 행을 걸러 응답/파싱량을 줄인다.
     breakdowns 실패 시 자동으로 breakdown 없이 재시도.
     """
     token = _get_meta_token()
@@ -166,27 +247,29 @@ def load_meta_from_api(since: str, until: str, use_breakdowns: bool = False):
     except ImportError:
         return pd.DataFrame()
 
-    try:
-        from meta_api import fetch_ad_effective_statuses
-    except Exception:
-        fetch_ad_effective_statuses = None
-
+    pipeline = "demographics" if use_breakdowns else "insights"
+    filtering = _api_filtering(filters) if filters else None
+    http_stats: dict[str, int] = {}
+    t0 = time.perf_counter()
     raw = []
     try:
         raw = fetch_insights(
-            META_AD_ACCOUNT_ID,
+            meta_ad_account_id(),
             since=since,
             until=until,
             token=token,
             level="ad",
             use_breakdowns=use_breakdowns,
+            filtering=filtering,
+            stats=http_stats,
         )
     except Exception:
         if use_breakdowns:
             return pd.DataFrame()
         try:
             raw = fetch_insights(
-                META_AD_ACCOUNT_ID, since=since, until=until, token=token, level="ad", use_breakdowns=False
+                meta_ad_account_id(), since=since, until=until, token=token, level="ad", use_breakdowns=False,
+                filtering=filtering, stats=http_stats,
             )
         except Exception as e:
             try:
@@ -195,37 +278,203 @@ def load_meta_from_api(since: str, until: str, use_breakdowns: bool = False):
                 pass
             return pd.DataFrame()
 
+    report = get_stage_report()
+    report.record(
+        pipeline,
+        "API 응답",
+        len(raw),
+        ms=(time.perf_counter() - t0) * 1000,
+        kb=http_stats.get("bytes", 0) / 1024,
+        note=", ".join(f"{k}={v}" for k, v in filters) or "필터 없음",
+    )
     if not raw:
         return pd.DataFrame()
 
+    t0 = time.perf_counter()
     df = _build_meta_df(raw, since, use_breakdowns=use_breakdowns)
     if df.empty:
         return df
 
-    # 최근 7일 내 지출 있는 광고만 상태 조회
-    if not use_breakdowns:
+    # 게재 상태는 여기서 조회하지 않는다. 스냅샷 생성 시 status_enrichment가 ad_id당 한 번 붙인다
+    df = _finalize_meta_df(df)
+    report.record(pipeline, "파싱", len(df), ms=(time.perf_counter() - t0) * 1000)
+    return df
+
+
+_DAY_KEY_COLS = ["Date", "Campaign", "AdGroup", "Creative_ID", "Ad_ID", "Status", "Platform", "Gender", "Age"]
+
+
+@single_flight()
+def fetch_today_insights(*, hourly: bool = False):
+    """
+    오늘(KST) 인사이트만 조회 (캐시 없음). 스냅샷에서 오늘 구간만 교체하는 짧은 주기 갱신용.
+    hourly=True면 시간대별로 받아 광고/일 단위로 합치고, 지출이 있는 마지막 시간대를 함께 돌려준다.
+    Returns: (오늘 date, 프레임, 마지막 시간대 "HH:MM" 또는 ""). 실패/토큰 없음이면 빈 프레임.
+    """
+    today = kst_today()
+    day = today.isoformat()
+    token = _get_meta_token()
+    if not token:
+        return today, pd.DataFrame(), ""
+    try:
+        from meta_api import HOURLY_BREAKDOWN, fetch_insights
+    except ImportError:
+        return today, pd.DataFrame(), ""
+
+    http_stats: dict[str, int] = {}
+    t0 = time.perf_counter()
+    try:
+        raw = fetch_insights(
+            meta_ad_account_id(),
+            since=day,
+            until=day,
+            token=token,
+            level="ad",
+            breakdowns=HOURLY_BREAKDOWN if hourly else None,
+            filtering=_api_filtering(MAIN_INSIGHTS_FILTERS),
+            stats=http_stats,
+        )
+    except Exception as e:
         try:
-            recent_cutoff = kst_today() - timedelta(days=6)
-            df_recent = df[(df["Date"].dt.date >= recent_cutoff) & (df["Cost"] > 0)]
-            ad_ids = sorted({str(v) for v in df_recent["Ad_ID"].dropna().tolist() if str(v)})
+            st.session_state["meta_api_error"] = str(e)[:300]
         except Exception:
-            ad_ids = []
+            pass
+        return today, pd.DataFrame(), ""
+
+    report = get_stage_report()
+    report.record(
+        "today",
+        "API 응답 (시간대별)" if hourly else "API 응답",
+        len(raw),
+        ms=(time.perf_counter() - t0) * 1000,
+        kb=http_stats.get("bytes", 0) / 1024,
+    )
+    if not raw:
+        return today, pd.DataFrame(), ""
+
+    t0 = time.perf_counter()
+    last_hour = ""
+    if hourly:
+        last_hour = max(
+            (str(r.get(HOURLY_BREAKDOWN) or "")[:5] for r in raw if _num(r.get("spend")) > 0), default=""
+        )
+    df = _finalize_meta_df(_build_meta_df(raw, day, use_breakdowns=False))
+    if hourly and not df.empty:
+        # 시간대별 행 -> 광고/일 단위 (지표 합산)
+        keys = [c for c in _DAY_KEY_COLS if c in df.columns]
+        metrics = [c for c in df.columns if c not in keys]
+        df = df.groupby(keys, as_index=False, sort=False)[metrics].sum()
+    report.record("today", "파싱", len(df), ms=(time.perf_counter() - t0) * 1000)
+    return today, df, last_hour
+
 
-        if fetch_ad_effective_statuses and ad_ids:
+def fetch_meta_via_ads_edge(since: str, until: str, *, stats: Optional[dict[str, int]] = None):
+    """
+    fetch_meta_from_api(use_breakdowns=False)의 대안 경로 (캐시 없음).
+    ads 엣지 field expansion으로 인사이트와 ad/adset/campaign 상태를 한 번에 받아
+    _build_meta_df와 같은 형식의 프레임과 상태 맵(status_enrichment용)을 반환한다.
+    stats: fetch_ads_with_insights의 pages/bytes/ads/truncated가 채워진다
+    """
+    stats = {} if stats is None else stats
+    token = _get_meta_token()
+    if not token:
+        return pd.DataFrame(), {}
+    try:
+        from meta_api import fetch_ads_with_insights
+    except ImportError:
+        return pd.DataFrame(), {}
+
+    try:
+        raw, status_map = fetch_ads_with_insights(
+            meta_ad_account_id(), since=since, until=until, token=token, stats=stats
+        )
+    except Exception as e:
+        try:
+            st.session_state["meta_api_error"] = str(e)[:300]
+        except Exception:
+            pass
+        return pd.DataFrame(), {}
+    if stats.get("truncated"):
+        try:
+            st.session_state["meta_api_error"] = f"ads 엣지 조회가 페이지 상한에서 잘렸습니다 (광고 {stats.get('ads', 0)}개까지)"
+        except Exception:
+            pass
+
+    df = _build_meta_df(raw, since, use_breakdowns=False) if raw else pd.DataFrame()
+    if df.empty:
+        return df, status_map
+    return _finalize_meta_df(df), status_map
+
+
+# 광고 수가 많으면 filtering 값과 URL이 길어지므로 나눠서 조회
+_DEMOG_AD_CHUNK = 50
+
+
+def fetch_meta_demographics_for_ads(ad_ids: list[str], since: str, until: str) -> pd.DataFrame:
+    """
+    지정한 광고들만 성별/연령 breakdown 조회 (insights filtering: ad.id IN ...). 캐시 없음.
+    형식은 fetch_meta_from_api(use_breakdowns=True)와 같다.
+    """
+    token = _get_meta_token()
+    if not token or not ad_ids:
+        return pd.DataFrame()
+    try:
+        from meta_api import fetch_insights
+    except ImportError:
+        return pd.DataFrame()
+
+    raw = []
+    for i in range(0, len(ad_ids), _DEMOG_AD_CHUNK):
+        chunk = [str(v) for v in ad_ids[i:i + _DEMOG_AD_CHUNK]]
+        try:
+            raw.extend(fetch_insights(
+                meta_ad_account_id(),
+                since=since,
+                until=until,
+                token=token,
+                level="ad",
+                use_breakdowns=True,
+                filtering=[{"field": "ad.id", "operator": "IN", "value": chunk}]
+                + _api_filtering(MAIN_INSIGHTS_FILTERS),
+            ))
+        except Exception as e:
             try:
-                status_map = fetch_ad_effective_statuses(META_AD_ACCOUNT_ID, ad_ids, token=token)
-                df["Status"] = df["Ad_ID"].map(status_map).fillna("Unknown")
+                st.session_state["meta_api_error"] = str(e)[:300]
             except Exception:
                 pass
+            raise
+    if not raw:
+        return pd.DataFrame()
+    return _finalize_meta_df(_build_meta_df(raw, since, use_breakdowns=True))
+
+
+_CACHE_TTL = 600
+
+
+def _meta_from_disk_or_api(
+    since: str, until: str, use_breakdowns: bool, filters: tuple = (), *, force: bool = False
+):
+    # 재시작 직후에는 디스크 캐시를 바로 쓰고, 만료된 항목은 백그라운드에서 다시 받는다
+    return get_disk_cache().get_or_compute(
+        "load_meta_from_api",
+        (since, until, use_breakdowns, filters),
+        lambda: fetch_meta_from_api(since, until, use_breakdowns, filters),
+        FRAME_CODEC,
+        ttl=_CACHE_TTL,
+        force=force,
+    )
+
 
-    return _finalize_meta_df(df)
+@st.cache_data(ttl=_CACHE_TTL)
+def load_meta_from_api(since: str, until: str, use_breakdowns: bool = False, filters: tuple = ()):
+    """fetch_meta_from_api 결과 캐시 (메모리 10분 + 디스크). filters는 insights_filter(...) 결과."""
+    return _meta_from_disk_or_api(since, until, use_breakdowns, filters)
 
 
 def diagnose_meta_no_data() -> str:
     """
     Meta 데이터가 0건일 때 원인 진단. (원본 _diagnose_meta_no_data를 모듈로 이동)
     """
-    load_dotenv(_env_path)
     token = _get_meta_token()
     if not token:
         return "**ACCESS_TOKEN**이 읽히지 않습니다. Streamlit Cloud라면 **Secrets**에 `ACCESS_TOKEN`을 넣었는지 확인하세요. 로컬이면 `.env` 파일명을 다시 확인하세요."
@@ -247,7 +496,7 @@ def diagnose_meta_no_data() -> str:
     until = today.isoformat()
     try:
         raw = fetch_insights(
-            META_AD_ACCOUNT_ID, since=since, until=until, token=token, level="ad", use_breakdowns=False
+            meta_ad_account_id(), since=since, until=until, token=token, level="ad", use_breakdowns=False
         )
     except Exception as e:
         err = _redact(str(e).strip())
@@ -271,20 +520,102 @@ def diagnose_meta_no_data() -> str:
     return "원인을 특정하지 못했습니다. 터미널 로그를 확인해 보세요."
 
 
-@st.cache_data(ttl=600)
-def load_main_data():
-    load_dotenv(_env_path)
+@single_flight()
+def fetch_main_data(*, fresh: bool = False):
+    """
+    최근 14일 Meta 인사이트 + 성별/연령 breakdown (lazy 모드에서는 breakdown 생략, 빈 프레임).
+    fresh=True면 캐시를 거치지 않고 API를 직접 호출하고 결과를 디스크 캐시에 덮어쓴다 (백그라운드 갱신용).
+    """
     meta_fetched_at = None
-    today = kst_today()
-    base_since = (today - timedelta(days=14)).isoformat()
-    base_until = today.isoformat()
+    base_since, base_until = _main_window()
+    if fresh:
+        def fetch(*, since, until, use_breakdowns, filters):
+            return _meta_from_disk_or_api(since, until, use_breakdowns, filters, force=True)
+    else:
+        fetch = load_meta_from_api
     try:
-        df_meta = load_meta_from_api(since=base_since, until=base_until, use_breakdowns=False)
+        df_meta = fetch(since=base_since, until=base_until, use_breakdowns=False, filters=MAIN_INSIGHTS_FILTERS)
         if df_meta.empty:
             return pd.DataFrame(), None, pd.DataFrame()
-        df_meta_demographics = load_meta_from_api(since=base_since, until=base_until, use_breakdowns=True)
+        if demographics_mode() == "lazy":
+            df_meta_demographics = pd.DataFrame()
+        else:
+            df_meta_demographics = fetch(
+                since=base_since, until=base_until, use_breakdowns=True, filters=MAIN_INSIGHTS_FILTERS
+            )
         meta_fetched_at = kst_now()
     except Exception:
         return pd.DataFrame(), None, pd.DataFrame()
 
+    if fresh:
+        get_disk_cache().put(
+            "load_main_data", _main_data_key(base_since, base_until), (df_meta, meta_fetched_at, df_meta_demographics), MAIN_DATA_CODEC, ttl=_CACHE_TTL
+        )
     return df_meta, meta_fetched_at, df_meta_demographics
+
+
+def load_main_data():
+    return _load_main_data(*_main_window())
+
+
+@st.cache_data(ttl=_CACHE_TTL)
+def _load_main_data(since: str, until: str):
+    # 만료된 디스크 항목도 즉시 반환. 새로 받는 일은 스냅샷 백그라운드 갱신이 맡는다
+    return get_disk_cache().get_or_compute(
+        "load_main_data", _main_data_key(since, until), fetch_main_data, MAIN_DATA_CODEC, ttl=_CACHE_TTL, revalidate=False
+    )
+
+
+def _main_data_key(since: str, until: str) -> tuple:
+    # 모드에 따라 성별/연령 포함 여부가 달라서 디스크 항목을 분리한다.
+    # 조회 구간도 넣어 KST 자정이 지나면 (재시작 후에도) 전날 구간 항목을 쓰지 않게 한다
+    return (demographics_mode(), since, until)
+
+
+def _main_window() -> tuple[str, str]:
+    """대시보드 기본 조회 구간 (오늘 포함 최근 15일) since/until."""
+    today = kst_today()
+    return (today - timedelta(days=14)).isoformat(), today.isoformat()
+
+
+def _clear_meta_entry(use_breakdowns: bool) -> None:
+    since, until = _main_window()
+    clear_cached_entry(
+        load_meta_from_api, since=since, until=until, use_breakdowns=use_breakdowns, filters=MAIN_INSIGHTS_FILTERS
+    )
+    get_disk_cache().delete("load_meta_from_api", (since, until, use_breakdowns, MAIN_INSIGHTS_FILTERS))
+
+
+def _clear_main_data() -> None:
+    _load_main_data.clear()
+    get_disk_cache().delete("load_main_data")
+
+
+# lazy 모드: 광고별 성별/연령 캐시 (프로세스 공유)
+_demog_on_demand = DemographicsOnDemand(fetch_meta_demographics_for_ads)
+
+
+def load_demographics_for_ads(ad_ids) -> pd.DataFrame:
+    """선택한 광고들의 성별/연령 breakdown (기본 조회 구간). 광고별로 캐시된다."""
+    since, until = _main_window()
+    return _demog_on_demand.get(ad_ids, since, until)
+
+
+def demographics_cached_for_ads(ad_ids) -> bool:
+    """선택한 광고들이 모두 캐시에 있으면 True (화면에서 로딩 표시 여부를 정할 때 쓴다)."""
+    since, until = _main_window()
+    return _demog_on_demand.cached(ad_ids, since, until)
+
+
+def prefetch_demographics_for_ads(ad_ids) -> None:
+    """아직 없는 광고의 성별/연령을 백그라운드에서 미리 받는다."""
+    since, until = _main_window()
+    _demog_on_demand.prefetch(ad_ids, since, until)
+
+
+_registry = get_cache_registry()
+_registry.register(INSIGHTS, "load_meta_from_api", lambda: _clear_meta_entry(False))
+_registry.register(DEMOGRAPHICS, "load_meta_from_api", lambda: _clear_meta_entry(True))
+_registry.register(DEMOGRAPHICS, "demographics_on_demand", _demog_on_demand.clear)
+# load_main_data는 인사이트/성별연령 결과를 묶어 두므로 둘 중 하나만 바뀌어도 다시 만든다
+_registry.register(SNAPSHOT, "load_main_data", _clear_main_data, depends_on=(INSIGHTS, DEMOGRAPHICS))
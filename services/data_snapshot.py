@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime
+from typing import Callable, Optional
+
+import pandas as pd
+
+from services.cache_registry import DEMOGRAPHICS, INSIGHTS, SNAPSHOT, STATUSES, get_cache_registry
+from services.demog_cube import build_demog_cube
+from services.single_flight import get_single_flight
+from services.time_utils import kst_now
+from services.trend_cube import build_trend_cube
+
+# pandas 3.x는 Copy-on-Write가 기본. 2.x에서는 켜서 세션이 공유 프레임을 건드려도
+# 변경이 일어나는 시점에만 복사되도록 한다.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+SNAPSHOT_TTL_SECONDS = 600
+# TTL 만료 이만큼 전에 백그라운드에서 새 스냅샷을 만든다
+REFRESH_LEAD_SECONDS = 60
+_REFRESH_POLL_SECONDS = 15
+_REFRESH_RETRY_SECONDS = 60
+_REPORT_KEEP = 10
+# 오늘 구간만 다시 받아 교체하는 주기 (전체 갱신과 별도)
+HOT_REFRESH_SECONDS = 90
+
+_Builder = Callable[[], tuple[pd.DataFrame, Optional[datetime], pd.DataFrame]]
+# () -> (오늘 date, 오늘 행 프레임, 마지막 집계 시간대 "HH:MM" 또는 "")
+_DayPatcher = Callable[[], tuple[date, pd.DataFrame, str]]
+
+
+@dataclass(frozen=True)
+class DataSnapshot:
+    """프로세스 전체가 공유하는 읽기 전용 데이터 묶음. 세션은 복사하지 않고 참조만 한다."""
+
+    version: int
+    df_raw: pd.DataFrame
+    df_demographics: pd.DataFrame
+    meta_fetched_at: Optional[datetime]
+    built_at: datetime
+    trend_cube: dict = field(repr=False)
+    demog_cube: dict = field(repr=False)
+    # 오늘 구간만 교체한 시각과 반영된 마지막 시간대 (전체 갱신 직후에는 None/"")
+    today_patched_at: Optional[datetime] = None
+    today_through: str = ""
+
+    def age_seconds(self) -> float:
+        """데이터 나이. 디스크 캐시에서 복원된 경우 원래 조회 시각 기준이라 곧바로 갱신 대상이 된다."""
+        fetched = self.meta_fetched_at or self.built_at
+        return (kst_now() - fetched).total_seconds()
+
+
+def _frame_bytes(df) -> int:
+    if not isinstance(df, pd.DataFrame) or df.empty:
+        return 0
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _cube_bytes(cube: dict) -> int:
+    total = 0
+    for v in (cube or {}).values():
+        if isinstance(v, pd.DataFrame):
+            total += _frame_bytes(v)
+        elif hasattr(v, "nbytes"):
+            total += int(v.nbytes)
+    return total
+
+
+class SnapshotHolder:
+    def __init__(
+        self,
+        *,
+        ttl: float = SNAPSHOT_TTL_SECONDS,
+        lead: float = REFRESH_LEAD_SECONDS,
+    ) -> None:
+        self._lock = threading.Lock()
+        self._current: Optional[DataSnapshot] = None
+        self._version = 0
+        self._reports: list[dict] = []
+        self.ttl = ttl
+        self.lead = lead
+        self._refresh_fn: Optional[_Builder] = None
+        self._refresher: Optional[threading.Thread] = None
+        self._refreshing = False
+        self.last_refresh_error = ""
+        self.hot_interval = HOT_REFRESH_SECONDS
+        self._hot_fn: Optional[_DayPatcher] = None
+        self._hot_refresher: Optional[threading.Thread] = None
+        self.last_patch_error = ""
+
+    def current(self) -> Optional[DataSnapshot]:
+        return self._current
+
+    @property
+    def refreshing(self) -> bool:
+        return self._refreshing
+
+    def publish(
+        self,
+        df_raw: pd.DataFrame,
+        df_demographics: pd.DataFrame,
+        meta_fetched_at: Optional[datetime],
+    ) -> DataSnapshot:
+        """프레임으로 새 스냅샷(큐브 포함)을 만들어 원자적으로 교체."""
+        df_raw = df_raw if isinstance(df_raw, pd.DataFrame) else pd.DataFrame()
+        df_demographics = df_demographics if isinstance(df_demographics, pd.DataFrame) else pd.DataFrame()
+        trend_cube = build_trend_cube(df_raw)
+        demog_cube = build_demog_cube(df_demographics)
+        if "values" in demog_cube:
+            demog_cube["values"].flags.writeable = False
+
+        with self._lock:
+            self._version += 1
+            snap = DataSnapshot(
+                version=self._version,
+                df_raw=df_raw,
+                df_demographics=df_demographics,
+                meta_fetched_at=meta_fetched_at,
+                built_at=kst_now(),
+                trend_cube=trend_cube,
+                demog_cube=demog_cube,
+            )
+            self._current = snap
+            self._reports.append(self._report_for(snap))
+            del self._reports[:-_REPORT_KEEP]
+        return snap
+
+    def get_or_build(
+        self,
+        build: _Builder,
+        *,
+        refresh: Optional[_Builder] = None,
+        hot_refresh: Optional[_DayPatcher] = None,
+    ) -> DataSnapshot:
+        """
+        스냅샷이 없을 때만 build()로 동기 생성하고, 이후에는 항상 현재 스냅샷을 바로 반환.
+        refresh가 주어지면 백그라운드 스레드가 TTL 만료 lead초 전에 refresh()로 새 스냅샷을
+        만들어 교체한다 (stale-while-revalidate). 교체 전까지는 이전 스냅샷을 계속 제공.
+        hot_refresh가 주어지면 별도 스레드가 hot_interval초마다 오늘 구간만 받아 patch_day로 교체한다.
+        build/refresh: (df_raw, meta_fetched_at, df_demographics)를 반환하는 함수
+        """
+        if refresh is not None:
+            self._refresh_fn = refresh
+            self._ensure_refresher()
+        if hot_refresh is not None:
+            self._hot_fn = hot_refresh
+            self._ensure_hot_refresher()
+        snap = self._current
+        if snap is not None:
+            return snap
+        # 콜드 스타트에 여러 세션이 동시에 들어와도 빌드는 한 번만
+        return get_single_flight().do("data_snapshot.build", id(self), self._build_once, build)
+
+    def _build_once(self, build: _Builder) -> DataSnapshot:
+        snap = self._current
+        if snap is not None:
+            return snap
+        df_raw, meta_fetched_at, df_demographics = build()
+        return self.publish(df_raw, df_demographics, meta_fetched_at)
+
+    def _ensure_refresher(self) -> None:
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._refresher = threading.Thread(
+                target=self._refresh_loop, name="snapshot-refresher", daemon=True
+            )
+            self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        while True:
+            snap = self._current
+            if snap is None:
+                # 무효화 직후에는 다음 get_or_build가 동기로 다시 만든다
+                time.sleep(_REFRESH_POLL_SECONDS)
+                continue
+            due_in = (self.ttl - self.lead) - snap.age_seconds()
+            if due_in > 0:
+                time.sleep(min(due_in, _REFRESH_POLL_SECONDS))
+                continue
+            if not self.refresh_now():
+                time.sleep(_REFRESH_RETRY_SECONDS)
+
+    def refresh_now(self) -> bool:
+        """refresh 함수로 새 스냅샷을 만들어 교체. 실패/빈 결과면 기존 스냅샷 유지."""
+        refresh = self._refresh_fn
+        if refresh is None:
+            return False
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+        try:
+            df_raw, meta_fetched_at, df_demographics = refresh()
+            current = self._current
+            if (not isinstance(df_raw, pd.DataFrame) or df_raw.empty) and current is not None and not current.df_raw.empty:
+                self.last_refresh_error = "갱신 결과가 비어 있어 이전 데이터를 유지합니다."
+                return False
+            self.publish(df_raw, df_demographics, meta_fetched_at)
+            self.last_refresh_error = ""
+            return True
+        except Exception as e:
+            self.last_refresh_error = str(e)[:300]
+            return False
+        finally:
+            self._refreshing = False
+
+    def _ensure_hot_refresher(self) -> None:
+        with self._lock:
+            if self._hot_refresher is not None and self._hot_refresher.is_alive():
+                return
+            self._hot_refresher = threading.Thread(
+                target=self._hot_refresh_loop, name="snapshot-hot-refresher", daemon=True
+            )
+            self._hot_refresher.start()
+
+    def _hot_refresh_loop(self) -> None:
+        while True:
+            time.sleep(self.hot_interval)
+            snap = self._current
+            # 스냅샷이 없거나 방금 전체 갱신됐으면 오늘 구간도 이미 최신
+            if snap is None or snap.age_seconds() < self.hot_interval:
+                continue
+            self.patch_now()
+
+    def patch_now(self) -> bool:
+        """hot_refresh 함수로 오늘 구간을 받아 patch_day. 전체 갱신 중이면 건너뛴다."""
+        hot = self._hot_fn
+        if hot is None or self._refreshing:
+            return False
+        try:
+            day, df_day, through = hot()
+            return self.patch_day(day, df_day, through)
+        except Exception as e:
+            self.last_patch_error = str(e)[:300]
+            return False
+
+    def patch_day(self, day: date, df_day: pd.DataFrame, through: str = "") -> bool:
+        """
+        현재 스냅샷의 day 행(Meta)만 df_day로 바꾼 새 스냅샷을 게시. 추세 큐브만 다시 만들고
+        성별/연령 데이터와 큐브, meta_fetched_at(전체 갱신 주기 기준)은 그대로 둔다.
+        그 사이 다른 스냅샷이 게시됐으면 버린다 (더 새 데이터를 덮어쓰지 않도록).
+        """
+        snap = self._current
+        if snap is None or snap.df_raw.empty or "Date" not in snap.df_raw.columns:
+            return False
+        df_day = df_day if isinstance(df_day, pd.DataFrame) else pd.DataFrame()
+        raw = snap.df_raw
+        day_mask = raw["Date"].dt.normalize() == pd.Timestamp(day)
+        if "Platform" in raw.columns:
+            day_mask &= raw["Platform"].astype(str).str.upper() == "META"
+        if df_day.empty and day_mask.any() and raw.loc[day_mask, "Cost"].sum() > 0:
+            # 일시적 빈 응답으로 이미 집계된 오늘 수치를 지우지 않는다
+            self.last_patch_error = "오늘 데이터 응답이 비어 있어 이전 수치를 유지합니다."
+            return False
+
+        parts = [raw.loc[~day_mask]]
+        if not df_day.empty:
+            parts.append(df_day.reindex(columns=raw.columns))
+        df_raw = pd.concat(parts, ignore_index=True)
+        trend_cube = build_trend_cube(df_raw)
+
+        with self._lock:
+            if self._current is not snap:
+                return False
+            self._version += 1
+            patched = replace(
+                snap,
+                version=self._version,
+                df_raw=df_raw,
+                trend_cube=trend_cube,
+                today_patched_at=kst_now(),
+                today_through=through,
+            )
+            self._current = patched
+            self._reports.append(self._report_for(patched))
+            del self._reports[:-_REPORT_KEEP]
+        self.last_patch_error = ""
+        return True
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._current = None
+
+    def memory_report(self) -> pd.DataFrame:
+        """스냅샷 버전별 행 수/메모리 사용량 (최근 버전 순)."""
+        with self._lock:
+            rows = list(self._reports)
+        return pd.DataFrame(rows[::-1])
+
+    @staticmethod
+    def _report_for(snap: DataSnapshot) -> dict:
+        raw_b = _frame_bytes(snap.df_raw)
+        demog_b = _frame_bytes(snap.df_demographics)
+        cube_b = _cube_bytes(snap.trend_cube) + _cube_bytes(snap.demog_cube)
+        return {
+            "version": snap.version,
+            "built_at": snap.built_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "today_patched_at": snap.today_patched_at.strftime("%H:%M:%S") if snap.today_patched_at else "",
+            "raw_rows": len(snap.df_raw),
+            "demog_rows": len(snap.df_demographics),
+            "raw_mb": round(raw_b / 2**20, 2),
+            "demog_mb": round(demog_b / 2**20, 2),
+            "cube_mb": round(cube_b / 2**20, 2),
+            "total_mb": round((raw_b + demog_b + cube_b) / 2**20, 2),
+        }
+
+
+_holder = SnapshotHolder()
+get_cache_registry().register(
+    SNAPSHOT, "data_snapshot", _holder.invalidate, depends_on=(INSIGHTS, DEMOGRAPHICS, STATUSES)
+)
+
+
+def get_snapshot_holder() -> SnapshotHolder:
+    return _holder
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+GENDER_LABELS = ["남성", "여성"]
+_GENDER_CODES = {"남성": 0, "male": 0, "여성": 1, "female": 1}
+
+# 마지막 축: Cost / Conversions / Impressions / 원본 행 수(존재 여부 판단용)
+_METRICS = ["Cost", "Conversions", "Impressions", "Rows"]
+_M = {m: i for i, m in enumerate(_METRICS)}
+
+
+def build_demog_cube(df: pd.DataFrame) -> dict:
+    """
+    데이터 로드 1회당 한 번만 만드는 성별/연령 큐브.
+    values: (소재, 연령, 성별, 일자, 지표) 배열. 소재 축은 (Campaign, AdGroup, Creative_ID) 조합.
+    성별은 남성=0 / 여성=1 코드로 정규화하고, 그 외(Unknown 등)는 소재 축에만 남긴다.
+    """
+    if df is None or df.empty or "Gender" not in df.columns or "Age" not in df.columns:
+        return {}
+
+    keys = pd.DataFrame({
+        c: (df[c].astype(str) if c in df.columns else pd.Series("", index=df.index))
+        for c in ("Campaign", "AdGroup", "Creative_ID")
+    })
+    entity_code = keys.groupby(["Campaign", "AdGroup", "Creative_ID"], sort=False).ngroup().to_numpy()
+    entities = keys.drop_duplicates().reset_index(drop=True)
+
+    gender_code = df["Gender"].astype(str).str.strip().str.lower().map(_GENDER_CODES)
+    valid = gender_code.notna().to_numpy().copy()
+    ages = sorted(df.loc[valid, "Age"].astype(str).unique().tolist())
+    age_code = pd.Categorical(df["Age"].astype(str), categories=ages).codes
+    if "Date" in df.columns:
+        day = pd.to_datetime(df["Date"], errors="coerce").dt.normalize()
+    else:
+        day = pd.Series(pd.NaT, index=df.index)
+    valid &= day.notna().to_numpy()
+    days = pd.DatetimeIndex(sorted(day[valid].unique()))
+    day_code = days.get_indexer(day)
+
+    values = np.zeros((len(entities), len(ages), len(GENDER_LABELS), len(days), len(_METRICS)))
+    metric_cols = [
+        pd.to_numeric(df[c], errors="coerce").fillna(0).to_numpy(dtype=float) if c in df.columns
+        else np.zeros(len(df))
+        for c in _METRICS[:-1]
+    ]
+    metric_vals = np.column_stack(metric_cols + [np.ones(len(df))])
+    np.add.at(
+        values,
+        (
+            entity_code[valid],
+            age_code[valid],
+            gender_code.to_numpy()[valid].astype(int),
+            day_code[valid],
+        ),
+        metric_vals[valid],
+    )
+
+    return {
+        "values": values,
+        "entities": entities,
+        "creative": entities["Creative_ID"].to_numpy(),
+        "adgroup": entities["AdGroup"].to_numpy(),
+        "campaign": entities["Campaign"].to_numpy(),
+        "ages": ages,
+        "days": days,
+    }
+
+
+def demog_slice(
+    cube: dict,
+    *,
+    creative: Optional[str] = None,
+    adgroup: Optional[str] = None,
+    campaign: Optional[str] = None,
+    since=None,
+    until=None,
+) -> Optional[np.ndarray]:
+    """
+    선택 조건에 맞는 소재/기간을 합산한 (연령, 성별, 지표) 배열.
+    조건에 맞는 소재가 없으면 None.
+    """
+    if not cube:
+        return None
+    mask = np.ones(len(cube["entities"]), dtype=bool)
+    if creative:
+        mask &= cube["creative"] == str(creative)
+    else:
+        if adgroup:
+            mask &= cube["adgroup"] == str(adgroup)
+        if campaign:
+            mask &= cube["campaign"] == str(campaign)
+    if not mask.any():
+        return None
+
+    days = cube["days"]
+    day_mask = np.ones(len(days), dtype=bool)
+    if since is not None:
+        day_mask &= days >= pd.Timestamp(since)
+    if until is not None:
+        day_mask &= days <= pd.Timestamp(until)
+    return cube["values"][mask][:, :, :, day_mask, :].sum(axis=(0, 3))
+
+
+def has_demog_rows(sliced: Optional[np.ndarray]) -> bool:
+    return sliced is not None and bool((sliced[:, :, _M["Rows"]] > 0).any())
+
+
+def demog_conversions(cube: dict, sliced: np.ndarray) -> dict[str, tuple[list[str], np.ndarray]]:
+    """성별 -> (연령 리스트, 전환수) (해당 성별/연령 데이터가 있는 칸만)."""
+    out = {}
+    ages = np.asarray(cube["ages"], dtype=object)
+    for g, label in enumerate(GENDER_LABELS):
+        present = sliced[:, g, _M["Rows"]] > 0
+        out[label] = (ages[present].tolist(), sliced[present, g, _M["Conversions"]])
+    return out
+
+
+def demog_pivot(cube: dict, sliced: np.ndarray, metric: str) -> pd.DataFrame:
+    """
+    Gender x Age 피벗 (데이터 있는 성별/연령만, 빈 칸 0).
+    metric: Cost / Conversions / Impressions / CPA
+    """
+    present = sliced[:, :, _M["Rows"]] > 0
+    if metric == "CPA":
+        conv = sliced[:, :, _M["Conversions"]]
+        cost = sliced[:, :, _M["Cost"]]
+        grid = np.divide(cost, conv, out=np.zeros_like(cost), where=conv > 0)
+    else:
+        grid = sliced[:, :, _M[metric]]
+    grid = np.where(present, grid, 0.0)
+
+    age_keep = present.any(axis=1)
+    gender_keep = present.any(axis=0)
+    return pd.DataFrame(
+        grid[age_keep][:, gender_keep].T,
+        index=pd.Index([GENDER_LABELS[i] for i in np.flatnonzero(gender_keep)], name="Gender"),
+        columns=pd.Index(np.asarray(cube["ages"], dtype=object)[age_keep].tolist(), name="Age"),
+    )
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+import pandas as pd
+
+from services.single_flight import get_single_flight
+
+
+DEMOG_TTL_SECONDS = 1800
+
+# (ad_ids, since, until) -> 해당 광고들의 성별/연령 breakdown 프레임 (Ad_ID 컬럼 포함)
+_Fetcher = Callable[[list[str], str, str], pd.DataFrame]
+
+
+class DemographicsOnDemand:
+    """
+    선택한 광고의 성별/연령 breakdown만 받아 ad_id 단위로 캐시한다.
+    한 번 받은 광고는 TTL 동안 다시 요청하지 않고, 없는 광고만 모아 한 번에 조회한다.
+    데이터가 없는 광고도 빈 프레임으로 기억해 반복 조회하지 않는다.
+    """
+
+    def __init__(self, fetch: _Fetcher, *, ttl: float = DEMOG_TTL_SECONDS) -> None:
+        self._fetch = fetch
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, str, str], tuple[float, pd.DataFrame]] = {}
+        self._prefetching: set[tuple[str, str, str]] = set()
+
+    @staticmethod
+    def _clean(ad_ids: Iterable[str]) -> list[str]:
+        return sorted({str(v).strip() for v in ad_ids if str(v).strip() and str(v).strip().lower() != "nan"})
+
+    def _missing(self, ad_ids: list[str], since: str, until: str) -> list[str]:
+        now = time.time()
+        with self._lock:
+            return [
+                ad_id for ad_id in ad_ids
+                if (entry := self._entries.get((ad_id, since, until))) is None or now - entry[0] >= self.ttl
+            ]
+
+    def _load(self, ad_ids: list[str], since: str, until: str) -> None:
+        df = self._fetch(ad_ids, since, until)
+        if not isinstance(df, pd.DataFrame):
+            df = pd.DataFrame()
+        by_ad = (
+            {str(k): g for k, g in df.groupby(df["Ad_ID"].astype(str), sort=False)}
+            if not df.empty and "Ad_ID" in df.columns else {}
+        )
+        empty = df.iloc[0:0]
+        now = time.time()
+        with self._lock:
+            # 조회 구간은 매일 바뀌므로 다른 구간 항목과 만료된 항목은 여기서 버린다 (프로세스 전역 dict가 계속 커지지 않게)
+            self._entries = {
+                key: entry for key, entry in self._entries.items()
+                if key[1:] == (since, until) and now - entry[0] < self.ttl
+            }
+            for ad_id in ad_ids:
+                self._entries[(ad_id, since, until)] = (now, by_ad.get(ad_id, empty))
+
+    def _load_missing(self, ad_ids: list[str], since: str, until: str) -> None:
+        missing = self._missing(ad_ids, since, until)
+        if missing:
+            # 같은 광고 묶음을 여러 세션/프리패치가 동시에 요청해도 API 호출은 한 번
+            get_single_flight().do(
+                "demog_on_demand.load", (tuple(missing), since, until), self._load, missing, since, until
+            )
+
+    def get(self, ad_ids: Iterable[str], since: str, until: str) -> pd.DataFrame:
+        """ad_ids의 breakdown 행을 합친 프레임. 캐시에 없거나 만료된 광고만 조회한다."""
+        ids = self._clean(ad_ids)
+        if not ids:
+            return pd.DataFrame()
+        self._load_missing(ids, since, until)
+        with self._lock:
+            frames = [self._entries[(ad_id, since, until)][1] for ad_id in ids if (ad_id, since, until) in self._entries]
+        frames = [f for f in frames if not f.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def cached(self, ad_ids: Iterable[str], since: str, until: str) -> bool:
+        """ad_ids가 모두 캐시에 있으면 True (get이 API를 호출하지 않는다)."""
+        ids = self._clean(ad_ids)
+        return bool(ids) and not self._missing(ids, since, until)
+
+    def prefetch(self, ad_ids: Iterable[str], since: str, until: str) -> Optional[threading.Thread]:
+        """없는 광고만 백그라운드 스레드로 미리 받아 둔다. 받을 것이 없으면 None."""
+        ids = self._clean(ad_ids)
+        with self._lock:
+            ids = [ad_id for ad_id in ids if (ad_id, since, until) not in self._prefetching]
+        missing = self._missing(ids, since, until)
+        if not missing:
+            return None
+        keys = {(ad_id, since, until) for ad_id in missing}
+        with self._lock:
+            self._prefetching |= keys
+
+        def run():
+            try:
+                self._load_missing(missing, since, until)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._prefetching -= keys
+
+        thread = threading.Thread(target=run, name="demog-prefetch", daemon=True)
+        thread.start()
+        return thread
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
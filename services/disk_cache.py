@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+from services.single_flight import get_single_flight
+
+
+DEFAULT_MAX_BYTES = 256 * 2**20
+# TTL이 지난 항목도 이 기간 안이면 일단 돌려주고 백그라운드에서 다시 채운다
+DEFAULT_STALE_SECONDS = 24 * 3600
+
+
+@dataclass(frozen=True)
+class Codec:
+    """값 <-> (프레임 dict, 메타 dict) 변환. 프레임은 컬럼 파일(parquet)로 저장된다."""
+
+    encode: Callable[[Any], tuple[dict[str, pd.DataFrame], dict]]
+    decode: Callable[[dict[str, pd.DataFrame], dict], Any]
+
+
+FRAME_CODEC = Codec(
+    encode=lambda df: ({"data": df if isinstance(df, pd.DataFrame) else pd.DataFrame()}, {}),
+    decode=lambda frames, meta: frames["data"],
+)
+
+# {id: {field: str}} 형태의 조회 결과 (예: ad_id별 asset/status)
+RECORDS_CODEC = Codec(
+    encode=lambda records: ({"data": pd.DataFrame.from_dict(records or {}, orient="index").fillna("").astype(str)}, {}),
+    decode=lambda frames, meta: {
+        str(k): {c: ("" if v is None else str(v)) for c, v in row.items()}
+        for k, row in frames["data"].to_dict(orient="index").items()
+    },
+)
+
+
+def _encode_main_data(value) -> tuple[dict[str, pd.DataFrame], dict]:
+    df_raw, fetched_at, df_demographics = value
+    return (
+        {"raw": df_raw, "demographics": df_demographics},
+        {"fetched_at": fetched_at.isoformat() if fetched_at else ""},
+    )
+
+
+def _decode_main_data(frames, meta):
+    fetched_at = datetime.fromisoformat(meta["fetched_at"]) if meta.get("fetched_at") else None
+    return frames["raw"], fetched_at, frames["demographics"]
+
+
+# load_main_data의 (df_raw, meta_fetched_at, df_demographics)
+MAIN_DATA_CODEC = Codec(encode=_encode_main_data, decode=_decode_main_data)
+
+
+def _default_root() -> Path:
+    return Path(__file__).resolve().parent.parent / "data" / "cache"
+
+
+def _atomic_write(path: Path, write: Callable[[str], None]) -> None:
+    """같은 디렉터리의 임시 파일에 쓴 뒤 os.replace로 교체 (중간 상태가 보이지 않음)."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _write_frame(df: pd.DataFrame, path_base: Path) -> tuple[str, str]:
+    try:
+        path = path_base.with_suffix(".parquet")
+        _atomic_write(path, lambda tmp: df.to_parquet(tmp, index=True, compression="zstd"))
+        return path.name, "parquet"
+    except Exception:
+        # pyarrow 미설치 또는 parquet로 못 쓰는 컬럼 타입
+        path = path_base.with_suffix(".pkl")
+        _atomic_write(path, lambda tmp: df.to_pickle(tmp, compression="gzip"))
+        return path.name, "pickle"
+
+
+def _read_frame(path: Path, fmt: str) -> pd.DataFrame:
+    if fmt == "parquet":
+        return pd.read_parquet(path)
+    return pd.read_pickle(path, compression="gzip")
+
+
+class DiskCache:
+    """
+    재시작 후에도 남는 TTL 캐시.
+    항목 = 프레임 파일들 + 메타 json(생성/마지막 접근 시각, TTL, 크기). 메타가 마지막에 쓰이므로
+    메타가 보이면 항목이 완성된 것이다. 전체 크기가 max_bytes를 넘으면 오래 안 쓴 항목부터 삭제(LRU).
+    """
+
+    def __init__(self, root: Optional[Path] = None, *, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.root = Path(root) if root else _default_root()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(name: str, key) -> str:
+        return hashlib.sha1(f"{name}|{key!r}".encode("utf-8")).hexdigest()[:20]
+
+    def _meta_path(self, name: str, digest: str) -> Path:
+        return self.root / f"{name}.{digest}.json"
+
+    def _read_meta(self, path: Path) -> Optional[dict]:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except Exception:
+            return None
+
+    def _write_meta(self, path: Path, meta: dict) -> None:
+        _atomic_write(path, lambda tmp: Path(tmp).write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8"))
+
+    def get(self, name: str, key, codec: Codec) -> Optional[tuple[Any, float, float]]:
+        """(값, 경과초, TTL) 또는 None. 만료 여부 판단은 호출자가 한다."""
+        meta_path = self._meta_path(name, self._digest(name, key))
+        with self._lock:
+            meta = self._read_meta(meta_path)
+            if not meta:
+                return None
+            try:
+                frames = {
+                    fname: _read_frame(self.root / info["file"], info["format"])
+                    for fname, info in meta["frames"].items()
+                }
+                value = codec.decode(frames, meta.get("meta") or {})
+            except Exception:
+                self._delete_entry(meta_path, meta)
+                return None
+            meta["last_access"] = time.time()
+            try:
+                self._write_meta(meta_path, meta)
+            except OSError:
+                pass
+        return value, time.time() - float(meta["created_at"]), float(meta["ttl"])
+
+    def put(self, name: str, key, value, codec: Codec, *, ttl: float) -> None:
+        digest = self._digest(name, key)
+        frames, extra = codec.encode(value)
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            meta_path = self._meta_path(name, digest)
+            old = self._read_meta(meta_path)
+            files: dict[str, dict] = {}
+            size = 0
+            for fname, df in frames.items():
+                file_name, fmt = _write_frame(df, self.root / f"{name}.{digest}.{fname}")
+                files[fname] = {"file": file_name, "format": fmt}
+                size += (self.root / file_name).stat().st_size
+            now = time.time()
+            self._write_meta(meta_path, {
+                "name": name,
+                "key": repr(key)[:200],
+                "created_at": now,
+                "last_access": now,
+                "ttl": ttl,
+                "bytes": size,
+                "frames": files,
+                "meta": extra,
+            })
+            # 포맷이 바뀌어 남은 이전 파일 정리
+            if old:
+                keep = {info["file"] for info in files.values()}
+                for info in old.get("frames", {}).values():
+                    if info.get("file") not in keep:
+                        self._unlink(self.root / info["file"])
+            self._evict_locked()
+
+    def delete(self, name: str, key=None) -> None:
+        """key 항목 삭제. key가 None이면 name의 모든 항목 삭제."""
+        with self._lock:
+            if key is not None:
+                paths = [self._meta_path(name, self._digest(name, key))]
+            else:
+                paths = list(self.root.glob(f"{name}.*.json")) if self.root.exists() else []
+            for path in paths:
+                meta = self._read_meta(path)
+                if meta:
+                    self._delete_entry(path, meta)
+
+    def get_or_compute(
+        self,
+        name: str,
+        key,
+        compute: Callable[[], Any],
+        codec: Codec,
+        *,
+        ttl: float,
+        stale_for: float = DEFAULT_STALE_SECONDS,
+        revalidate: bool = True,
+        force: bool = False,
+    ) -> Any:
+        """
+        디스크 항목이 TTL 안이면 그대로, TTL은 지났지만 stale_for 안이면 일단 돌려주고
+        (revalidate=True일 때) 백그라운드에서 compute()로 다시 채운다. 그 외에는 동기로 계산 후 저장.
+        force=True면 디스크를 읽지 않고 계산 결과로 덮어쓴다.
+        """
+        if not force:
+            hit = self.get(name, key, codec)
+            if hit is not None:
+                value, age, entry_ttl = hit
+                if age < entry_ttl:
+                    return value
+                if age < entry_ttl + stale_for:
+                    if revalidate:
+                        self._revalidate(name, key, compute, codec, ttl)
+                    return value
+        value = compute()
+        self._put_if_useful(name, key, value, codec, ttl)
+        return value
+
+    def _put_if_useful(self, name: str, key, value, codec: Codec, ttl: float) -> None:
+        # 빈 결과(토큰 누락/API 실패)는 저장하지 않아 다음 시작 때 다시 시도하게 한다
+        first = value[0] if isinstance(value, tuple) and value else value
+        if first is None or (hasattr(first, "empty") and first.empty) or (isinstance(first, dict) and not first):
+            return
+        try:
+            self.put(name, key, value, codec, ttl=ttl)
+        except Exception:
+            pass
+
+    def _revalidate(self, name: str, key, compute: Callable[[], Any], codec: Codec, ttl: float) -> None:
+        def run():
+            try:
+                get_single_flight().do(
+                    f"disk_cache.revalidate.{name}",
+                    self._digest(name, key),
+                    lambda: self._put_if_useful(name, key, compute(), codec, ttl),
+                )
+            except Exception:
+                pass
+
+        threading.Thread(target=run, name=f"disk-cache-{name}", daemon=True).start()
+
+    def stats(self) -> pd.DataFrame:
+        """항목별 크기/경과 시간."""
+        rows = []
+        with self._lock:
+            paths = list(self.root.glob("*.json")) if self.root.exists() else []
+            for path in paths:
+                meta = self._read_meta(path)
+                if not meta:
+                    continue
+                rows.append({
+                    "name": meta.get("name", ""),
+                    "key": meta.get("key", ""),
+                    "age_s": round(time.time() - float(meta.get("created_at", 0)), 1),
+                    "ttl_s": meta.get("ttl", 0),
+                    "kb": round(float(meta.get("bytes", 0)) / 1024, 1),
+                })
+        return pd.DataFrame(rows)
+
+    def _evict_locked(self) -> None:
+        metas = []
+        for path in self.root.glob("*.json"):
+            meta = self._read_meta(path)
+            if meta:
+                metas.append((float(meta.get("last_access", 0)), path, meta))
+        total = sum(int(m.get("bytes", 0)) for _, _, m in metas)
+        for _, path, meta in sorted(metas, key=lambda t: t[0]):
+            if total <= self.max_bytes:
+                break
+            total -= int(meta.get("bytes", 0))
+            self._delete_entry(path, meta)
+
+    def _delete_entry(self, meta_path: Path, meta: dict) -> None:
+        self._unlink(meta_path)
+        for info in (meta.get("frames") or {}).values():
+            self._unlink(self.root / info.get("file", ""))
+
+    @staticmethod
+    def _unlink(path: Path) -> None:
+        try:
+            if path.is_file():
+                path.unlink()
+        except OSError:
+            pass
+
+
+_disk_cache = DiskCache()
+
+
+def get_disk_cache() -> DiskCache:
+    return _disk_cache
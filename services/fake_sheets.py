@@ -0,0 +1,281 @@
+"""
+메모리 안에서 동작하는 gspread Spreadsheet/Worksheet 대용품.
+
+실제 Google 계정 없이 store 모듈(action_store, material_status_store)의 동작과
+API 호출 수를 재기 위한 것. 쓰는 메서드만 구현하고, 호출마다 지연(latency)과
+할당량 초과(429) 오류를 주입할 수 있다.
+지문 수식은 시트와 같은 식으로 계산하므로 지문이 못 잡는 편집(충돌)도 실제와 똑같이 재현된다.
+
+    ss = FakeSpreadsheet(latency=0.05)
+    ws = ss.add_worksheet("광고성과관리")
+    get_sheets_connection().install(ss)   # 이후 store 모듈이 이 시트를 쓴다
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Iterable, Optional
+
+
+_A1 = re.compile(r"^([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+# fingerprint_formula의 앞부분: =LET(r,'제목'!A2:I,
+_FINGERPRINT = re.compile(r"^=LET\(r,'((?:[^']|'')+)'!A2:([A-Z]+),")
+
+
+class FakeAPIError(Exception):
+    """gspread.exceptions.APIError처럼 code 속성을 가진 오류."""
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(f"APIError: [{code}]: {message}")
+        self.code = code
+
+
+def _col_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch) - 64)
+    return n - 1
+
+
+def _parse_a1(rng: str) -> tuple[int, Optional[int], int, Optional[int]]:
+    """A1 표기 -> (시작 행, 끝 행 또는 None, 시작 열, 끝 열 또는 None). 0부터, 끝은 포함."""
+    rng = rng.split("!")[-1].replace("$", "")
+    m = _A1.match(rng)
+    if not m:
+        raise ValueError(f"unsupported range: {rng}")
+    c1, r1, c2, r2 = m.groups()
+    col0 = _col_index(c1) if c1 else 0
+    row0 = int(r1) - 1 if r1 else 0
+    if m.group(0).find(":") < 0:
+        return row0, row0 if r1 else None, col0, col0 if c1 else None
+    col1 = _col_index(c2) if c2 else None
+    row1 = int(r2) - 1 if r2 else None
+    return row0, row1, col0, col1
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet: "FakeSpreadsheet", title: str, sheet_id: int, row_count: int = 1000) -> None:
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = sheet_id
+        self.row_count = row_count  # 시트 격자 행 수 (값이 넘치면 늘어난다)
+        self.rows: list[list[str]] = []
+        self._fp_memo: Optional[tuple] = None
+
+    # -- 내부 -------------------------------------------------------------
+    def _call(self, op: str) -> None:
+        self.spreadsheet._call(f"ws.{op}")
+
+    def _ensure(self, row: int, col: int) -> None:
+        while len(self.rows) <= row:
+            self.rows.append([])
+        r = self.rows[row]
+        if len(r) <= col:
+            r.extend([""] * (col + 1 - len(r)))
+
+    def _write(self, row0: int, col0: int, values: Iterable[Iterable[Any]]) -> None:
+        for i, vals in enumerate(values):
+            for j, v in enumerate(vals):
+                self._ensure(row0 + i, col0 + j)
+                self.rows[row0 + i][col0 + j] = "" if v is None else str(v)
+
+    def _trim(self) -> None:
+        # get_all_values처럼 뒤쪽 빈 칸/빈 행은 돌려주지 않는다
+        for r in self.rows:
+            while r and r[-1] == "":
+                r.pop()
+        while self.rows and not self.rows[-1]:
+            self.rows.pop()
+
+    def _read(self, rng: str, *, formulas: bool = False) -> list[list[str]]:
+        row0, row1, col0, col1 = _parse_a1(rng)
+        self._trim()
+        end = len(self.rows) - 1 if row1 is None else min(row1, len(self.rows) - 1)
+        out = []
+        for r in self.rows[row0 : end + 1]:
+            cells = r[col0 : None if col1 is None else col1 + 1]
+            out.append(list(cells) if formulas else [self.spreadsheet._evaluate(v) for v in cells])
+        while out and not any(out[-1]):
+            out.pop()
+        return [list(r) for r in out]
+
+    def _fingerprint(self, n_cols: int) -> str:
+        # =LET(r, A2:<n_cols열>, w, MOD(SEQUENCE(ROWS(r), COLUMNS(r)), 65521)+1, ...)를 그대로 계산
+        self._trim()
+        grid_rows = max(self.row_count, len(self.rows)) - 1
+        # 같은 내용이면 다시 계산하지 않는다 (10만 행에서 칸마다 도는 계산이 벤치마크 시간을 가리지 않게)
+        key = (n_cols, grid_rows, hash(tuple(tuple(r[:n_cols]) for r in self.rows)))
+        if self._fp_memo and self._fp_memo[0] == key:
+            return self._fp_memo[1]
+        total_len = first = middle = last = 0
+        for i, r in enumerate(self.rows[1:]):
+            for j in range(n_cols):
+                cell = r[j] if j < len(r) else ""
+                w = (i * n_cols + j + 1) % 65521 + 1
+                padded = cell + " "
+                total_len += len(cell) * w
+                first += ord(padded[0]) * w
+                middle += ord(padded[len(cell) // 2]) * w
+                last += ord((" " + cell)[-1]) * w
+        # 격자의 남은 빈 칸: LEN 0, 첫/가운데/마지막 글자는 모두 공백(32)
+        for idx in range(len(self.rows[1:]) * n_cols, grid_rows * n_cols):
+            w = (idx + 1) % 65521 + 1
+            first += 32 * w
+            middle += 32 * w
+            last += 32 * w
+        counta = sum(1 for r in self.rows if r and r[0] != "")
+        value = f"{counta}|{total_len}|{first}|{middle}|{last}"
+        self._fp_memo = (key, value)
+        return value
+
+    # -- gspread API ------------------------------------------------------
+    def get_all_values(self, **kwargs) -> list[list[str]]:
+        self._call("get_all_values")
+        self._trim()
+        width = max((len(r) for r in self.rows), default=0)
+        # 실제 API처럼 가장 긴 행 기준으로 채운 직사각형
+        return [[self.spreadsheet._evaluate(v) for v in r] + [""] * (width - len(r)) for r in self.rows]
+
+    def get(self, range_name: Optional[str] = None, value_render_option=None, **kwargs) -> list[list[str]]:
+        self._call("get")
+        return self._read(range_name or "A:ZZ", formulas=str(value_render_option).upper().endswith("FORMULA"))
+
+    def col_values(self, col: int, **kwargs) -> list[str]:
+        self._call("col_values")
+        self._trim()
+        out = [r[col - 1] if len(r) >= col else "" for r in self.rows]
+        while out and out[-1] == "":
+            out.pop()
+        return out
+
+    def update(self, values=None, range_name=None, **kwargs) -> dict:
+        self._call("update")
+        if isinstance(values, str):  # 예전 인자 순서 update("A1", rows)
+            values, range_name = range_name, values
+        row0, _, col0, _ = _parse_a1(range_name or "A1")
+        self._write(row0, col0, values)
+        return {}
+
+    def batch_update(self, data: Iterable[dict], **kwargs) -> dict:
+        self._call("batch_update")
+        for item in data:
+            row0, _, col0, _ = _parse_a1(item["range"])
+            self._write(row0, col0, item["values"])
+        return {}
+
+    def append_row(self, values, **kwargs) -> dict:
+        self._call("append_row")
+        self._trim()
+        self.rows.append([str(v) for v in values])
+        return {}
+
+    def append_rows(self, values, **kwargs) -> dict:
+        self._call("append_rows")
+        self._trim()
+        self.rows.extend([str(v) for v in row] for row in values)
+        return {}
+
+    def insert_row(self, values, index: int = 1, **kwargs) -> dict:
+        self._call("insert_row")
+        self.rows.insert(index - 1, [str(v) for v in values])
+        return {}
+
+    def delete_rows(self, start_index: int, end_index: Optional[int] = None) -> dict:
+        self._call("delete_rows")
+        end_index = end_index or start_index
+        del self.rows[start_index - 1 : end_index]
+        return {}
+
+    def clear(self) -> dict:
+        self._call("clear")
+        self.rows = []
+        return {}
+
+
+class FakeSpreadsheet:
+    """
+    latency: 호출마다 쉬는 초 (왕복 지연 흉내)
+    fail_next(n): 다음 n번의 호출이 429(RESOURCE_EXHAUSTED)로 실패
+    calls: 메서드별 호출 수 (Counter). reset_calls()로 비운다.
+    """
+
+    def __init__(self, *, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._sheets: dict[str, FakeWorksheet] = {}
+        self._fail_next = 0
+
+    def _call(self, op: str) -> None:
+        with self._lock:
+            self.calls[op] += 1
+            fail = self._fail_next > 0
+            if fail:
+                self._fail_next -= 1
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise FakeAPIError(429, "RESOURCE_EXHAUSTED: Quota exceeded for quota metric 'Read requests'")
+
+    def fail_next(self, n: int) -> None:
+        with self._lock:
+            self._fail_next += n
+
+    def reset_calls(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+    def _evaluate(self, value: str) -> str:
+        """
+        수식은 지문 수식(services.sheet_change.fingerprint_formula)만 지원하고, 시트와 같은 계산을 한다
+        (같은 가중치/글자 위치라 실제 시트에서 못 잡는 편집은 여기서도 못 잡는다). 다른 수식은 NotImplementedError.
+        """
+        if not value.startswith("="):
+            return value
+        m = _FINGERPRINT.match(value)
+        if not m:
+            raise NotImplementedError(f"unsupported formula: {value[:60]}")
+        target = self._sheets.get(m.group(1).replace("''", "'"))
+        if target is None:
+            return "#REF!"
+        return target._fingerprint(_col_index(m.group(2)) + 1)
+
+    # -- gspread API ------------------------------------------------------
+    def worksheet(self, title: str) -> FakeWorksheet:
+        self._call("worksheet")
+        ws = self._sheets.get(title)
+        if ws is None:
+            raise FakeAPIError(400, f"WorksheetNotFound: {title}")
+        return ws
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, **kwargs) -> FakeWorksheet:
+        self._call("add_worksheet")
+        ws = FakeWorksheet(self, title, len(self._sheets) + 1, row_count=rows)
+        self._sheets[title] = ws
+        return ws
+
+    def batch_update(self, body: dict) -> dict:
+        self._call("batch_update")
+        by_id = {ws.id: ws for ws in self._sheets.values()}
+        for req in body.get("requests", []):
+            if "updateCells" in req:
+                u = req["updateCells"]
+                rng = u["range"]
+                ws = by_id[rng["sheetId"]]
+                values = [[c.get("userEnteredValue", {}).get("stringValue", "") for c in row["values"]] for row in u["rows"]]
+                ws._write(rng.get("startRowIndex", 0), rng.get("startColumnIndex", 0), values)
+            elif "deleteDimension" in req:
+                rng = req["deleteDimension"]["range"]
+                del by_id[rng["sheetId"]].rows[rng["startIndex"] : rng["endIndex"]]
+            elif "appendCells" in req:
+                a = req["appendCells"]
+                ws = by_id[a["sheetId"]]
+                ws._trim()
+                ws.rows.extend(
+                    [c.get("userEnteredValue", {}).get("stringValue", "") for c in row["values"]] for row in a["rows"]
+                )
+            else:
+                raise NotImplementedError(next(iter(req)))
+        return {}
@@ -0,0 +1,121 @@
+"""
+app.py 콜드 스타트 import 시간 리포트.
+
+    python -m services.import_budget [--budget-ms 1500] [--top 15]
+
+새 인터프리터에서 app.py가 최상위에서 import하는 모듈을 `-X importtime`으로 불러와
+누적 시간이 큰 모듈을 보여준다. 전체 시간이 예산을 넘거나, 지연 로딩해야 하는 모듈
+(plotly, gspread, google-auth 등)이 시작 시점에 불려 오면 종료 코드 1로 끝난다.
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+
+DEFAULT_BUDGET_MS = 1500
+# 실제로 쓰는 시점(차트 그리기, 시트 접근, API 호출)에만 불러와야 하는 모듈
+LAZY_MODULES = ("plotly", "gspread", "google.oauth2", "google.auth", "meta_api")
+
+_ROOT = Path(__file__).resolve().parent.parent
+
+
+def app_imports(app_path: Path = _ROOT / "app.py") -> list[str]:
+    """app.py 모듈 최상위(try 블록 포함)의 import 대상. 함수 안 지연 import는 제외."""
+    tree = ast.parse(app_path.read_text(encoding="utf-8"))
+    names: list[str] = []
+
+    def visit(nodes) -> None:
+        for node in nodes:
+            if isinstance(node, ast.Import):
+                names.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                names.append(node.module)
+            elif isinstance(node, ast.Try):
+                visit(node.body)
+
+    visit(tree.body)
+    return list(dict.fromkeys(names))
+
+
+def measure(modules: list[str]) -> tuple[float, pd.DataFrame]:
+    """
+    새 프로세스에서 modules를 import. (전체 wall ms, 모듈별 표)를 반환.
+    표: module / depth / self_ms / cumulative_ms / root(그 모듈을 끌어온 최상위 import)
+    """
+    code = "\n".join(
+        ["import time", "_t0 = time.perf_counter()"]
+        + [f"import {m}" for m in modules]
+        + ["print((time.perf_counter() - _t0) * 1000)"]
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    wall_ms = float(proc.stdout.strip().splitlines()[-1])
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # 헤더 줄
+        name = name[1:]  # 구분자 뒤 공백 한 칸, 나머지 들여쓰기(2칸)가 중첩 깊이
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cum_us) / 1000,
+        })
+    df = pd.DataFrame(rows, columns=["module", "depth", "self_ms", "cumulative_ms"])
+    # importtime은 자식이 부모보다 먼저 찍힌다: 뒤에서 가장 가까운 depth 0 줄이 최상위 import
+    root = df["module"].where(df["depth"] == 0)
+    df["root"] = root.bfill().fillna(df["module"])
+    return wall_ms, df
+
+
+def report(budget_ms: float = DEFAULT_BUDGET_MS, top: int = 15) -> tuple[bool, str]:
+    modules = app_imports()
+    wall_ms, df = measure(modules)
+    # 외부 패키지가 스스로 불러오는 것(예: streamlit -> plotly)은 제외하고 이 저장소 코드만 본다
+    own = df["root"].str.startswith("services.")
+    lazy_hits = sorted(
+        f"{m} ({r})" for m, r in zip(df.loc[own, "module"], df.loc[own, "root"])
+        if any(m == lazy or m.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    )
+
+    lines = [f"app.py 최상위 import {len(modules)}개: {', '.join(modules)}", ""]
+    heaviest = df[df["depth"] == 0].sort_values("cumulative_ms", ascending=False).head(top)
+    lines.append(heaviest[["module", "self_ms", "cumulative_ms"]].to_string(index=False))
+    lines.append("")
+    lines.append(f"합계 {wall_ms:.0f}ms / 예산 {budget_ms:.0f}ms")
+    if lazy_hits:
+        lines.append(f"시작 시점에 불려 온 지연 로딩 대상: {', '.join(lazy_hits[:10])}")
+
+    ok = wall_ms <= budget_ms and not lazy_hits
+    lines.append("OK" if ok else "FAIL")
+    return ok, "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="app.py 콜드 스타트 import 시간 리포트")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+    ok, text = report(args.budget_ms, args.top)
+    print(text)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,18 +6,9 @@ from typing import Optional
 
 import pandas as pd
 
-try:
-    import streamlit as st
-except Exception:
-    st = None
-try:
-    import gspread
-except Exception:
-    gspread = None
-try:
-    from google.oauth2.service_account import Credentials
-except Exception:
-    Credentials = None
+from services.sheet_change import get_change_detector
+from services.sheet_frame import values_to_frame
+from services.sheets_client import get_sheets_connection, remember_sheet_error, sheets_config
 
 
 _COLUMNS = [
@@ -38,67 +29,95 @@ def _local_path() -> Path:
 
 
 def _get_sheet():
-    if st is None or gspread is None or Credentials is None:
-        return None
-    try:
-        cfg = st.secrets.get("google_sheets", {})
-        sa = st.secrets.get("google_sheets_service_account", {})
-    except Exception:
-        return None
-    sheet_id = cfg.get("sheet_id") or cfg.get("spreadsheet_id") or "1REfuppqzLN0Y3jmkPrDXKNm_btaA-qtlbaO2bx9MSh8"
-    worksheet = cfg.get("material_status_worksheet", "소재상태")
-    if not sheet_id or not sa:
-        return None
-
-    scopes = ["https://www.googleapis.com/auth/spreadsheets"]
-    creds = Credentials.from_service_account_info(dict(sa), scopes=scopes)
-    client = gspread.authorize(creds)
-    try:
-        ss = client.open_by_key(sheet_id)
-        try:
-            return ss.worksheet(worksheet)
-        except Exception:
-            return ss.add_worksheet(title=worksheet, rows=2000, cols=20)
-    except Exception as e:
-        try:
-            st.session_state["sheet_error"] = str(e)
-        except Exception:
-            pass
-        return None
-
-
-def _ensure_header(ws) -> None:
-    values = ws.get_all_values()
-    if not values:
-        ws.append_row(_COLUMNS)
-        return
-    if values[0] != _COLUMNS:
-        ws.clear()
-        ws.append_row(_COLUMNS)
-
-
-def _sheet_to_df(ws) -> pd.DataFrame:
-    values = ws.get_all_values()
-    if not values:
-        return pd.DataFrame(columns=_COLUMNS)
-    header = values[0]
-    data_rows = values[1:] if header == _COLUMNS else values
-    cleaned = []
-    for row in data_rows:
-        r = list(row)[:len(_COLUMNS)]
-        if len(r) < len(_COLUMNS):
-            r += [""] * (len(_COLUMNS) - len(r))
-        cleaned.append(r)
-    return pd.DataFrame(cleaned, columns=_COLUMNS)
+    # 인증/스프레드시트/워크시트 핸들은 프로세스 공유 연결에서 재사용
+    cfg, _ = sheets_config()
+    return get_sheets_connection().worksheet(cfg.get("material_status_worksheet", "소재상태"), create=True)
+
+
+def _values_to_df(values: list[list[str]]) -> pd.DataFrame:
+    # attrs["header_ok"]가 True면 시트 행 번호 = 인덱스 + 2. diff 저장이 위치 계산에 쓴다
+    return values_to_frame(values, _COLUMNS)
+
+
+def _cell_row(values: list[str]) -> dict:
+    return {"values": [{"userEnteredValue": {"stringValue": v}} for v in values]}
+
+
+def _diff_requests(
+    sheet_id: int, current: pd.DataFrame, work: pd.DataFrame, *, write_header: bool
+) -> tuple[list[dict], pd.DataFrame]:
+    """
+    current(시트의 마지막 상태) -> work로 바꾸는 batchUpdate 요청 목록과 적용 후 시트 상태.
+    (platform, campaign, adgroup, material_name) 키로 비교해 바뀐 행만 덮어쓰고,
+    없어진 행은 아래부터 지우고(중복 키의 나머지 행 포함), 새 행은 끝에 붙인다.
+    요청은 순서대로 적용되므로 수정 -> 삭제 -> 추가 순서를 지킨다.
+    """
+    width = len(_COLUMNS)
+    requests: list[dict] = []
+    if write_header:
+        requests.append({"updateCells": {
+            "range": {"sheetId": sheet_id, "startRowIndex": 0, "endRowIndex": 1, "startColumnIndex": 0, "endColumnIndex": width},
+            "rows": [_cell_row(_COLUMNS)],
+            "fields": "userEnteredValue",
+        }})
+
+    position: dict[tuple, int] = {}
+    stale: list[int] = []
+    current_rows = current.astype(str).values.tolist()
+    for i, row in enumerate(current_rows):
+        key = tuple(row[:4])
+        if key in position:
+            stale.append(i)
+        else:
+            position[key] = i
+
+    appends = []
+    after = {}
+    for row in work.values.tolist():
+        key = tuple(row[:4])
+        i = position.get(key)
+        if i is None:
+            appends.append(row)
+            continue
+        after[i] = row
+        if current_rows[i] != row:
+            requests.append({"updateCells": {
+                "range": {
+                    "sheetId": sheet_id, "startRowIndex": i + 1, "endRowIndex": i + 2,
+                    "startColumnIndex": 0, "endColumnIndex": width,
+                },
+                "rows": [_cell_row(row)],
+                "fields": "userEnteredValue",
+            }})
+
+    stale += [i for i in position.values() if i not in after]
+    for i in sorted(stale, reverse=True):
+        requests.append({"deleteDimension": {
+            "range": {"sheetId": sheet_id, "dimension": "ROWS", "startIndex": i + 1, "endIndex": i + 2},
+        }})
+    if appends:
+        requests.append({"appendCells": {
+            "sheetId": sheet_id,
+            "rows": [_cell_row(r) for r in appends],
+            "fields": "userEnteredValue",
+        }})
+    result = pd.DataFrame([after[i] for i in sorted(after)] + appends, columns=_COLUMNS)
+    result.attrs["header_ok"] = True
+    return requests, result
 
 
 def load_material_statuses() -> pd.DataFrame:
     ws = _get_sheet()
     if ws is not None:
         try:
-            _ensure_header(ws)
-            return _sheet_to_df(ws)
-        except Exception:
+            # 지문이 그대로면 전체를 받지 않고 지난번 파싱한 프레임을 쓴다
+            return get_change_detector().read(ws.title, ws, _values_to_df)
+        except Exception as e:
+            # 할당량 재시도까지 실패하면 빈 표 대신 마지막으로 받은 내용을 보여 준다
+            remember_sheet_error(e)
+            cached = get_change_detector().cached(ws.title)
+            if isinstance(cached, pd.DataFrame):
+                return cached.copy()
             return pd.DataFrame(columns=_COLUMNS)
 
     path = _local_path()
@@ -126,10 +145,23 @@ def save_material_statuses(df: pd.DataFrame) -> int:
     ws = _get_sheet()
     if ws is not None:
         try:
-            _ensure_header(ws)
-            rows = [_COLUMNS] + work.astype(str).values.tolist()
-            ws.clear()
-            ws.update("A1", rows)
+            work = work.astype(str)
+            detector = get_change_detector()
+            # 마지막으로 알던 시트 상태 (지문이 그대로면 다운로드 없이 캐시)
+            current = detector.read(ws.title, ws, _values_to_df)
+            header_ok = bool(current.attrs.get("header_ok"))
+            if work.duplicated(_COLUMNS[:4]).any() or (not header_ok and not current.empty):
+                # 키가 겹치는 입력이나 헤더 없는 옛 시트는 위치를 믿을 수 없어 통째로 다시 쓴다
+                ws.clear()
+                ws.update("A1", [_COLUMNS] + work.values.tolist())
+                detector.forget(ws.title)
+            else:
+                requests, after = _diff_requests(ws.id, current, work, write_header=not header_ok)
+                if requests:
+                    # 수정/삭제/추가를 한 번의 batchUpdate로 (시트가 잠시라도 비는 일이 없다)
+                    ws.spreadsheet.batch_update({"requests": requests})
+                    # 방금 쓴 결과를 다음 저장의 비교 기준으로 (지문도 새로 읽어 둔다)
+                    detector.store(ws.title, after)
             return len(work)
         except Exception:
             pass
@@ -0,0 +1,155 @@
+"""
+Meta 조회 경로 비교 벤치마크.
+
+    python -m services.meta_fetch_benchmark [--days 15] [--repeat 3] [--with-assets]
+
+A) 현재 파이프라인: /insights -> 상태 조회(ids 배치) [-> 소재 조회]
+B) ads 엣지 field expansion: 상태 + 일별 인사이트를 한 번에 (fetch_meta_via_ads_edge)
+
+경로별 소요 시간, HTTP 요청 수, 응답 크기와 두 결과 프레임의 일치 여부(행 수, 합계, 게재 상태)를 출력한다.
+실제 API를 호출하므로 ACCESS_TOKEN(.env 또는 Secrets)이 필요하다.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import sys
+import time
+from datetime import timedelta
+
+import pandas as pd
+
+from services.data_loader import fetch_meta_from_api, fetch_meta_via_ads_edge, get_meta_token
+from services.status_enrichment import enrich_delivery_status, meta_ad_ids
+from services.time_utils import kst_today
+
+
+_SUM_COLS = ["Cost", "Impressions", "Clicks", "Conversions", "Conversion_Value"]
+
+
+class _HttpCounter:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.bytes = 0
+
+
+@contextlib.contextmanager
+def _count_http():
+    """meta_api의 requests.get 호출 수/응답 바이트를 센다."""
+    import meta_api
+
+    counter = _HttpCounter()
+    original = meta_api.requests.get
+
+    def counted(*args, **kwargs):
+        resp = original(*args, **kwargs)
+        counter.requests += 1
+        counter.bytes += len(resp.content or b"")
+        return resp
+
+    meta_api.requests.get = counted
+    try:
+        yield counter
+    finally:
+        meta_api.requests.get = original
+
+
+def _run_pipeline(since: str, until: str, *, with_assets: bool) -> tuple[pd.DataFrame, dict]:
+    import meta_api
+
+    df = fetch_meta_from_api(since, until, False)
+    ad_ids = list(meta_ad_ids(df))
+    token = get_meta_token()
+    statuses = meta_api.fetch_ad_delivery_statuses(ad_ids, token=token)
+    if with_assets:
+        meta_api.clear_creative_video_memo()
+        meta_api.fetch_ad_video_assets(ad_ids, token=token)
+    return enrich_delivery_status(df, statuses), statuses
+
+
+def _run_ads_edge(since: str, until: str, stats: dict) -> tuple[pd.DataFrame, dict]:
+    stats.clear()
+    df, statuses = fetch_meta_via_ads_edge(since, until, stats=stats)
+    return enrich_delivery_status(df, statuses), statuses
+
+
+def _measure(label: str, fn, repeat: int) -> tuple[dict, pd.DataFrame]:
+    times = []
+    result = pd.DataFrame()
+    counter = _HttpCounter()
+    for _ in range(repeat):
+        with _count_http() as counter:
+            t0 = time.perf_counter()
+            result, _ = fn()
+            times.append(time.perf_counter() - t0)
+    row = {
+        "path": label,
+        "best_s": round(min(times), 2),
+        "median_s": round(float(pd.Series(times).median()), 2),
+        "http_requests": counter.requests,
+        "response_kb": round(counter.bytes / 1024, 1),
+        "rows": len(result),
+        "ads": len(meta_ad_ids(result)),
+    }
+    return row, result
+
+
+def compare_frames(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    """(Date, Ad_ID) 단위 지표 합계와 게재 상태 일치 여부."""
+    rows = []
+    if a.empty or b.empty:
+        return pd.DataFrame([{"check": "empty result", "pipeline": len(a), "ads_edge": len(b), "match": False}])
+    for col in _SUM_COLS:
+        if col in a.columns and col in b.columns:
+            sa, sb = float(a[col].sum()), float(b[col].sum())
+            rows.append({"check": f"sum {col}", "pipeline": sa, "ads_edge": sb, "match": abs(sa - sb) < 1e-6 * max(1.0, abs(sa))})
+
+    key = ["Date", "Ad_ID"]
+    merged = a.groupby(key)[["Cost"]].sum().join(b.groupby(key)[["Cost"]].sum(), how="outer", lsuffix="_a", rsuffix="_b")
+    missing = int(merged.isna().any(axis=1).sum())
+    rows.append({"check": "(date, ad) keys only in one side", "pipeline": missing, "ads_edge": missing, "match": missing == 0})
+
+    status_a = a.drop_duplicates("Ad_ID").set_index("Ad_ID")["Effective_Status"]
+    status_b = b.drop_duplicates("Ad_ID").set_index("Ad_ID")["Effective_Status"]
+    common = status_a.index.intersection(status_b.index)
+    agree = int((status_a.loc[common] == status_b.loc[common]).sum())
+    rows.append({"check": "Effective_Status agree", "pipeline": agree, "ads_edge": len(common), "match": agree == len(common)})
+    return pd.DataFrame(rows)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Meta 조회 경로 비교 벤치마크")
+    parser.add_argument("--days", type=int, default=15, help="오늘 포함 조회 일수")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--with-assets", action="store_true", help="A 경로에 소재(영상) 조회까지 포함")
+    args = parser.parse_args(argv)
+
+    if not get_meta_token():
+        print("ACCESS_TOKEN이 없습니다. .env 또는 Secrets를 확인하세요.")
+        return 2
+
+    today = kst_today()
+    since, until = (today - timedelta(days=args.days - 1)).isoformat(), today.isoformat()
+    print(f"기간 {since} ~ {until}, 반복 {args.repeat}회\n")
+
+    row_a, df_a = _measure(
+        "insights -> statuses" + (" -> assets" if args.with_assets else ""),
+        lambda: _run_pipeline(since, until, with_assets=args.with_assets),
+        args.repeat,
+    )
+    edge_stats: dict = {}
+    row_b, df_b = _measure("ads edge (nested)", lambda: _run_ads_edge(since, until, edge_stats), args.repeat)
+    print(pd.DataFrame([row_a, row_b]).to_string(index=False))
+    print()
+    checks = compare_frames(df_a, df_b)
+    # 잘린 결과끼리 비교하면 합계 차이가 경로 차이처럼 보이므로 따로 표시
+    truncated = bool(edge_stats.get("truncated"))
+    checks = pd.concat([checks, pd.DataFrame([{
+        "check": "ads edge truncated (page cap)", "pipeline": "", "ads_edge": edge_stats.get("ads", 0), "match": not truncated,
+    }])], ignore_index=True)
+    print(checks.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Optional
+
+import pandas as pd
+
+from services.sheets_client import get_sheets_connection
+
+
+# 워크시트별 지문(fingerprint) 수식을 두는 보조 워크시트
+META_WORKSHEET = "_sync_meta"
+# 지문이 같아도 이 간격이 지나면 한 번은 전체를 다시 받는다 (지문이 못 잡는 편집 대비).
+# 직접 쓴 뒤의 store()는 이 시계를 늦추지 않는다
+FULL_RELOAD_SECONDS = 600
+
+# title -> 현재 지문 문자열. 알 수 없으면 None (그때는 항상 변경된 것으로 본다)
+Probe = Callable[[str], Optional[str]]
+
+
+def fingerprint_formula(title: str, last_col: str = "I") -> str:
+    """
+    워크시트 내용이 바뀌면 값이 바뀌는 수식. 시트가 직접 다시 계산하므로 사람이 고친 것도 반영된다.
+    행 수 | 칸 길이 | 첫 글자 | 가운데 글자 | 마지막 글자 코드의 가중합.
+    가중치는 칸 위치(행, 열 모두)마다 다르므로 같은 행 안에서 값이 다른 열로 옮겨져도 잡고,
+    "2026-10-01" -> "2026-10-02"처럼 길이와 첫 글자가 같은 편집도 마지막/가운데 글자로 잡는다.
+    (가중치는 65521로 나눈 나머지라 10만 행 x 9열에서도 합이 배정밀도 정수 범위 안)
+    세 글자 밖에서만 바뀌는 편집은 FULL_RELOAD_SECONDS 주기의 전체 다시 받기가 잡는다.
+    """
+    quoted = "'" + title.replace("'", "''") + "'"
+    ref = f"{quoted}!A2:{last_col}"
+    return (
+        f"=LET(r,{ref},w,MOD(SEQUENCE(ROWS(r),COLUMNS(r)),65521)+1,"
+        f"COUNTA({quoted}!A:A)"
+        "&\"|\"&SUMPRODUCT(LEN(r)*w)"
+        "&\"|\"&SUMPRODUCT(IFERROR(UNICODE(r&\" \"),0)*w)"
+        "&\"|\"&SUMPRODUCT(IFERROR(UNICODE(MID(r&\" \",INT(LEN(r)/2)+1,1)),0)*w)"
+        "&\"|\"&SUMPRODUCT(IFERROR(UNICODE(RIGHT(\" \"&r)),0)*w))"
+    )
+
+
+class FormulaProbe:
+    """
+    META_WORKSHEET의 한 행(A: 워크시트 이름, B: 지문 수식)을 읽어 지문을 얻는다.
+    행 위치는 처음 한 번 찾고(없거나 수식이 다르면 써 넣고) 이후로는 B칸 하나만 읽는다.
+    get_meta_ws: 보조 워크시트 핸들을 돌려주는 함수 (없으면 None)
+    """
+
+    def __init__(self, get_meta_ws: Callable[[], object], *, last_col: str = "I") -> None:
+        self._get_meta_ws = get_meta_ws
+        self._last_col = last_col
+        self._lock = threading.Lock()
+        self._rows: dict[str, int] = {}
+
+    def _row_for(self, ws, title: str) -> int:
+        with self._lock:
+            row = self._rows.get(title)
+            if row is not None:
+                return row
+            # 수식 그대로 읽어, 예전 버전 지문 수식이 남아 있으면 지금 수식으로 바꿔 쓴다
+            cells = ws.get("A:B", value_render_option="FORMULA") or []
+            titles = [r[0] if r else "" for r in cells]
+            formula = fingerprint_formula(title, self._last_col)
+            if title in titles:
+                row = titles.index(title) + 1
+                current = cells[row - 1][1] if len(cells[row - 1]) > 1 else ""
+            else:
+                row = len(titles) + 1
+                current = None
+            if current != formula:
+                ws.update(
+                    range_name=f"A{row}:B{row}",
+                    values=[[title, formula]],
+                    value_input_option="USER_ENTERED",
+                )
+            self._rows[title] = row
+            return row
+
+    def __call__(self, title: str) -> Optional[str]:
+        try:
+            ws = self._get_meta_ws()
+            if ws is None:
+                return None
+            row = self._row_for(ws, title)
+            values = ws.get(f"B{row}")
+            return str(values[0][0]) if values and values[0] else None
+        except Exception:
+            # 지문을 못 얻으면 전체를 받는 예전 동작으로 돌아간다
+            return None
+
+
+class SheetChangeDetector:
+    """
+    워크시트를 통째로 받기 전에 지문만 확인해, 마지막으로 받은 뒤 바뀌지 않았으면 다운로드를 건너뛴다.
+    파싱한 결과도 함께 캐시해 read()는 변경이 없으면 저장해 둔 프레임을 그대로 돌려준다.
+    """
+
+    def __init__(self, probe: Probe, *, full_reload: float = FULL_RELOAD_SECONDS) -> None:
+        self._probe = probe
+        self.full_reload = full_reload
+        self._lock = threading.Lock()
+        # title -> (지문, 받은 시각, 파싱 결과)
+        self._seen: dict[str, tuple[Optional[str], float, object]] = {}
+        self.stats = {"checks": 0, "skipped": 0, "downloads": 0}
+
+    def check(self, title: str) -> tuple[bool, Optional[str]]:
+        """(다시 받아야 하는지, 방금 읽은 지문). 받은 뒤에는 지문을 commit()에 넘긴다."""
+        fp = self._probe(title)
+        with self._lock:
+            self.stats["checks"] += 1
+            seen = self._seen.get(title)
+            fresh = (
+                fp is not None
+                and seen is not None
+                and seen[0] == fp
+                and time.time() - seen[1] < self.full_reload
+            )
+            if fresh:
+                self.stats["skipped"] += 1
+        return not fresh, fp
+
+    def commit(self, title: str, fp: Optional[str], parsed: object = None) -> None:
+        """check() 때 읽은 지문으로 받은 내용을 기록 (받는 도중 바뀐 것은 다음 check에서 잡힌다)."""
+        with self._lock:
+            self.stats["downloads"] += 1
+            self._seen[title] = (fp, time.time(), parsed)
+
+    def store(self, title: str, parsed: object) -> None:
+        """
+        직접 시트에 쓴 뒤 그 결과를 기록. 지문은 쓰고 난 뒤의 값을 새로 읽는다.
+        받은 시각은 마지막 전체 다운로드 그대로 둔다 (자주 저장해도 주기적 전체 다시 받기가 밀리지 않게).
+        """
+        fp = self._probe(title)
+        with self._lock:
+            seen = self._seen.get(title)
+            self._seen[title] = (fp, seen[1] if seen else time.time(), parsed)
+
+    def cached(self, title: str) -> object:
+        with self._lock:
+            seen = self._seen.get(title)
+        return seen[2] if seen else None
+
+    def read(self, title: str, ws, parse: Callable[[list[list[str]]], pd.DataFrame]) -> pd.DataFrame:
+        """지문이 그대로면 캐시한 프레임, 바뀌었으면 get_all_values()로 받아 parse한 프레임 (복사본)."""
+        changed, fp = self.check(title)
+        cached = self.cached(title)
+        if not changed and isinstance(cached, pd.DataFrame):
+            return cached.copy()
+        df = parse(ws.get_all_values())
+        self.commit(title, fp, df)
+        return df.copy()
+
+    def forget(self, title: Optional[str] = None) -> None:
+        """직접 시트를 고친 뒤 등: 다음 조회는 무조건 전체를 받는다."""
+        with self._lock:
+            if title is None:
+                self._seen.clear()
+            else:
+                self._seen.pop(title, None)
+
+
+def _meta_worksheet():
+    return get_sheets_connection().worksheet(META_WORKSHEET, create=True)
+
+
+_detector = SheetChangeDetector(FormulaProbe(_meta_worksheet))
+
+
+def get_change_detector() -> SheetChangeDetector:
+    return _detector
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def values_to_frame(
+    values: list[list[str]],
+    columns: Sequence[str],
+    *,
+    parse_dates: Iterable[str] = (),
+) -> pd.DataFrame:
+    """
+    get_all_values() 결과 -> columns 고정 프레임.
+    첫 행이 columns와 같으면 헤더로 보고 빼고, 다르면 모두 데이터로 본다.
+    칸 수가 모자란 행은 ""로 채우고 넘치는 칸은 버린다 (행 단위 루프 없이 한 번에).
+    parse_dates: datetime64로 바꿀 컬럼 (못 읽는 값은 NaT)
+    attrs["header_ok"]: 헤더가 있었는지 (시트 행 번호 = 인덱스 + 2)
+    """
+    columns = list(columns)
+    header_ok = bool(values) and list(values[0]) == columns
+    data = values[1:] if header_ok else values
+    if data:
+        # 길이가 다른 행은 DataFrame 생성 시 None으로 채워진다
+        df = pd.DataFrame(data)
+        df = df.iloc[:, : len(columns)].reindex(columns=range(len(columns)))
+        df.columns = columns
+        df = df.fillna("").astype(str)
+    else:
+        df = pd.DataFrame({c: pd.Series(dtype=str) for c in columns})
+    for col in parse_dates:
+        df[col] = pd.to_datetime(df[col].where(df[col] != ""), errors="coerce")
+    df.attrs["header_ok"] = header_ok
+    return df
+
+
+def fill_creative_key(df: pd.DataFrame) -> pd.DataFrame:
+    """creative_key가 비어 있으면 creative_id, 그것도 없으면 "campaign|adgroup" (컬럼 단위)."""
+    key = df["creative_key"].str.strip()
+    cid = df["creative_id"].str.strip()
+    fallback = df["campaign"].str.strip() + "|" + df["adgroup"].str.strip()
+    df["creative_key"] = np.where(key != "", df["creative_key"], np.where(cid != "", cid, fallback))
+    return df
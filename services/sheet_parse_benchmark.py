@@ -0,0 +1,119 @@
+"""
+시트 파싱 벤치마크 (네트워크 없음).
+
+    python -m services.sheet_parse_benchmark [--rows 50000] [--repeat 5]
+
+합성한 get_all_values() 결과(길이가 제각각인 행, 빈 creative_key 포함)로
+A) 예전 방식: 행 단위 pad/truncate + iterrows/df.at으로 creative_key 채우기
+B) values_to_frame + fill_creative_key (컬럼 단위)
+C) B + action_date를 datetime으로 (parse_dates)
+를 비교하고 A/B 결과가 같은지 확인한다.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from services.action_mirror import COLUMNS
+from services.sheet_frame import fill_creative_key, values_to_frame
+
+
+def synthetic_values(rows: int, *, seed: int = 0) -> list[list[str]]:
+    """헤더 + rows행. 일부 행은 칸이 모자라거나 넘치고, 일부는 creative_key/creative_id가 비어 있다."""
+    rng = np.random.default_rng(seed)
+    actions = ["증액", "보류", "종료", "유지"]
+    values = [list(COLUMNS)]
+    for i in range(rows):
+        key_mode = rng.integers(0, 10)
+        creative_id = "" if key_mode == 0 else f"cr{i % 5000}"
+        creative_key = "" if key_mode <= 2 else creative_id
+        row = [
+            f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            creative_id,
+            creative_key,
+            f"Camp{i % 40}",
+            f"AG{i % 300}",
+            actions[i % 4],
+            "메모" * int(rng.integers(0, 4)),
+            "",
+            f"2026-10-01 {i % 24:02d}:00:00",
+        ]
+        cut = rng.integers(0, 20)
+        if cut == 0:
+            row = row[: int(rng.integers(3, 8))]  # 뒤쪽 빈 칸이 잘린 행
+        elif cut == 1:
+            row = row + ["", "extra"]  # 시트 오른쪽에 남은 값
+        values.append(row)
+    return values
+
+
+def legacy_parse(values: list[list[str]]) -> pd.DataFrame:
+    """예전 action_store의 _sheet_to_df + load_actions의 creative_key 보정."""
+    header = values[0]
+    data_rows = values if header != COLUMNS else values[1:]
+    cleaned = []
+    for row in data_rows:
+        r = list(row)[: len(COLUMNS)]
+        if len(r) < len(COLUMNS):
+            r += [""] * (len(COLUMNS) - len(r))
+        cleaned.append(r)
+    df = pd.DataFrame(cleaned, columns=COLUMNS)
+    for i, row in df.iterrows():
+        if not str(row.get("creative_key", "")).strip():
+            cid = str(row.get("creative_id", "")).strip()
+            camp = str(row.get("campaign", "")).strip()
+            adg = str(row.get("adgroup", "")).strip()
+            df.at[i, "creative_key"] = cid if cid else f"{camp}|{adg}"
+    return df
+
+
+def vectorized_parse(values: list[list[str]]) -> pd.DataFrame:
+    return fill_creative_key(values_to_frame(values, COLUMNS))
+
+
+def typed_parse(values: list[list[str]]) -> pd.DataFrame:
+    return fill_creative_key(values_to_frame(values, COLUMNS, parse_dates=["action_date"]))
+
+
+def _best(fn, values, repeat: int) -> tuple[float, pd.DataFrame]:
+    times = []
+    result = pd.DataFrame()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(values)
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="시트 파싱 벤치마크")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    values = synthetic_values(args.rows)
+    # 예전 방식은 느려서 반복을 줄인다
+    t_legacy, df_legacy = _best(legacy_parse, values, max(1, min(args.repeat, 2)))
+    t_vec, df_vec = _best(vectorized_parse, values, args.repeat)
+    t_typed, df_typed = _best(typed_parse, values, args.repeat)
+
+    rows = [
+        {"path": "legacy (loop + iterrows)", "best_ms": round(t_legacy * 1000, 1), "speedup": 1.0},
+        {"path": "values_to_frame + fill_creative_key", "best_ms": round(t_vec * 1000, 1), "speedup": round(t_legacy / t_vec, 1)},
+        {"path": "  + parse_dates(action_date)", "best_ms": round(t_typed * 1000, 1), "speedup": round(t_legacy / t_typed, 1)},
+    ]
+    print(f"{args.rows:,}행, 반복 {args.repeat}회\n")
+    print(pd.DataFrame(rows).to_string(index=False))
+
+    same = df_legacy.astype(str).reset_index(drop=True).equals(df_vec.astype(str).reset_index(drop=True))
+    print(f"\n결과 일치 (legacy vs vectorized): {same}")
+    print(f"action_date dtype (typed): {df_typed['action_date'].dtype}, NaT {int(df_typed['action_date'].isna().sum())}")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+import pandas as pd
+
+from services.sheets_quota import SheetsCallScheduler
+
+try:
+    import streamlit as st
+except Exception:
+    st = None
+
+
+DEFAULT_SHEET_ID = "1REfuppqzLN0Y3jmkPrDXKNm_btaA-qtlbaO2bx9MSh8"
+_SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
+# 토큰 만료가 이만큼 남았으면 요청 전에 미리 갱신
+_TOKEN_REFRESH_LEAD_SECONDS = 300
+
+
+def _sheets_client_deps():
+    """gspread/google-auth는 무거워서 시트 설정이 있을 때만 불러온다."""
+    try:
+        import gspread
+        from google.oauth2.service_account import Credentials
+    except Exception:
+        return None, None
+    return gspread, Credentials
+
+
+def sheets_config() -> tuple[dict, dict]:
+    """(google_sheets 설정, 서비스 계정 정보). Secrets가 없으면 빈 dict."""
+    if st is None:
+        return {}, {}
+    try:
+        cfg = st.secrets.get("google_sheets", {})
+        sa = st.secrets.get("google_sheets_service_account", {})
+    except Exception:
+        return {}, {}
+    return dict(cfg or {}), dict(sa or {})
+
+
+def remember_sheet_error(e: BaseException) -> None:
+    """시트 오류를 화면에 보여 주도록 session_state["sheet_error"]에 남긴다 (세션 밖이면 무시)."""
+    if st is None:
+        return
+    try:
+        st.session_state["sheet_error"] = str(e)
+    except Exception:
+        pass
+
+
+def _is_auth_error(e: BaseException) -> bool:
+    code = getattr(e, "code", None)
+    if code in (401, 403) and "PERMISSION_DENIED" not in str(e):
+        return True
+    text = str(e)
+    return "UNAUTHENTICATED" in text or "invalid_grant" in text
+
+
+class _TimedWorksheet:
+    """
+    gspread Worksheet 래퍼. 메서드 호출마다 횟수/시간을 연결 관리자에 기록하고,
+    인증 오류가 나면 클라이언트를 새로 만들어 한 번만 다시 시도한다.
+    """
+
+    def __init__(self, pool: "SheetsConnection", title: str, ws) -> None:
+        self._pool = pool
+        self._title = title
+        self._ws = ws
+
+    @property
+    def title(self) -> str:
+        return self._title
+
+    @property
+    def spreadsheet(self) -> "_TimedSpreadsheet":
+        # ws.spreadsheet.batch_update(...)도 같은 할당량/통계를 거치게
+        return _TimedSpreadsheet(self._pool, self._ws.spreadsheet)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._ws, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            try:
+                return self._pool._timed(name, getattr(self._ws, name), *args, **kwargs)
+            except Exception as e:
+                if not _is_auth_error(e):
+                    raise
+                self._pool.reset()
+                fresh = self._pool._open_worksheet(self._title, create=False)
+                if fresh is None:
+                    raise
+                self._ws = fresh
+                return self._pool._timed(name, getattr(self._ws, name), *args, **kwargs)
+
+        return call
+
+
+class _TimedSpreadsheet:
+    """gspread Spreadsheet 래퍼. 호출은 "spreadsheet.<메서드>"로 기록된다."""
+
+    def __init__(self, pool: "SheetsConnection", spreadsheet) -> None:
+        self._pool = pool
+        self._spreadsheet = spreadsheet
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._spreadsheet, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self._pool._timed(f"spreadsheet.{name}", attr, *args, **kwargs)
+
+        return call
+
+
+class SheetsConnection:
+    """
+    프로세스 전체가 공유하는 Google Sheets 연결.
+    인증 클라이언트, 스프레드시트, 워크시트 핸들을 한 번만 만들어 재사용하고
+    (호출마다 인증 + open_by_key + worksheet 조회로 몇 번씩 왕복하던 것을 없앤다)
+    Secrets의 시트/서비스 계정이 바뀌면 새로 연결한다. 호출 수/지연 시간을 stats()로 보여준다.
+    모든 호출은 scheduler(할당량 토큰 버킷 + 429 백오프 재시도)를 거친다.
+    """
+
+    def __init__(self) -> None:
+        # _lock: 상태(핸들 캐시, 통계)만 지킨다. 네트워크/할당량 대기 중에는 잡지 않는다
+        self._lock = threading.RLock()
+        # _open_lock: 인증/스프레드시트·워크시트 열기를 한 스레드만 하게 (같은 것을 여러 번 열지 않도록)
+        self._open_lock = threading.RLock()
+        self._key: Optional[tuple[str, str]] = None
+        self._creds = None
+        self._client = None
+        self._spreadsheet = None
+        self._worksheets: dict[str, _TimedWorksheet] = {}
+        self._stats: dict[str, dict[str, float]] = {}
+        self._installed = None
+        self.scheduler = SheetsCallScheduler()
+
+    def _bump(self, op: str, ms: float, *, wait_ms: float = 0.0, error: bool = False) -> None:
+        with self._lock:
+            stat = self._stats.setdefault(
+                op, {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "wait_ms": 0.0}
+            )
+            stat["calls"] += 1
+            stat["errors"] += int(error)
+            stat["total_ms"] += ms
+            stat["max_ms"] = max(stat["max_ms"], ms)
+            stat["wait_ms"] += wait_ms
+
+    def _timed(self, op: str, fn, *args, **kwargs):
+        # 시도마다 기록: 지연은 할당량 대기(토큰, 429 백오프)를 뺀 실제 호출 시간, 대기는 wait_ms에 따로 모은다
+        started = [time.perf_counter()]
+
+        def on_attempt(waited: float, error: Optional[BaseException]) -> None:
+            now = time.perf_counter()
+            self._bump(op, (now - started[0] - waited) * 1000, wait_ms=waited * 1000, error=error is not None)
+            started[0] = now
+
+        return self.scheduler.call(op, fn, *args, on_attempt=on_attempt, **kwargs)
+
+    @staticmethod
+    def _token_fresh(creds) -> bool:
+        expiry = getattr(creds, "expiry", None)  # google-auth는 naive UTC
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        expiring = expiry is not None and (expiry - now).total_seconds() < _TOKEN_REFRESH_LEAD_SECONDS
+        return bool(creds.valid) and not expiring
+
+    def _refresh_token_if_needed(self, creds) -> None:
+        if creds is None or self._token_fresh(creds):
+            return
+        from google.auth.transport.requests import Request
+
+        self._timed("token_refresh", creds.refresh, Request())
+
+    def install(self, spreadsheet) -> None:
+        """
+        Secrets/인증 대신 주어진 스프레드시트 객체를 쓴다 (services.fake_sheets 등, 벤치마크용).
+        None을 넘기면 원래대로 Secrets 기준 연결로 돌아간다.
+        """
+        with self._lock:
+            self.reset()
+            self._installed = spreadsheet
+            self._stats.clear()
+
+    def _connect(self):
+        """현재 Secrets 기준 스프레드시트 핸들 (필요할 때만 새로 인증/열기). 설정이 없으면 None."""
+        if self._installed is not None:
+            return self._installed
+        cfg, sa = sheets_config()
+        sheet_id = cfg.get("sheet_id") or cfg.get("spreadsheet_id") or DEFAULT_SHEET_ID
+        if not sheet_id or not sa:
+            return None
+        gspread, Credentials = _sheets_client_deps()
+        if gspread is None or Credentials is None:
+            return None
+
+        key = (sheet_id, str(sa.get("client_email", "")))
+        with self._lock:
+            cached = self._spreadsheet if self._key == key and self._creds is not None else None
+            if cached is not None and self._token_fresh(self._creds):
+                return cached
+
+        # 인증/열기는 상태 잠금 밖에서 (할당량 대기나 429 백오프 동안 다른 스레드의 통계/캐시 조회를 막지 않게)
+        with self._open_lock:
+            with self._lock:
+                if self._key != key:
+                    self.reset()
+                creds, client, spreadsheet = self._creds, self._client, self._spreadsheet
+            if client is None:
+                creds = Credentials.from_service_account_info(sa, scopes=_SCOPES)
+                client = self._timed("authorize", gspread.authorize, creds)
+            self._refresh_token_if_needed(creds)
+            if spreadsheet is None:
+                spreadsheet = self._timed("open_by_key", client.open_by_key, sheet_id)
+            with self._lock:
+                self._key, self._creds, self._client, self._spreadsheet = key, creds, client, spreadsheet
+            return spreadsheet
+
+    def _open_worksheet(self, title: str, *, create: bool):
+        ss = self._connect()
+        if ss is None:
+            return None
+        try:
+            return self._timed("worksheet", ss.worksheet, title)
+        except Exception:
+            if not create:
+                raise
+            return self._timed("add_worksheet", ss.add_worksheet, title=title, rows=2000, cols=20)
+
+    def worksheet(self, title: str, *, create: bool = False) -> Optional[_TimedWorksheet]:
+        """
+        title 워크시트 핸들 (캐시). 시트 설정이 없으면 None.
+        create=True면 없는 워크시트를 만든다. 열기 실패는 session_state["sheet_error"]에 남기고 None.
+        """
+        try:
+            # 캐시가 있으면 네트워크 없이 끝난다 (설정 변경 시 reset, 만료 임박 시 토큰 갱신만)
+            if self._connect() is None:
+                return None
+            with self._lock:
+                handle = self._worksheets.get(title)
+            if handle is not None:
+                return handle
+            with self._open_lock:
+                # 기다리는 동안 다른 스레드가 열었으면 그것을 쓴다
+                with self._lock:
+                    handle = self._worksheets.get(title)
+                if handle is None:
+                    handle = _TimedWorksheet(self, title, self._open_worksheet(title, create=create))
+                    with self._lock:
+                        self._worksheets[title] = handle
+            return handle
+        except Exception as e:
+            remember_sheet_error(e)
+            return None
+
+    def reset(self) -> None:
+        """클라이언트/핸들을 모두 버린다. 다음 호출에서 다시 인증한다."""
+        with self._lock:
+            self._key = None
+            self._creds = None
+            self._client = None
+            self._spreadsheet = None
+            self._worksheets.clear()
+
+    def stats(self) -> pd.DataFrame:
+        """작업별 호출 수(재시도 포함)/오류 수/평균·최대 지연(ms)/할당량 대기 합계(ms)."""
+        with self._lock:
+            rows = [
+                {
+                    "op": op,
+                    "calls": int(s["calls"]),
+                    "errors": int(s["errors"]),
+                    "avg_ms": round(s["total_ms"] / s["calls"], 1) if s["calls"] else 0.0,
+                    "max_ms": round(s["max_ms"], 1),
+                    "wait_ms": round(s["wait_ms"], 1),
+                }
+                for op, s in self._stats.items()
+            ]
+        return pd.DataFrame(rows, columns=["op", "calls", "errors", "avg_ms", "max_ms", "wait_ms"])
+
+
+_connection = SheetsConnection()
+
+
+def get_sheets_connection() -> SheetsConnection:
+    return _connection
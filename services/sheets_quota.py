@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Optional
+
+from services.write_behind import is_quota_error
+
+
+# Sheets API 기본 할당량: 읽기/쓰기 각각 사용자(서비스 계정)당 분당 60회
+READ_PER_MINUTE = 60
+WRITE_PER_MINUTE = 60
+# 한 번에 몰아 쓸 수 있는 호출 수. 나머지는 (분당 한도 - BURST)/60초 속도로 채워
+# 어느 60초 구간에서도 한도를 넘지 않는다
+BURST = 10
+# 429를 받으면 1, 2, 4초 (+지터) 쉬고 다시 시도, 그래도 안 되면 예외를 올린다
+MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 16.0
+
+# 인증처럼 Sheets API 할당량과 상관없는 호출
+_UNMETERED = frozenset({"authorize", "token_refresh"})
+_READ_OPS = frozenset({
+    "get", "get_all_values", "get_all_records", "get_values", "batch_get", "col_values", "row_values",
+    "acell", "cell", "worksheet", "worksheets", "open_by_key", "fetch_sheet_metadata",
+})
+
+
+class TokenBucket:
+    """분당 rate_per_minute 한도를 burst 여유와 함께 지키는 토큰 버킷 (스레드 안전)."""
+
+    def __init__(self, rate_per_minute: float, burst: int) -> None:
+        self.burst = max(1, int(burst))
+        self._per_second = max(rate_per_minute - self.burst, 1) / 60.0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self._per_second)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """토큰 하나를 쓴다. 없으면 생길 때까지 기다리고, 기다린 초를 돌려준다."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self._per_second
+            time.sleep(delay)
+            waited += delay
+
+    def drain(self) -> None:
+        """429를 받았을 때: 남은 토큰을 버려 다른 스레드도 같이 속도를 늦춘다."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0)
+
+
+class SheetsCallScheduler:
+    """
+    모든 gspread 호출이 지나가는 관문. 읽기/쓰기 토큰 버킷으로 분당 할당량 안에서 호출 속도를 맞추고,
+    그래도 429(RESOURCE_EXHAUSTED)를 받으면 지수 백오프로 max_retries번까지 다시 시도한다.
+    할당량은 프로세스마다 따로 센다 (여러 프로세스가 같은 서비스 계정을 쓰면 한도를 나눠 설정).
+    """
+
+    def __init__(
+        self,
+        *,
+        read_per_minute: float = READ_PER_MINUTE,
+        write_per_minute: float = WRITE_PER_MINUTE,
+        burst: int = BURST,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE_SECONDS,
+        backoff_max: float = BACKOFF_MAX_SECONDS,
+    ) -> None:
+        self._buckets = {
+            "read": TokenBucket(read_per_minute, burst),
+            "write": TokenBucket(write_per_minute, burst),
+        }
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    @staticmethod
+    def kind(op: str) -> Optional[str]:
+        """"read" / "write" / None(할당량 밖). op는 gspread 메서드 이름 ("spreadsheet." 접두어 허용)."""
+        name = op.rsplit(".", 1)[-1]
+        if name in _UNMETERED:
+            return None
+        return "read" if name in _READ_OPS else "write"
+
+    def backoff(self, attempt: int) -> float:
+        """attempt번째(0부터) 재시도 전 쉴 초: base * 2^attempt + 지터, backoff_max까지."""
+        return min(self.backoff_max, self.backoff_base * 2 ** attempt + random.uniform(0, 1) * self.backoff_base)
+
+    def call(self, op: str, fn, *args, on_attempt=None, **kwargs):
+        """
+        fn(*args, **kwargs)를 할당량에 맞춰 실행. 429면 쉬었다가 다시, 다른 오류는 그대로 올린다.
+        on_attempt(waited_seconds, error_or_None): 시도마다 호출 (통계용). 대기에는 토큰 대기와 직전 백오프가 들어간다
+        """
+        bucket = self._buckets.get(self.kind(op) or "")
+        attempt = 0
+        pause = 0.0
+        while True:
+            waited = pause + (bucket.acquire() if bucket is not None else 0.0)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if on_attempt is not None:
+                    on_attempt(waited, e)
+                if bucket is None or not is_quota_error(e) or attempt >= self.max_retries:
+                    raise
+                bucket.drain()
+                pause = self.backoff(attempt)
+                time.sleep(pause)
+                attempt += 1
+                continue
+            if on_attempt is not None:
+                on_attempt(waited, None)
+            return result
@@ -0,0 +1,221 @@
+"""
+Sheets 저장소 벤치마크 (fake_sheets 사용, 네트워크/계정 불필요).
+
+    python -m services.sheets_store_benchmark [--sizes 1000,10000,100000] [--latency 0.0]
+
+시트 크기별로 action_store/material_status_store의 조회/저장/삭제 시간과 작업당 API 호출 수를 잰다.
+호출 수가 CALL_BUDGET을 넘으면 OVER로 표시하고 종료 코드 1 (호출 수 회귀 확인용).
+--latency를 주면 호출마다 그만큼 쉬어 실제 왕복 지연이 시간에 어떻게 반영되는지 볼 수 있다.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from services.action_mirror import COLUMNS as ACTION_COLUMNS
+from services.fake_sheets import FakeSpreadsheet
+from services.sheets_client import get_sheets_connection
+from services.sheets_quota import MAX_RETRIES, SheetsCallScheduler
+
+
+ACTIONS_TITLE = "광고성과관리"
+MATERIAL_TITLE = "소재상태"
+
+# 작업별 허용 API 호출 수 (지문 보조 시트를 처음 만드는 호출 포함)
+CALL_BUDGET = {
+    "actions.load (cold)": 7,
+    "actions.load (unchanged)": 1,
+    "actions.upsert": 0,
+    "actions.flush (append)": 2,
+    "actions.flush (update)": 2,
+    "actions.delete": 0,
+    "actions.flush (delete)": 2,
+    "actions.load (after own writes)": 2,
+    "actions.flush (429 -> retry)": 3,
+    "material.load (quota exhausted -> cached)": 2 * (MAX_RETRIES + 1),
+    "material.save (initial)": 8,
+    "material.save (1 row changed)": 3,
+    "material.load (unchanged)": 1,
+    "material.load (same-length edit)": 2,
+    "actions.load (values swapped between columns)": 2,
+}
+
+
+@contextlib.contextmanager
+def isolated_stores(spreadsheet: FakeSpreadsheet, data_dir: Path):
+    """store 모듈의 프로세스 전역 상태(로컬 사본, 메모리 표, 지문, 시트 연결)를 임시로 바꿔 끼운다."""
+    import services.action_mirror as action_mirror
+    import services.action_store as action_store
+    import services.sheet_change as sheet_change
+
+    connection = get_sheets_connection()
+    saved = (action_mirror._mirror, action_store._table, sheet_change._detector, action_store._write_behind.interval)
+    saved_scheduler = connection.scheduler
+    action_mirror._mirror = action_mirror.ActionMirror(data_dir / "creative_actions.db")
+    action_store._table = action_store._ActionTable()
+    sheet_change._detector = sheet_change.SheetChangeDetector(sheet_change.FormulaProbe(sheet_change._meta_worksheet))
+    # 반영은 벤치마크가 직접 부른다 (백그라운드 스레드가 끼어들지 않게)
+    action_store._write_behind.interval = 3600
+    # 호출 수를 재는 것이 목적이므로 할당량 대기는 없애고, 429 백오프만 짧게 남긴다
+    connection.scheduler = SheetsCallScheduler(read_per_minute=1e9, write_per_minute=1e9, backoff_base=0.01)
+    connection.install(spreadsheet)
+    try:
+        yield action_store
+    finally:
+        connection.install(None)
+        connection.scheduler = saved_scheduler
+        action_mirror._mirror.close()
+        (
+            action_mirror._mirror,
+            action_store._table,
+            sheet_change._detector,
+            action_store._write_behind.interval,
+        ) = saved
+
+
+def _seed_actions(spreadsheet: FakeSpreadsheet, rows: int) -> None:
+    ws = spreadsheet.add_worksheet(ACTIONS_TITLE)
+    ws.rows = [list(ACTION_COLUMNS)] + [
+        [f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}", f"cr{i}", f"cr{i}", f"Camp{i % 40}", f"AG{i % 300}",
+         "유지", "", "", "2026-10-01 09:00:00"]
+        for i in range(rows)
+    ]
+
+
+def _material_frame(rows: int) -> pd.DataFrame:
+    from services.material_status_store import _COLUMNS
+
+    return pd.DataFrame(
+        [["Meta", f"Camp{i % 40}", f"AG{i % 300}", f"material_{i}", "ON", "2026-10-01", ""] for i in range(rows)],
+        columns=_COLUMNS,
+    )
+
+
+class _Recorder:
+    def __init__(self, spreadsheet: FakeSpreadsheet, size: int) -> None:
+        self.spreadsheet = spreadsheet
+        self.size = size
+        self.rows: list[dict] = []
+
+    def run(self, op: str, fn):
+        self.spreadsheet.reset_calls()
+        t0 = time.perf_counter()
+        result = fn()
+        ms = (time.perf_counter() - t0) * 1000
+        calls = dict(self.spreadsheet.calls)
+        total = sum(calls.values())
+        budget = CALL_BUDGET.get(op)
+        self.rows.append({
+            "rows": self.size,
+            "op": op,
+            "ms": round(ms, 1),
+            "api_calls": total,
+            "budget": budget,
+            "check": "" if budget is None else ("OK" if total <= budget else "OVER"),
+            "detail": ", ".join(f"{k}={v}" for k, v in sorted(calls.items())),
+        })
+        return result
+
+
+def run_size(size: int, *, latency: float) -> list[dict]:
+    from services.material_status_store import load_material_statuses, save_material_statuses
+
+    spreadsheet = FakeSpreadsheet()
+    _seed_actions(spreadsheet, size)
+    spreadsheet.latency = latency
+    rec = _Recorder(spreadsheet, size)
+
+    with tempfile.TemporaryDirectory() as tmp, isolated_stores(spreadsheet, Path(tmp)) as store:
+        mirror = store.get_action_mirror()
+        rec.run("actions.load (cold)", store.load_actions)
+        mirror.mark_stale()
+        rec.run("actions.load (unchanged)", store.load_actions)
+
+        new_row = dict(action_date="2026-10-18", creative_id="new", creative_key="new",
+                       campaign="CampX", adgroup="AGX", action="증액", note="", author="")
+        rec.run("actions.upsert", lambda: store.upsert_action(**new_row))
+        rec.run("actions.flush (append)", store._flush_actions)
+        rec.run("actions.upsert", lambda: store.upsert_action(**{**new_row, "creative_id": "cr5", "creative_key": "cr5",
+                                                                 "action_date": "2026-06-06", "action": "보류"}))
+        rec.run("actions.flush (update)", store._flush_actions)
+        rec.run("actions.delete", lambda: store.delete_action(action_date="2026-10-18", creative_key="new"))
+        rec.run("actions.flush (delete)", store._flush_actions)
+        mirror.mark_stale()
+        rec.run("actions.load (after own writes)", store.load_actions)
+
+        def quota_then_retry():
+            # 429 한 번은 호출 관문이 바로 다시 시도해 반영까지 끝난다
+            store.upsert_action(**{**new_row, "creative_key": "quota"})
+            spreadsheet.fail_next(1)
+            assert store._write_behind.flush_now(), store._write_behind.last_error
+
+        rec.run("actions.flush (429 -> retry)", quota_then_retry)
+
+        material = _material_frame(size)
+        rec.run("material.save (initial)", lambda: save_material_statuses(material))
+        changed = material.copy()
+        changed.loc[size // 2, "status"] = "OFF"
+        rec.run("material.save (1 row changed)", lambda: save_material_statuses(changed))
+        loaded = rec.run("material.load (unchanged)", load_material_statuses)
+        if not loaded.reset_index(drop=True).equals(changed.astype(str).reset_index(drop=True)):
+            raise AssertionError("material round trip mismatch")
+
+        # 길이/첫 글자가 같은 편집과 같은 행 안의 열 바꿈도 지문이 잡아 다시 받아야 한다
+        material_ws = spreadsheet.worksheet(MATERIAL_TITLE)
+        material_ws.rows[2][5] = "2026-10-02"
+        edited = rec.run("material.load (same-length edit)", load_material_statuses)
+        if edited.iloc[1]["last_seen_date"] != "2026-10-02":
+            raise AssertionError("same-length edit was served from the stale cache")
+        loaded = edited
+
+        action_ws = spreadsheet.worksheet(ACTIONS_TITLE)
+        action_ws.rows[3][3], action_ws.rows[3][4] = action_ws.rows[3][4], action_ws.rows[3][3]
+        mirror.mark_stale()
+        swapped = rec.run("actions.load (values swapped between columns)", store.load_actions)
+        swapped_row = swapped[swapped["creative_key"] == action_ws.rows[3][2]].iloc[0]
+        if swapped_row["campaign"] != action_ws.rows[3][3]:
+            raise AssertionError("column swap was served from the stale mirror")
+
+        def quota_exhausted():
+            # 지문 조회와 전체 다운로드가 재시도까지 모두 429 -> 마지막으로 받은 내용
+            spreadsheet.fail_next(2 * (MAX_RETRIES + 1))
+            return load_material_statuses()
+
+        spreadsheet.worksheet(MATERIAL_TITLE).rows[1][4] = "PAUSED"  # 지문이 바뀌어 다시 받으려 하게
+        fallback = rec.run("material.load (quota exhausted -> cached)", quota_exhausted)
+        if not fallback.reset_index(drop=True).equals(loaded.reset_index(drop=True)):
+            raise AssertionError("quota fallback did not return the cached table")
+
+        sheet_rows = len(spreadsheet.worksheet(ACTIONS_TITLE).get_all_values()) - 1
+        if sheet_rows != size + 1:  # 원래 행 + quota 시나리오에서 추가한 행
+            raise AssertionError(f"action sheet rows {sheet_rows} != {size + 1}")
+    return rec.rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Sheets 저장소 벤치마크 (fake)")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--latency", type=float, default=0.0, help="API 호출당 지연(초)")
+    args = parser.parse_args(argv)
+
+    rows = []
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        rows += run_size(size, latency=args.latency)
+    report = pd.DataFrame(rows)
+    with pd.option_context("display.width", 200, "display.max_colwidth", 80):
+        print(report.to_string(index=False))
+    over = report[report["check"] == "OVER"]
+    if not over.empty:
+        print(f"\n호출 수 예산 초과 {len(over)}건")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import functools
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+import pandas as pd
+
+
+DEFAULT_TIMEOUT_SECONDS = 180
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    같은 key로 동시에 들어온 호출을 하나로 합친다.
+    첫 호출자(leader)만 실제로 실행하고, 나머지는 그 결과/예외를 그대로 받는다.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def _bump(self, name: str, field: str) -> None:
+        stat = self._stats.setdefault(name, {"calls": 0, "executed": 0, "coalesced": 0, "errors": 0, "timeouts": 0})
+        stat[field] += 1
+
+    def do(
+        self,
+        name: str,
+        key: Hashable,
+        fn: Callable[..., Any],
+        *args,
+        timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS,
+        **kwargs,
+    ) -> Any:
+        """
+        fn(*args, **kwargs) 실행. 같은 (name, key)가 진행 중이면 그 결과를 최대 timeout초 기다린다.
+        대기 시간 초과 시 TimeoutError, leader가 실패하면 같은 예외를 다시 올린다.
+        """
+        full_key = (name, key)
+        with self._lock:
+            self._bump(name, "calls")
+            call = self._calls.get(full_key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[full_key] = call
+                self._bump(name, "executed")
+            else:
+                self._bump(name, "coalesced")
+
+        if leader:
+            try:
+                call.result = fn(*args, **kwargs)
+            except BaseException as e:
+                call.error = e
+                with self._lock:
+                    self._bump(name, "errors")
+            finally:
+                with self._lock:
+                    self._calls.pop(full_key, None)
+                call.done.set()
+        elif not call.done.wait(timeout):
+            with self._lock:
+                self._bump(name, "timeouts")
+            raise TimeoutError(f"single-flight wait timed out after {timeout}s: {name}")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> pd.DataFrame:
+        """함수별 호출/실행/병합(coalesced) 건수."""
+        with self._lock:
+            rows = [{"function": name, **stat} for name, stat in self._stats.items()]
+        return pd.DataFrame(rows)
+
+
+_group = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    return _group
+
+
+def single_flight(name: Optional[str] = None, *, timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS):
+    """
+    (함수, 인자) 단위 single-flight 데코레이터.
+    st.cache_data와 함께 쓸 때는 cache_data 안쪽에 둬서 캐시 miss가 동시에 나도 한 번만 호출되게 한다.
+    """
+
+    def decorator(fn):
+        flight_name = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            return _group.do(flight_name, key, fn, *args, timeout=timeout, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import threading
+from typing import Optional
+
+import pandas as pd
+
+from services.time_utils import kst_now
+
+
+class StageReport:
+    """
+    데이터 파이프라인 단계별 행 수/소요 시간/응답 크기 (단계마다 가장 최근 값).
+    어느 단계에서 행이 얼마나 줄어드는지 보고 서버 측 필터 효과를 확인하는 용도.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rows: dict[tuple[str, str], dict] = {}
+
+    def record(
+        self,
+        pipeline: str,
+        stage: str,
+        rows: int,
+        *,
+        ms: Optional[float] = None,
+        kb: Optional[float] = None,
+        note: str = "",
+    ) -> None:
+        entry = {
+            "pipeline": pipeline,
+            "stage": stage,
+            "rows": int(rows),
+            "ms": round(ms, 1) if ms is not None else None,
+            "kb": round(kb, 1) if kb is not None else None,
+            "note": note,
+            "at": kst_now().strftime("%H:%M:%S"),
+        }
+        with self._lock:
+            # 처음 기록된 순서를 유지 (dict 삽입 순서)
+            self._rows[(pipeline, stage)] = entry
+
+    def frame(self) -> pd.DataFrame:
+        with self._lock:
+            rows = list(self._rows.values())
+        return pd.DataFrame(rows, columns=["pipeline", "stage", "rows", "ms", "kb", "note", "at"])
+
+
+_report = StageReport()
+
+
+def get_stage_report() -> StageReport:
+    return _report
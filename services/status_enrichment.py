@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from typing import Callable, Mapping
+
+import numpy as np
+import pandas as pd
+
+
+ACTIVE_STATUSES = frozenset({"ACTIVE", "ON", "ENABLED", "RUNNING"})
+STATUS_LEVELS = ("ad_status", "adset_status", "campaign_status")
+
+# ad_id -> {"ad_status": ..., "adset_status": ..., "campaign_status": ...}
+StatusMap = Mapping[str, Mapping[str, str]]
+
+
+def is_active_status(values: pd.Series) -> pd.Series:
+    """상태 문자열 Series -> 게재중 여부 (대소문자/공백 무시)."""
+    return values.fillna("").astype(str).str.strip().str.upper().isin(ACTIVE_STATUSES)
+
+
+def meta_ad_ids(df: pd.DataFrame) -> tuple[str, ...]:
+    """Meta 행의 고유 ad_id (정렬). 상태 조회는 이 목록으로 한 번만 한다."""
+    if df is None or df.empty or "Ad_ID" not in df.columns or "Platform" not in df.columns:
+        return ()
+    meta_mask = df["Platform"].astype(str).str.upper() == "META"
+    ids = df.loc[meta_mask, "Ad_ID"].astype(str).str.strip()
+    ids = ids[(ids != "") & (ids.str.lower() != "nan")]
+    return tuple(sorted(ids.unique().tolist()))
+
+
+def _status_frame(status_map: StatusMap) -> pd.DataFrame:
+    frame = pd.DataFrame.from_dict(dict(status_map or {}), orient="index")
+    frame = frame.reindex(columns=list(STATUS_LEVELS)).fillna("")
+    frame.index = frame.index.astype(str).str.strip()
+    return frame.astype(str).apply(lambda col: col.str.upper().str.strip())
+
+
+def enrich_delivery_status(df: pd.DataFrame, status_map: StatusMap) -> pd.DataFrame:
+    """
+    인사이트 행에 ad/adset/campaign 게재 상태와 실제 게재 여부를 붙인다.
+    - Meta 행: ad_id별 상태를 한 번에 매핑. ad 상태가 비면 기존 Status로 보완하고,
+      Effective_Is_On은 ad/adset/campaign 셋 모두 활성일 때만 True. Status도 ad 상태로 채운다.
+    - 그 외 행: 기존 Status만으로 판단.
+    """
+    if df is None or df.empty:
+        return df.copy() if isinstance(df, pd.DataFrame) else pd.DataFrame()
+
+    work = df.copy()
+    if "Status" not in work.columns:
+        work["Status"] = ""
+    work["Effective_Is_On"] = is_active_status(work["Status"])
+
+    if "Platform" in work.columns and "Ad_ID" in work.columns:
+        meta_mask = (work["Platform"].astype(str).str.upper() == "META").to_numpy()
+        if meta_mask.any():
+            ad_ids = work.loc[meta_mask, "Ad_ID"].astype(str).str.strip()
+            # 고유 ad_id 단위로 정규화한 표를 행 단위로 펼친다 (reindex 한 번)
+            statuses = _status_frame(status_map).reindex(ad_ids.to_numpy()).fillna("")
+            statuses.index = ad_ids.index
+
+            status_raw = work.loc[meta_mask, "Status"].astype(str).str.upper().str.strip()
+            ad_status = statuses["ad_status"].where(statuses["ad_status"] != "", status_raw)
+            adset_status = statuses["adset_status"]
+            campaign_status = statuses["campaign_status"]
+
+            for col in STATUS_LEVELS:
+                if col not in work.columns:
+                    work[col] = np.nan
+                work[col] = work[col].astype(object)
+            work.loc[meta_mask, "ad_status"] = ad_status
+            work.loc[meta_mask, "adset_status"] = adset_status
+            work.loc[meta_mask, "campaign_status"] = campaign_status
+            work.loc[meta_mask, "Effective_Is_On"] = (
+                is_active_status(ad_status) & is_active_status(adset_status) & is_active_status(campaign_status)
+            )
+            fetched = statuses["ad_status"] != ""
+            work.loc[fetched[fetched].index, "Status"] = ad_status[fetched]
+
+    work["Effective_Is_On"] = work["Effective_Is_On"].astype(bool)
+    work["Effective_Status"] = np.where(work["Effective_Is_On"], "ACTIVE", "PAUSED")
+    return work
+
+
+def annotate_delivery_status(
+    df: pd.DataFrame,
+    fetch_statuses: Callable[[tuple[str, ...]], StatusMap],
+) -> pd.DataFrame:
+    """고유 ad_id로 상태를 한 번 조회(fetch_statuses)하고 enrich_delivery_status로 붙인다."""
+    ad_ids = meta_ad_ids(df)
+    status_map = fetch_statuses(ad_ids) if ad_ids else {}
+    return enrich_delivery_status(df, status_map)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+FREQ_MAP = {"1일": "D", "3일": "3D", "7일": "W"}
+
+_SUM_COLS = ["Cost", "Impressions", "Clicks", "Conversions", "Conversion_Value"]
+_LEVEL_KEYS = {
+    "creative": ["Creative_ID"],
+    "adgroup": ["AdGroup", "Campaign"],
+    "campaign": ["Campaign"],
+    "total": [],
+}
+
+
+def add_derived_metrics(agg_df: pd.DataFrame) -> pd.DataFrame:
+    """합계 컬럼에서 CPA/CPM/CTR/CPC/CVR/ROAS 계산 (분모 0이면 0)."""
+    agg_df['CPA'] = np.where(agg_df['Conversions'] > 0, agg_df['Cost'] / agg_df['Conversions'], 0)
+    agg_df['CPM'] = np.where(agg_df['Impressions'] > 0, agg_df['Cost'] / agg_df['Impressions'] * 1000, 0)
+    agg_df['CTR'] = np.where(agg_df['Impressions'] > 0, agg_df['Clicks'] / agg_df['Impressions'] * 100, 0)
+    agg_df['CPC'] = np.where(agg_df['Clicks'] > 0, agg_df['Cost'] / agg_df['Clicks'], 0)
+    agg_df['CVR'] = np.where(agg_df['Clicks'] > 0, agg_df['Conversions'] / agg_df['Clicks'] * 100, 0)
+    agg_df['ROAS'] = np.where(agg_df['Cost'] > 0, agg_df['Conversion_Value'] / agg_df['Cost'] * 100, 0)
+    return agg_df
+
+
+def build_trend_cube(df: pd.DataFrame) -> dict:
+    """
+    데이터 로드 1회당 한 번만 만드는 추세 집계 큐브.
+    (level, freq) -> keys + Date MultiIndex의 합계 프레임.
+    level: creative / adgroup / campaign / total, freq: D / 3D / W
+    3D 구간은 전체 데이터 시작일 기준으로 정렬된다.
+    """
+    if df is None or df.empty or "Date" not in df.columns:
+        return {}
+
+    cols = [c for c in ("Creative_ID", "AdGroup", "Campaign") if c in df.columns]
+    base = df[["Date"] + cols + [c for c in _SUM_COLS if c in df.columns]].copy()
+    for c in _SUM_COLS:
+        if c not in base.columns:
+            base[c] = 0.0
+    for c in ("Creative_ID", "AdGroup", "Campaign"):
+        base[c] = base[c].astype(str) if c in base.columns else ""
+    base["Date"] = pd.to_datetime(base["Date"], errors="coerce").dt.normalize()
+    base = base[base["Date"].notna()]
+    if base.empty:
+        return {}
+
+    cube: dict = {}
+    for level, keys in _LEVEL_KEYS.items():
+        daily = base.groupby(keys + ["Date"])[_SUM_COLS].sum().sort_index()
+        cube[(level, "D")] = daily
+        for freq in ("3D", "W"):
+            # 3D 구간은 각 level 프레임 전체의 첫 날(=데이터 시작일)부터 잘린다
+            rolled = daily.groupby(keys + [pd.Grouper(level="Date", freq=freq)])[_SUM_COLS].sum()
+            cube[(level, freq)] = rolled.sort_index()
+    return cube
+
+
+def _xs(frame: pd.DataFrame, key, level) -> pd.DataFrame:
+    try:
+        return frame.xs(key, level=level)
+    except KeyError:
+        return frame.iloc[0:0].droplevel(level)
+
+
+def trend_slice(
+    cube: dict,
+    freq: str,
+    *,
+    creative: Optional[str] = None,
+    adgroup: Optional[str] = None,
+    campaign: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    큐브에서 선택 조건에 맞는 구간 합계를 꺼내 파생 지표를 붙여 반환 (Date 내림차순).
+    creative가 있으면 소재 기준, 아니면 adgroup/campaign 조건 조합, 모두 없으면 전체.
+    """
+    if not cube or ("total", freq) not in cube:
+        return pd.DataFrame()
+
+    if creative:
+        frame = _xs(cube[("creative", freq)], str(creative), "Creative_ID")
+    elif adgroup and campaign:
+        frame = _xs(cube[("adgroup", freq)], (str(adgroup), str(campaign)), ["AdGroup", "Campaign"])
+    elif adgroup:
+        frame = _xs(cube[("adgroup", freq)], str(adgroup), "AdGroup").groupby(level="Date").sum()
+    elif campaign:
+        frame = _xs(cube[("campaign", freq)], str(campaign), "Campaign")
+    else:
+        frame = cube[("total", freq)]
+
+    if frame.empty:
+        return pd.DataFrame()
+
+    # 선택 구간 안의 빈 기간은 0으로 채워 pd.Grouper와 동일한 연속 구간을 유지
+    full_idx = pd.date_range(frame.index.min(), frame.index.max(), freq=freq, name="Date")
+    agg_df = frame.reindex(full_idx, fill_value=0).reset_index()
+    agg_df = add_derived_metrics(agg_df)
+    return agg_df.sort_values('Date', ascending=False)
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 import pandas as pd
 
@@ -31,44 +33,101 @@ def _db_path() -> Path:
     return data_dir / "video_materials.db"
 
 
-def _init_db(path: Path) -> None:
-    with sqlite3.connect(path) as conn:
-        conn.execute(
-            f"""
-            CREATE TABLE IF NOT EXISTS {_TABLE} (
-                snapshot_date TEXT NOT NULL,
-                video_key TEXT NOT NULL,
-                video_id TEXT,
-                video_url TEXT,
-                material_name TEXT,
-                campaign TEXT,
-                adgroup TEXT,
-                ad_id TEXT NOT NULL,
-                status TEXT,
-                cost REAL DEFAULT 0,
-                conversion_value REAL DEFAULT 0,
-                roas REAL DEFAULT 0,
-                updated_at TEXT NOT NULL,
-                PRIMARY KEY (snapshot_date, ad_id, video_key)
-            )
-            """
-        )
-        conn.execute(
-            f"CREATE INDEX IF NOT EXISTS idx_{_TABLE}_video_key ON {_TABLE} (video_key)"
-        )
-        conn.execute(
-            f"CREATE INDEX IF NOT EXISTS idx_{_TABLE}_snapshot_date ON {_TABLE} (snapshot_date)"
-        )
-        conn.commit()
-
-
-def upsert_meta_video_daily(df: pd.DataFrame, db_path: Optional[str] = None) -> int:
-    if df is None or df.empty:
-        return 0
-
-    path = Path(db_path) if db_path else _db_path()
-    _init_db(path)
+_SCHEMA = (
+    f"""
+    CREATE TABLE IF NOT EXISTS {_TABLE} (
+        snapshot_date TEXT NOT NULL,
+        video_key TEXT NOT NULL,
+        video_id TEXT,
+        video_url TEXT,
+        material_name TEXT,
+        campaign TEXT,
+        adgroup TEXT,
+        ad_id TEXT NOT NULL,
+        status TEXT,
+        cost REAL DEFAULT 0,
+        conversion_value REAL DEFAULT 0,
+        roas REAL DEFAULT 0,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (snapshot_date, ad_id, video_key)
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS idx_{_TABLE}_video_key ON {_TABLE} (video_key)",
+    f"CREATE INDEX IF NOT EXISTS idx_{_TABLE}_snapshot_date ON {_TABLE} (snapshot_date)",
+)
+
+_UPSERT_SQL = f"""
+    INSERT OR REPLACE INTO {_TABLE} (
+        snapshot_date, video_key, video_id, video_url, material_name,
+        campaign, adgroup, ad_id, status, cost, conversion_value, roas, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# 연결 직후 한 번: WAL(읽기와 쓰기가 서로 막지 않음), 커밋마다 fsync하지 않는 NORMAL,
+# 페이지 캐시 약 32MB, 읽기는 mmap(256MB)으로
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-32000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class _Database:
+    """
+    db 파일 하나에 대한 프로세스 공유 연결. 스키마/PRAGMA는 처음 열 때 한 번만 실행한다.
+    Streamlit은 실행마다 다른 스레드를 쓰므로 check_same_thread=False로 열고 잠금으로 한 번에 하나씩 쓴다.
+    """
 
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        for pragma in _PRAGMAS:
+            conn.execute(pragma)
+        for ddl in _SCHEMA:
+            conn.execute(ddl)
+        conn.commit()
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """잠금을 잡은 채 연결을 빌려준다. 예외가 나면 진행 중인 트랜잭션을 되돌린다."""
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._open()
+            try:
+                yield self._conn
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_databases: dict[Path, _Database] = {}
+_databases_lock = threading.Lock()
+
+
+def _database(db_path: Optional[str] = None) -> _Database:
+    path = Path(db_path).resolve() if db_path else _db_path()
+    with _databases_lock:
+        db = _databases.get(path)
+        if db is None:
+            db = _databases[path] = _Database(path)
+        return db
+
+
+def _prepare_rows(df: pd.DataFrame) -> list[tuple]:
+    """업서트할 행 튜플 (_UPSERT_SQL 컬럼 순서). 날짜/ad_id/video_key가 없는 행은 뺀다."""
     work = df.copy()
     for col in _COLUMNS:
         if col not in work.columns:
@@ -106,27 +165,24 @@ def upsert_meta_video_daily(df: pd.DataFrame, db_path: Optional[str] = None) ->
             )
         )
 
+    return rows
+
+
+def upsert_meta_video_daily(df: pd.DataFrame, db_path: Optional[str] = None) -> int:
+    if df is None or df.empty:
+        return 0
+
+    rows = _prepare_rows(df)
     if not rows:
         return 0
 
-    with sqlite3.connect(path) as conn:
-        conn.executemany(
-            f"""
-            INSERT OR REPLACE INTO {_TABLE} (
-                snapshot_date, video_key, video_id, video_url, material_name,
-                campaign, adgroup, ad_id, status, cost, conversion_value, roas, updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            rows,
-        )
+    with _database(db_path).connection() as conn:
+        conn.executemany(_UPSERT_SQL, rows)
         conn.commit()
     return len(rows)
 
 
-def load_meta_video_daily(days: int = 180, db_path: Optional[str] = None) -> pd.DataFrame:
-    path = Path(db_path) if db_path else _db_path()
-    _init_db(path)
-
+def _load_query(days: int) -> tuple[str, list]:
     query = f"""
         SELECT snapshot_date, video_key, video_id, video_url, material_name,
                campaign, adgroup, ad_id, status, cost, conversion_value, roas
@@ -138,8 +194,12 @@ def load_meta_video_daily(days: int = 180, db_path: Optional[str] = None) -> pd.
         query += " WHERE snapshot_date >= ?"
         params.append(since)
     query += " ORDER BY snapshot_date DESC, video_key ASC"
+    return query, params
+
 
-    with sqlite3.connect(path) as conn:
+def load_meta_video_daily(days: int = 180, db_path: Optional[str] = None) -> pd.DataFrame:
+    query, params = _load_query(days)
+    with _database(db_path).connection() as conn:
         df = pd.read_sql_query(query, conn, params=params)
 
     if df.empty:
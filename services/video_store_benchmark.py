@@ -0,0 +1,142 @@
+"""
+video_material_store SQLite 벤치마크 (임시 파일, 네트워크 없음).
+
+    python -m services.video_store_benchmark [--seed-rows 20000] [--batch 20] [--repeat 200]
+
+seed-rows행을 넣어 둔 db에서 batch행짜리 작은 업서트와 최근 30일 조회를 repeat번 반복해
+A) 예전 방식: 호출마다 sqlite3.connect + 스키마(DDL 3개) + 기본 PRAGMA
+B) 공유 연결: 경로별 연결 하나, 스키마/PRAGMA(WAL, synchronous=NORMAL, cache, mmap)는 처음 한 번
+를 비교하고 두 방식의 조회 결과가 같은지 확인한다.
+업서트의 행 만들기(_prepare_rows)는 두 방식이 같으므로 db_ms에 그 시간을 뺀 SQLite 쪽 시간만 따로 보인다.
+"""
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from services import video_material_store as store
+
+
+def synthetic_frame(rows: int, *, offset: int = 0, days: int = 90) -> pd.DataFrame:
+    today = date.today()
+    return pd.DataFrame({
+        "snapshot_date": [(today - timedelta(days=i % days)).isoformat() for i in range(offset, offset + rows)],
+        "video_key": [f"v{i % 3000}" for i in range(offset, offset + rows)],
+        "video_id": [f"{1000 + i % 3000}" for i in range(offset, offset + rows)],
+        "video_url": "",
+        "material_name": [f"material_{i % 3000}" for i in range(offset, offset + rows)],
+        "campaign": [f"Camp{i % 40}" for i in range(offset, offset + rows)],
+        "adgroup": [f"AG{i % 300}" for i in range(offset, offset + rows)],
+        "ad_id": [f"ad{i}" for i in range(offset, offset + rows)],
+        "status": "ACTIVE",
+        "cost": [float(i % 500) for i in range(offset, offset + rows)],
+        "conversion_value": [float(i % 900) for i in range(offset, offset + rows)],
+        "roas": 1.8,
+    })
+
+
+def legacy_upsert(df: pd.DataFrame, path: Path) -> int:
+    """예전 upsert_meta_video_daily: 호출마다 스키마 확인 연결 + 쓰기 연결 (기본 rollback 저널, synchronous=FULL)."""
+    with sqlite3.connect(path) as conn:
+        for ddl in store._SCHEMA:
+            conn.execute(ddl)
+        conn.commit()
+    rows = store._prepare_rows(df)
+    with sqlite3.connect(path) as conn:
+        conn.executemany(store._UPSERT_SQL, rows)
+        conn.commit()
+    return len(rows)
+
+
+def legacy_load(days: int, path: Path) -> pd.DataFrame:
+    """예전 load_meta_video_daily (조회 후 타입 변환까지 같게)."""
+    with sqlite3.connect(path) as conn:
+        for ddl in store._SCHEMA:
+            conn.execute(ddl)
+        conn.commit()
+    query, params = store._load_query(days)
+    with sqlite3.connect(path) as conn:
+        df = pd.read_sql_query(query, conn, params=params)
+    df["snapshot_date"] = pd.to_datetime(df["snapshot_date"], errors="coerce")
+    for col in ("cost", "conversion_value", "roas"):
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+    return df
+
+
+def _prepare_seconds(batches: list[pd.DataFrame]) -> float:
+    t0 = time.perf_counter()
+    for batch in batches:
+        store._prepare_rows(batch)
+    return time.perf_counter() - t0
+
+
+def _run(upsert, load, batches: list[pd.DataFrame], days: int) -> tuple[float, float, pd.DataFrame]:
+    t_upsert = t_load = 0.0
+    result = pd.DataFrame()
+    for batch in batches:
+        t0 = time.perf_counter()
+        upsert(batch)
+        t1 = time.perf_counter()
+        result = load(days)
+        t2 = time.perf_counter()
+        t_upsert += t1 - t0
+        t_load += t2 - t1
+    return t_upsert, t_load, result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="video_material_store SQLite 벤치마크")
+    parser.add_argument("--seed-rows", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    seed = synthetic_frame(args.seed_rows)
+    batches = [synthetic_frame(args.batch, offset=i * args.batch) for i in range(args.repeat)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = Path(tmp) / "legacy.db"
+        shared_path = Path(tmp) / "shared.db"
+        legacy_upsert(seed, legacy_path)
+        store.upsert_meta_video_daily(seed, db_path=str(shared_path))
+
+        a_up, a_load, a_df = _run(
+            lambda df: legacy_upsert(df, legacy_path), lambda d: legacy_load(d, legacy_path), batches, args.days
+        )
+        b_up, b_load, b_df = _run(
+            lambda df: store.upsert_meta_video_daily(df, db_path=str(shared_path)),
+            lambda d: store.load_meta_video_daily(d, db_path=str(shared_path)),
+            batches,
+            args.days,
+        )
+        store._database(str(shared_path)).close()
+    prep = _prepare_seconds(batches)
+
+    n = args.repeat
+    ms = lambda seconds: round(seconds / n * 1000, 2)
+    rows = [
+        {"path": "legacy (connect + DDL per call)", "upsert_ms": ms(a_up), "db_ms": ms(a_up - prep), "load_ms": ms(a_load)},
+        {"path": "shared connection (WAL, NORMAL)", "upsert_ms": ms(b_up), "db_ms": ms(b_up - prep), "load_ms": ms(b_load)},
+    ]
+    print(f"시드 {args.seed_rows:,}행, {args.batch}행 업서트 + 최근 {args.days}일 조회 x {n}회 (호출당 평균)\n")
+    print(pd.DataFrame(rows).to_string(index=False))
+    print(
+        f"\n업서트 {a_up / b_up:.1f}배 (SQLite 쪽 {(a_up - prep) / max(b_up - prep, 1e-9):.1f}배), "
+        f"조회 {a_load / b_load:.1f}배"
+    )
+
+    same = a_df.reset_index(drop=True).equals(b_df.reset_index(drop=True))
+    print(f"조회 결과 일치: {same} ({len(b_df):,}행)")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import atexit
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+from services.time_utils import kst_now
+
+
+FLUSH_INTERVAL_SECONDS = 5
+_BACKOFF_BASE_SECONDS = 5
+_BACKOFF_MAX_SECONDS = 300
+
+
+def is_quota_error(e: BaseException) -> bool:
+    """Sheets API 할당량/속도 제한 오류 (429, RESOURCE_EXHAUSTED)."""
+    text = str(e)
+    return getattr(e, "code", None) == 429 or "RESOURCE_EXHAUSTED" in text or "Quota exceeded" in text
+
+
+class WriteBehind:
+    """
+    로컬에 먼저 저장된 변경을 백그라운드에서 주기적으로 원격(시트)에 반영한다.
+    대기 중인 변경 자체는 호출 측 저장소(예: SQLite dirty 행)에 남아 있으므로 프로세스가 재시작돼도
+    잃지 않는다. 이 클래스는 언제 flush할지(주기, 실패 시 지수 백오프)만 담당한다.
+    - flush(): 대기 변경을 한 번에 반영. 실패하면 예외
+    - pending(): 대기 중인 변경 수
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[], object],
+        pending: Callable[[], int],
+        *,
+        name: str,
+        interval: float = FLUSH_INTERVAL_SECONDS,
+    ) -> None:
+        self._flush = flush
+        self._pending = pending
+        self.name = name
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._failures = 0
+        self._next_attempt = 0.0
+        self.last_error = ""
+        self.last_flush_at = ""
+        self.flushes = 0
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._thread is None:
+                atexit.register(self._flush_at_exit)
+            self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+            self._thread.start()
+
+    def notify(self) -> None:
+        """새 변경이 생겼음을 알린다. 바로 쓰지 않고 다음 주기에 모아서 반영한다."""
+        self.ensure_started()
+
+    def _loop(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            if time.time() < self._next_attempt:
+                continue
+            try:
+                if self._pending() > 0:
+                    self.flush_now()
+            except Exception:
+                pass
+
+    def flush_now(self) -> bool:
+        """대기 변경을 지금 반영. 실패하면 백오프를 늘리고 False."""
+        try:
+            self._flush()
+        except Exception as e:
+            self._failures += 1
+            # 할당량 초과는 더 길게 쉰다. 여러 프로세스가 동시에 재시도하지 않도록 지터를 섞는다
+            base = _BACKOFF_BASE_SECONDS * (4 if is_quota_error(e) else 1)
+            delay = min(_BACKOFF_MAX_SECONDS, base * 2 ** (self._failures - 1))
+            self._next_attempt = time.time() + delay * random.uniform(0.8, 1.2)
+            self.last_error = str(e)[:300]
+            return False
+        self._failures = 0
+        self._next_attempt = 0.0
+        self.last_error = ""
+        self.last_flush_at = kst_now().strftime("%H:%M:%S")
+        self.flushes += 1
+        return True
+
+    def status(self) -> dict:
+        """화면 표시용: 대기 수, 연속 실패 수, 다음 재시도까지 남은 초, 마지막 오류/반영 시각."""
+        try:
+            pending = int(self._pending())
+        except Exception:
+            pending = 0
+        return {
+            "pending": pending,
+            "failures": self._failures,
+            "retry_in": max(0, round(self._next_attempt - time.time())),
+            "last_error": self.last_error,
+            "last_flush_at": self.last_flush_at,
+        }
+
+    def _flush_at_exit(self) -> None:
+        # 종료 직전 남은 변경을 한 번 더 시도 (실패해도 로컬에 남아 다음 실행에서 반영)
+        try:
+            if self._pending() > 0:
+                self.flush_now()
+        except Exception:
+            pass